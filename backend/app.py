@@ -7,6 +7,9 @@ import os
 import psycopg2 # Import pour PostgreSQL
 from psycopg2 import sql
 from datetime import datetime # Pour gérer les dates
+from src.services.jobs import JobQueue # File de jobs partagée avec src/main.py
+from src.services.profiler import profiler # Profileur partagé avec src/main.py
+from src.services.metrics import metrics, pool_samples, queue_samples # Métriques Prometheus (/metrics)
 
 # Configuration de l'application
 app = Flask(__name__, static_folder='static', static_url_path='')
@@ -16,6 +19,12 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'une-cle-secrete-par-def
 # Initialisation CORS
 CORS(app)
 
+# Métriques Prometheus sur /metrics (METRICS_TOKEN, PROMETHEUS_MULTIPROC_DIR)
+metrics.init_app(app)
+
+# Profileur par échantillonnage des requêtes (PROFILER_TOKEN, PROFILER_SAMPLE_RATE)
+profiler.init_app(app)
+
 # --- Configuration et fonctions de base de données ---
 # Lire l'URL de la DB depuis les variables d'environnement
 # Render fournira cette variable automatiquement
@@ -98,6 +107,16 @@ def initialize_db():
 # mais pour cet exemple, l'initialisation au démarrage est suffisante.
 initialize_db()
 
+# File de jobs en base (table `job`), alimentée depuis n'importe quelle route via
+# src.services.jobs.enqueue(). Les jobs sont exécutés par le worker : python src/worker.py
+job_queue = None
+if DATABASE_URL:
+    job_queue = JobQueue.from_url(DATABASE_URL, pool_pre_ping=True)
+    job_queue.create_table()
+    app.extensions['jobs'] = job_queue
+    metrics.register_collector(lambda: pool_samples('jobs', job_queue.engine))
+    metrics.register_collector(lambda: queue_samples(job_queue), per_process=False)
+
 # Données en mémoire pour les sessions (simple, non persistant)
 # ATTENTION: Les sessions seront perdues à chaque redémarrage du serveur.
 # Pour une application de production, utilisez une gestion de session persistante (DB, Redis, JWT...)
@@ -424,6 +443,22 @@ def upload_file():
     return jsonify({'message': 'Route d\'upload de fichier à implémenter'})
 
 
+# Profils échantillonnés des requêtes (jeton PROFILER_TOKEN ou session administrateur)
+@app.route('/api/admin/profiles', methods=['GET', 'DELETE'])
+def admin_profiles():
+    session_id = request.cookies.get('session_id')
+    is_admin = session_id in sessions and sessions[session_id]['user_data']['role'] == 'admin'
+    if not is_admin and not profiler.authorized(request):
+        return jsonify({'error': 'Accès refusé'}), 403
+
+    if request.method == 'DELETE':
+        profiler.reset()
+        return jsonify({'message': 'Profils réinitialisés'})
+    # ?format=collapsed : piles repliées pour flamegraph.pl / speedscope
+    if request.args.get('format') == 'collapsed':
+        return profiler.collapsed(request.args.get('endpoint')), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return jsonify(profiler.summary())
+
 # Route de test (mise à jour pour refléter l'utilisation de la DB)
 @app.route('/api/test', methods=['GET'])
 def test():
@@ -0,0 +1,65 @@
+# Outils communs aux benchmarks : base SQLite temporaire et application isolée.
+# À importer avant src.main, qui lit la configuration à l'import.
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def prepare_environment(database_url=None):
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    os.environ.setdefault('DATABASE_URL', database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault('MEDIA_ROOT', os.path.join(workdir, 'media'))
+    os.environ.setdefault('JOBS_EMBEDDED_WORKERS', '0')
+    os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+    return workdir
+
+def load_app():
+    from src.main import app
+    app.config['TESTING'] = True
+    return app
+
+def seed_users(app, count, password='password', prefix='bench'):
+    from src.models.user import db, User
+    with app.app_context():
+        user = User(username=f'{prefix}0', email=f'{prefix}0@example.org', first_name='Bench', last_name='0')
+        user.set_password(password)
+        users = [user]
+        for index in range(1, count):
+            # Même hachage pour tous : le seed ne doit pas dominer le temps du benchmark
+            users.append(User(
+                username=f'{prefix}{index}', email=f'{prefix}{index}@example.org',
+                first_name='Bench', last_name=str(index), password_hash=user.password_hash
+            ))
+        db.session.add_all(users)
+        db.session.commit()
+        return [u.id for u in users]
+
+def seed_posts(app, author_ids, count):
+    from src.models.user import db
+    from src.models.post import Post
+    with app.app_context():
+        db.session.add_all([
+            Post(content=f'Publication {index}', author_id=author_ids[index % len(author_ids)])
+            for index in range(count)
+        ])
+        db.session.commit()
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(latencies):
+    return 'p50=%.1fms p95=%.1fms p99=%.1fms' % (
+        percentile(latencies, 0.50) * 1000,
+        percentile(latencies, 0.95) * 1000,
+        percentile(latencies, 0.99) * 1000
+    )
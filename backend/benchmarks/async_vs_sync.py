@@ -0,0 +1,116 @@
+# Concurrence et mémoire par connexion : serveur Flask threadé vs mode ASGI.
+#
+#   python benchmarks/async_vs_sync.py --concurrency 50 200 500 --slow-ms 200
+#
+# Chaque client ouvre une connexion, envoie sa requête en deux temps (séparés de
+# --slow-ms pour simuler un client lent), lit la réponse puis recommence.
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from _setup import prepare_environment, load_app, seed_users, seed_posts, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'sync': [sys.executable, '-c', (
+        'import logging, sys; logging.getLogger("werkzeug").setLevel(logging.ERROR); '
+        'from src.main import app; app.run(port=int(sys.argv[1]), threaded=True)'
+    )],
+    'async': [sys.executable, '-m', 'uvicorn', 'src.asgi:app', '--log-level', 'warning', '--port'],
+}
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+async def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'Serveur injoignable sur le port {port}')
+
+async def fetch(port, path, cookie, slow):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode())
+        await writer.drain()
+        if slow:
+            await asyncio.sleep(slow)
+        writer.write(f'Cookie: session={cookie}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+async def load(port, path, cookie, concurrency, duration, slow, timeout):
+    stop = time.monotonic() + duration
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(fetch(port, path, cookie, slow), timeout)
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+            except (asyncio.TimeoutError, OSError):
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[10, 100, 500])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--slow-ms', type=float, default=100.0)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--path', default='/api/posts/?per_page=10')
+    parser.add_argument('--port', type=int, default=5077)
+    args = parser.parse_args()
+
+    prepare_environment()
+    app = load_app()
+    user_ids = seed_users(app, 20)
+    seed_posts(app, user_ids, 200)
+    cookie = app.session_interface.get_signing_serializer(app).dumps({'user_id': user_ids[0]})
+
+    for mode, command in SERVERS.items():
+        server = subprocess.Popen(command + [str(args.port)], cwd=BACKEND_DIR, env=os.environ.copy())
+        try:
+            asyncio.run(wait_ready(args.port))
+            time.sleep(1)
+            idle = rss_kb(server.pid)
+            for concurrency in args.concurrency:
+                latencies, errors = asyncio.run(
+                    load(args.port, args.path, cookie, concurrency, args.duration, args.slow_ms / 1000, args.timeout)
+                )
+                loaded = rss_kb(server.pid)
+                print('%-5s c=%-5d req/s=%-8.1f erreurs=%-5d %s  RSS=%dMo (+%.1fKo/connexion)' % (
+                    mode, concurrency, len(latencies) / args.duration, errors, summarize(latencies),
+                    loaded // 1024, max(loaded - idle, 0) / concurrency
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Débit en écriture concurrente selon le profil du moteur (services/database.py).
+#
+#   python benchmarks/concurrent_writers.py --writers 1 8 32 --duration 10
+#   DATABASE_URL=postgresql://... python benchmarks/concurrent_writers.py
+#
+# Chaque profil tourne dans son propre processus (le moteur est créé à l'import
+# de src.main) ; les rédacteurs publient en boucle via POST /api/posts/ tandis
+# qu'un lecteur parcourt le fil, comme en production.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from _setup import prepare_environment, load_app, seed_users, client_for, summarize
+
+def run_profile(writers, duration):
+    app = load_app()
+    # Préfixe unique : une base Postgres fournie sert à plusieurs mesures
+    user_ids = seed_users(app, max(writers, 1), prefix=f'writer{os.getpid()}-')
+    latencies = []
+    errors = []
+    stop = time.monotonic() + duration
+
+    def writer(user_id):
+        client = client_for(app, user_id)
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            response = client.post('/api/posts/', json={'content': 'Écriture concurrente'})
+            if response.status_code == 201:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors.append(response.status_code)
+
+    def reader():
+        client = client_for(app, user_ids[0])
+        while time.monotonic() < stop:
+            client.get('/api/posts/?per_page=20')
+
+    threads = [threading.Thread(target=writer, args=(user_ids[i % len(user_ids)],)) for i in range(writers)]
+    threads.append(threading.Thread(target=reader))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        status = app.extensions['database_profile'].status()
+    return {
+        'writes_per_second': len(latencies) / duration,
+        'errors': len(errors),
+        'latency': summarize(latencies),
+        'pool': status['pool']
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, nargs='*', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--profiles', nargs='*')
+    parser.add_argument('--child', nargs=2, metavar=('PROFILE', 'WRITERS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        os.environ['DATABASE_PROFILE'] = args.child[0]
+        prepare_environment()
+        print(json.dumps(run_profile(int(args.child[1]), args.duration)))
+        return
+
+    database_url = os.environ.get('DATABASE_URL', '')
+    default_profiles = ['none', 'postgres'] if database_url.startswith('postgres') else ['none', 'sqlite']
+    for profile in args.profiles or default_profiles:
+        for writers in args.writers:
+            # Base neuve par mesure (SQLite) ; pour Postgres, la base fournie est réutilisée
+            env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+            if database_url.startswith('postgres'):
+                env['DATABASE_URL'] = database_url
+            output = subprocess.run(
+                [sys.executable, __file__, '--duration', str(args.duration), '--child', profile, str(writers)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print('%-8s rédacteurs=%-4d écritures/s=%-8.1f erreurs=%-5d %s  pool=%s' % (
+                profile, writers, result['writes_per_second'], result['errors'], result['latency'], result['pool']
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Débit de connexion et latence du fil d'actualité sous charge mixte.
+#
+#   python benchmarks/login_vs_feed.py --login-threads 16 --feed-threads 4 --duration 10
+#
+# Compare le pool de hachage borné (PASSWORD_HASH_WORKERS) à un pool aussi large
+# que le nombre de threads de connexion, ce qui équivaut au hachage en ligne.
+import argparse
+import threading
+import time
+
+from _setup import prepare_environment, load_app, seed_users, seed_posts, client_for, summarize
+
+def run(app, hasher, workers, args, user_ids):
+    hasher.configure(workers, args.queue, args.timeout, hasher.method)
+    stop = threading.Event()
+    logins = {'ok': 0, 'busy': 0}
+    feed_latencies = []
+    lock = threading.Lock()
+
+    def login_loop():
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/api/auth/login', json={'email': 'bench0@example.org', 'password': 'password'})
+            with lock:
+                logins['ok' if response.status_code == 200 else 'busy'] += 1
+
+    def feed_loop():
+        client = client_for(app, user_ids[0])
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/posts/?per_page=10')
+            elapsed = time.perf_counter() - started
+            with lock:
+                feed_latencies.append(elapsed)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(args.login_threads)]
+    threads += [threading.Thread(target=feed_loop) for _ in range(args.feed_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print('hash workers=%-3d logins/s=%.1f (503: %d)  feed %s (%d req)' % (
+        workers, logins['ok'] / args.duration, logins['busy'], summarize(feed_latencies), len(feed_latencies)
+    ))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--feed-threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, nargs='*', default=[2])
+    parser.add_argument('--queue', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    prepare_environment()
+    app = load_app()
+    from src.services.hashing import hasher
+
+    user_ids = seed_users(app, 20)
+    seed_posts(app, user_ids, 200)
+
+    # Référence : autant de threads de hachage que de connexions simultanées
+    for workers in [args.login_threads] + args.workers:
+        run(app, hasher, workers, args, user_ids)
+
+if __name__ == '__main__':
+    main()
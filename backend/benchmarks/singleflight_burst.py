@@ -0,0 +1,97 @@
+# Rafale de lectures identiques (annonce en fin de culte) avec et sans
+# regroupement des requêtes (services/singleflight.py).
+#
+#   python benchmarks/singleflight_burst.py --clients 500 --rounds 3
+#
+# Chaque client ouvre sa connexion et envoie au même instant la même requête
+# (page 1 du fil ou des événements à venir) au serveur Flask threadé.
+import argparse
+import asyncio
+import os
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+from _setup import prepare_environment, load_app, seed_users, seed_posts, summarize
+from async_vs_sync import BACKEND_DIR, SERVERS, wait_ready, fetch
+
+PATHS = ['/api/posts/', '/api/events/?upcoming=true']
+
+def seed_events(app, author_ids, count):
+    from src.models.user import db
+    from src.models.event import Event
+    with app.app_context():
+        start = datetime.utcnow() + timedelta(days=1)
+        db.session.add_all([
+            Event(title=f'Événement {index}', start_date=start + timedelta(hours=index),
+                  created_by=author_ids[index % len(author_ids)])
+            for index in range(count)
+        ])
+        db.session.commit()
+
+async def burst(port, cookie, clients, timeout):
+    latencies = []
+    errors = 0
+
+    async def client(path):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(fetch(port, path, cookie, 0), timeout)
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+        except (asyncio.TimeoutError, OSError):
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(PATHS[index % len(PATHS)]) for index in range(clients)))
+    return time.perf_counter() - started, latencies, errors
+
+async def scrape(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+    await writer.drain()
+    body = (await reader.read()).decode()
+    writer.close()
+    counters = {}
+    for line in body.splitlines():
+        if line.startswith('singleflight_'):
+            name, value = line.rsplit(' ', 1)
+            counters[name[len('singleflight_'):-len('_total')]] = int(float(value))
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--port', type=int, default=5078)
+    args = parser.parse_args()
+
+    prepare_environment()
+    app = load_app()
+    user_ids = seed_users(app, 20)
+    seed_posts(app, user_ids, 200)
+    seed_events(app, user_ids, 50)
+    cookie = app.session_interface.get_signing_serializer(app).dumps({'user_id': user_ids[0]})
+
+    for enabled in ('false', 'true'):
+        env = dict(os.environ, SINGLEFLIGHT_ENABLED=enabled)
+        server = subprocess.Popen(SERVERS['sync'] + [str(args.port)], cwd=BACKEND_DIR, env=env)
+        try:
+            asyncio.run(wait_ready(args.port))
+            time.sleep(1)
+            for round in range(args.rounds):
+                elapsed, latencies, errors = asyncio.run(burst(args.port, cookie, args.clients, args.timeout))
+                print('regroupement=%-5s rafale %d : %d clients en %.2fs erreurs=%-4d %s' % (
+                    enabled, round + 1, args.clients, elapsed, errors, summarize(latencies)
+                ))
+            print('regroupement=%-5s compteurs : %s' % (enabled, asyncio.run(scrape(args.port))))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
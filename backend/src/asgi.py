@@ -0,0 +1,194 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# Mode de service asynchrone : les lectures des publications, prières,
+# événements et groupes passent par un moteur SQLAlchemy asynchrone, avec les
+# mêmes requêtes, contrôles de visibilité et sérialisation que les vues Flask
+# (services/reads.py). Les écritures et toutes les autres routes sont
+# déléguées à l'application Flask synchrone, dans un pool de threads.
+#
+#   uvicorn src.asgi:app --port 5000
+import math
+import re
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.main import app as flask_app
+from src.models.user import User
+from src.services import reads
+from src.services import usercards
+from src.services.replicas import router
+
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+def create_engine(url):
+    return create_async_engine(async_database_url(url), pool_pre_ping=True)
+
+engine = create_engine(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+# Un moteur asynchrone par réplica ; l'état de santé reste celui du routeur Flask
+replica_engines = {
+    replica.name: create_engine(replica.engine.url.render_as_string(hide_password=False))
+    for replica in router.replicas
+}
+Session = async_sessionmaker(expire_on_commit=False)
+
+# Décodage du cookie de session Flask, signé avec la même clé
+session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+session_max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+
+# Requêtes non gérées ici : application Flask dans un pool de threads
+wsgi_app = WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_WSGI_THREADS', 10)))
+
+# Lectures servies nativement, sous le nom de la vue Flask équivalente
+# (étiquettes des métriques, règles de limitation de débit)
+ROUTES = [
+    (re.compile(r'^/api/posts/?$'), 'posts.get_posts', reads.list_posts),
+    (re.compile(r'^/api/posts/(\d+)$'), 'posts.get_post', reads.get_post),
+    (re.compile(r'^/api/prayers/?$'), 'prayers.get_prayers', reads.list_prayers),
+    (re.compile(r'^/api/prayers/(\d+)$'), 'prayers.get_prayer', reads.get_prayer),
+    (re.compile(r'^/api/events/?$'), 'events.get_events', reads.list_events),
+    (re.compile(r'^/api/events/(\d+)$'), 'events.get_event', reads.get_event),
+    (re.compile(r'^/api/groups/?$'), 'groups.get_groups', reads.list_groups),
+    (re.compile(r'^/api/groups/(\d+)$'), 'groups.get_group', reads.get_group),
+]
+
+def match_route(scope):
+    if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+        return None
+    for pattern, endpoint, read in ROUTES:
+        match = pattern.match(scope['path'])
+        if match:
+            return endpoint, read, [int(group) for group in match.groups()]
+    return None
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.remote_addr = (scope.get('client') or (None,))[0]
+        # Première valeur de chaque paramètre, comme request.args.get()
+        query = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+        self.args = {key: values[0] for key, values in query.items()}
+        self.origin = None
+        cookies = SimpleCookie()
+        for name, value in scope['headers']:
+            if name == b'origin':
+                self.origin = value.decode('latin-1')
+            elif name == b'cookie':
+                cookies.load(value.decode('latin-1'))
+        self.session = self._load_session(cookies.get(flask_app.config['SESSION_COOKIE_NAME']))
+
+    def _load_session(self, cookie):
+        if cookie is None:
+            return {}
+        try:
+            return session_serializer.loads(cookie.value, max_age=session_max_age)
+        except BadSignature:
+            return {}
+
+def read_engine(request):
+    # Même aiguillage que ReplicaRouter : primaire pendant la fenêtre collante
+    # qui suit une écriture de l'utilisateur
+    if replica_engines and request.session.get('primary_until', 0) <= time.time():
+        replica = router.pick()
+        if replica is not None:
+            return replica_engines[replica.name]
+    return engine
+
+async def current_user(session, request):
+    user_id = request.session.get('user_id')
+    if not user_id:
+        return None
+    user = await session.get(User, user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+def run_read(sync_session, read, user_id, args, params):
+    # Sérialisation et chargements paresseux dans la session synchrone sous-jacente
+    with usercards.card_scope(sync_session):
+        return read(sync_session, user_id, args, *params)
+
+async def handle(request, endpoint, read, params):
+    limiter = flask_app.extensions.get('ratelimit')
+    if limiter:
+        retry_after = limiter.hit(endpoint, request.session.get('user_id'), request.remote_addr)
+        if retry_after:
+            return {'error': 'Trop de requêtes, réessayez plus tard'}, 429, [(b'retry-after', str(math.ceil(retry_after)).encode())]
+    async with Session(bind=read_engine(request)) as session:
+        user = await current_user(session, request)
+        if not user:
+            return {'error': 'Non authentifié'}, 401, []
+        data, status = await session.run_sync(run_read, read, user.id, request.args, params)
+        return data, status, []
+
+def cors_headers(request):
+    # Équivalent de CORS(app, origins="*") dans main.py
+    if request.origin:
+        return [(b'access-control-allow-origin', request.origin.encode('latin-1')), (b'vary', b'Origin, Cookie')]
+    return [(b'access-control-allow-origin', b'*'), (b'vary', b'Cookie')]
+
+async def send_json(send, request, status, data, headers):
+    # Même corps que jsonify()
+    body = flask_app.json.response(data).get_data()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ] + headers + cors_headers(request)
+    })
+    await send({'type': 'http.response.body', 'body': b'' if request.method == 'HEAD' else body})
+
+async def dispose():
+    await engine.dispose()
+    for replica_engine in replica_engines.values():
+        await replica_engine.dispose()
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    route = match_route(scope)
+    if route is None:
+        return await wsgi_app(scope, receive, send)
+
+    endpoint, read, params = route
+    request = Request(scope)
+    metrics = flask_app.extensions.get('metrics')
+    started = metrics.begin() if metrics else None
+    status = 500
+    try:
+        try:
+            data, status, headers = await handle(request, endpoint, read, params)
+        except Exception as e:
+            data, status, headers = {'error': str(e)}, 500, []
+        await send_json(send, request, status, data, headers)
+    finally:
+        if metrics:
+            metrics.record(started, endpoint.partition('.')[0], endpoint, request.method, status)
+            metrics.end()
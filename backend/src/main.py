@@ -13,6 +13,11 @@ from src.models.group import Group, GroupMembership
 from src.models.prayer import Prayer, PrayerSupport
 from src.models.event import Event, EventAttendance
 from src.models.message import Message
+from src.models.notification import Notification
+from src.models.job import Job
+from src.models.media import Media
+from src.models.archive import ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedMessage
+from src.models.tombstone import Tombstone
 
 # Import des routes
 from src.routes.user import user_bp
@@ -21,6 +26,30 @@ from src.routes.posts import posts_bp
 from src.routes.groups import groups_bp
 from src.routes.prayers import prayers_bp
 from src.routes.events import events_bp
+from src.routes.notifications import notifications_bp
+from src.routes.jobs import jobs_bp
+from src.routes.media import media_bp
+from src.routes.system import system_bp
+from src.routes.sync import sync_bp
+
+# Import des services
+from src.services import jobs
+from src.services import archive
+from src.services import sync
+from src.services import schema
+from src.services import trending
+from src.services.media import processor as media_processor
+from src.services.ratelimit import limiter
+from src.services.hashing import hasher
+from src.services.replicas import router as replica_router
+from src.services.directory import directory
+from src.services.database import profile as database_profile
+from src.services.profiler import profiler
+from src.services.metrics import metrics, pool_samples, lru_samples, queue_samples, cache_samples
+from src.services.fields import build_fieldset
+from src.services.usercards import user_cards
+from src.services.singleflight import flights
+from src.services.visibility import memberships
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -37,6 +66,12 @@ if database_url.startswith("postgres://"):
 
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Profil du moteur (DATABASE_PROFILE=sqlite|postgres|none, déduit de l'URL par défaut)
+database_profile.configure(app)
+
+# Stockage des médias téléversés et pool de redimensionnement
+app.config['MEDIA_ROOT'] = os.environ.get('MEDIA_ROOT', os.path.join(os.path.dirname(__file__), 'media'))
+app.config['MEDIA_WORKERS'] = int(os.environ.get('MEDIA_WORKERS', 2))
 
 # Enregistrement des blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -45,11 +80,67 @@ app.register_blueprint(posts_bp, url_prefix='/api/posts')
 app.register_blueprint(groups_bp, url_prefix='/api/groups')
 app.register_blueprint(prayers_bp, url_prefix='/api/prayers')
 app.register_blueprint(events_bp, url_prefix='/api/events')
+app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+app.register_blueprint(media_bp, url_prefix='/api/media')
+app.register_blueprint(system_bp, url_prefix='/api/system')
+app.register_blueprint(sync_bp, url_prefix='/api/sync')
+
+# Métriques Prometheus sur /metrics (METRICS_TOKEN, PROMETHEUS_MULTIPROC_DIR), avant les autres hooks
+metrics.init_app(app)
+metrics.register_collector(lambda: pool_samples('primary', database_profile.engine))
+metrics.register_collector(lambda: [
+    sample for replica in replica_router.replicas for sample in pool_samples(replica.name, replica.engine)
+])
+metrics.register_collector(lambda: lru_samples('fieldsets', build_fieldset))
+metrics.register_collector(lambda: queue_samples(app.extensions.get('jobs')), per_process=False)
+
+# Profileur par échantillonnage (PROFILER_TOKEN, PROFILER_SAMPLE_RATE)
+profiler.init_app(app)
+
+media_processor.init_app(app)
+
+# Limitation de débit (seaux à jetons par IP et par utilisateur)
+limiter.init_app(app)
+
+# Pool de hachage des mots de passe (PASSWORD_HASH_WORKERS, PASSWORD_HASH_METHOD...)
+hasher.init_app(app)
+
+# Réplicas en lecture (DATABASE_REPLICA_URLS, séparées par des virgules)
+replica_router.init_app(app)
+
+# Cartes utilisateur en cache (USER_CARD_CACHE_SIZE, USER_CARD_CACHE_SHARED=sqlite:///...)
+user_cards.init_app(app)
+metrics.register_collector(lambda: cache_samples('user_cards', user_cards.hits + user_cards.shared_hits, user_cards.misses))
+
+# Regroupement des lectures identiques simultanées (SINGLEFLIGHT_ENABLED, SINGLEFLIGHT_TIMEOUT)
+flights.init_app(app)
+metrics.register_collector(lambda: [
+    (f'singleflight_{name}_total', 'counter', f'Regroupement des lectures : {name}', {}, value)
+    for name, value in flights.stats.items()
+])
+
+# Adhésions en cache pour les contrôles de visibilité (VISIBILITY_CACHE_SIZE, VISIBILITY_CACHE_TTL)
+memberships.init_app(app)
+metrics.register_collector(lambda: cache_samples('memberships', memberships.hits, memberships.misses))
+
+# Index de préfixes pour l'autocomplétion des mentions (DIRECTORY_REFRESH_SECONDS)
+directory.init_app(app)
 
 # Initialisation de la base de données
 db.init_app(app)
 with app.app_context():
+    database_profile.init_app(app, db.engine)
     db.create_all()
+    schema.upgrade()
+    trending.backfill()
+    # File de jobs en base, utilisable depuis n'importe quelle route via jobs.enqueue()
+    jobs.init_app(app)
+    # Archivage périodique des anciennes lignes (ARCHIVE_AFTER_DAYS=0 pour désactiver)
+    archive.init_app(app)
+    # Purge quotidienne des traces de suppression (SYNC_TOMBSTONE_DAYS)
+    sync.init_app(app)
+    directory.warm(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -0,0 +1,125 @@
+from src.models.user import db
+from src.services.usercards import user_card
+from src.models.media import media_variants
+from datetime import datetime
+
+# Tables « froides » : mêmes colonnes que les tables d'origine, plus la date
+# d'archivage. Pas de clé étrangère vers les tables chaudes, dont les lignes
+# ont été supprimées ; les relations sont en lecture seule.
+
+class ArchivedPost(db.Model):
+    __tablename__ = 'archived_post'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    content = db.Column(db.Text, nullable=False)
+    image_url = db.Column(db.String(255), nullable=True)
+    author_id = db.Column(db.Integer, nullable=False, index=True)
+    group_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relations
+    author = db.relationship('User', primaryjoin='foreign(ArchivedPost.author_id) == User.id', viewonly=True)
+    likes = db.relationship('ArchivedPostLike', primaryjoin='ArchivedPost.id == foreign(ArchivedPostLike.post_id)', viewonly=True)
+    comments = db.relationship('ArchivedPostComment', primaryjoin='ArchivedPost.id == foreign(ArchivedPostComment.post_id)', viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_post_group_created', 'group_id', 'created_at'),
+        db.Index('ix_archived_post_created', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedPost {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content': self.content,
+            'image_url': self.image_url,
+            'image_variants': media_variants(self.image_url),
+            'author_id': self.author_id,
+            'author': user_card(self.author_id),
+            'group_id': self.group_id,
+            'likes_count': len(self.likes),
+            'comments_count': len(self.comments),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'archived': True
+        }
+
+class ArchivedPostLike(db.Model):
+    __tablename__ = 'archived_post_like'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    post_id = db.Column(db.Integer, nullable=False, index=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchivedPostLike {self.user_id}-{self.post_id}>'
+
+class ArchivedPostComment(db.Model):
+    __tablename__ = 'archived_post_comment'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    content = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    post_id = db.Column(db.Integer, nullable=False)
+    parent_id = db.Column(db.Integer, nullable=True)
+    replies_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relations
+    user = db.relationship('User', primaryjoin='foreign(ArchivedPostComment.user_id) == User.id', viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_post_comment_thread', 'post_id', 'parent_id', 'created_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedPostComment {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content': self.content,
+            'user_id': self.user_id,
+            'user': user_card(self.user_id),
+            'post_id': self.post_id,
+            'parent_id': self.parent_id,
+            'replies_count': self.replies_count or 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'archived': True
+        }
+
+class ArchivedMessage(db.Model):
+    __tablename__ = 'archived_message'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    content = db.Column(db.Text, nullable=False)
+    sender_id = db.Column(db.Integer, nullable=False, index=True)
+    receiver_id = db.Column(db.Integer, nullable=False, index=True)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    read_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchivedMessage {self.id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content': self.content,
+            'sender_id': self.sender_id,
+            'receiver_id': self.receiver_id,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'read_at': self.read_at.isoformat() if self.read_at else None,
+            'archived': True
+        }
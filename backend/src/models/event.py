@@ -1,4 +1,6 @@
 from src.models.user import db
+from src.services.usercards import user_card
+from src.models.media import media_variants
 from datetime import datetime
 
 class Event(db.Model):
@@ -13,11 +15,18 @@ class Event(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Renseignée dès la demande de suppression, avant la purge en arrière-plan
+    deleted_at = db.Column(db.DateTime, nullable=True)
     
     # Relations
     creator = db.relationship('User', backref='created_events')
     attendees = db.relationship('EventAttendance', backref='event', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Synchronisation différentielle (GET /api/sync)
+        db.Index('ix_event_updated', 'updated_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Event {self.title}>'
 
@@ -30,9 +39,10 @@ class Event(db.Model):
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'image_url': self.image_url,
+            'image_variants': media_variants(self.image_url),
             'is_public': self.is_public,
             'created_by': self.created_by,
-            'creator': self.creator.to_dict() if self.creator else None,
+            'creator': user_card(self.created_by),
             'attendees_count': len(self.attendees),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
@@ -57,7 +67,7 @@ class EventAttendance(db.Model):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'user': self.user.to_dict() if self.user else None,
+            'user': user_card(self.user_id),
             'event_id': self.event_id,
             'status': self.status,
             'registered_at': self.registered_at.isoformat() if self.registered_at else None
@@ -1,4 +1,6 @@
 from src.models.user import db
+from src.services.usercards import user_card
+from src.models.media import media_variants
 from datetime import datetime
 
 class Group(db.Model):
@@ -10,12 +12,19 @@ class Group(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Renseignée dès la demande de suppression, avant la purge en arrière-plan
+    deleted_at = db.Column(db.DateTime, nullable=True)
     
     # Relations
     creator = db.relationship('User', backref='created_groups')
     members = db.relationship('GroupMembership', backref='group', lazy=True, cascade='all, delete-orphan')
     posts = db.relationship('Post', backref='group', lazy=True)
 
+    __table_args__ = (
+        # Synchronisation différentielle (GET /api/sync)
+        db.Index('ix_group_updated', 'updated_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Group {self.name}>'
 
@@ -25,9 +34,10 @@ class Group(db.Model):
             'name': self.name,
             'description': self.description,
             'image_url': self.image_url,
+            'image_variants': media_variants(self.image_url),
             'is_private': self.is_private,
             'created_by': self.created_by,
-            'creator': self.creator.to_dict() if self.creator else None,
+            'creator': user_card(self.created_by),
             'members_count': len(self.members),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
@@ -39,8 +49,12 @@ class GroupMembership(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False)
     role = db.Column(db.String(20), default='member')  # member, admin, moderator
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'group_id', name='unique_user_group_membership'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'group_id', name='unique_user_group_membership'),
+        db.Index('ix_group_membership_updated', 'updated_at', 'id'),
+    )
 
     def __repr__(self):
         return f'<GroupMembership {self.user_id}-{self.group_id}>'
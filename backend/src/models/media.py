@@ -0,0 +1,54 @@
+import re
+from src.models.user import db
+from datetime import datetime
+
+MEDIA_URL_PREFIX = '/api/media/'
+MEDIA_VARIANT_NAMES = ('thumb', 'feed')
+MEDIA_URL_RE = re.compile(r'^/api/media/([0-9a-f]{64})(?:/[a-z]+)?$')
+
+def media_variants(url):
+    # URLs des variantes d'une image hébergée chez nous, None pour une URL externe
+    if not url:
+        return None
+    match = MEDIA_URL_RE.match(url)
+    if not match:
+        return None
+    sha256 = match.group(1)
+    variants = {'original': f'{MEDIA_URL_PREFIX}{sha256}'}
+    for name in MEDIA_VARIANT_NAMES:
+        variants[name] = f'{MEDIA_URL_PREFIX}{sha256}/{name}'
+    return variants
+
+class Media(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    content_type = db.Column(db.String(50), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(20), default='pending')  # pending, ready, failed
+    variants = db.Column(db.JSON, default=dict)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Media {self.sha256[:12]}>'
+
+    @property
+    def url(self):
+        return f'{MEDIA_URL_PREFIX}{self.sha256}'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sha256': self.sha256,
+            'url': self.url,
+            'variants': media_variants(self.url),
+            'content_type': self.content_type,
+            'size': self.size,
+            'width': self.width,
+            'height': self.height,
+            'status': self.status,
+            'uploaded_by': self.uploaded_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
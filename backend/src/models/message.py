@@ -1,4 +1,5 @@
 from src.models.user import db
+from src.services.usercards import user_card
 from datetime import datetime
 
 class Message(db.Model):
@@ -14,6 +15,9 @@ class Message(db.Model):
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref='received_messages')
 
+    # Identifiants jamais réutilisés : les messages archivés les gardent
+    __table_args__ = {'sqlite_autoincrement': True}
+
     def __repr__(self):
         return f'<Message {self.id}>'
 
@@ -22,9 +26,9 @@ class Message(db.Model):
             'id': self.id,
             'content': self.content,
             'sender_id': self.sender_id,
-            'sender': self.sender.to_dict() if self.sender else None,
+            'sender': user_card(self.sender_id),
             'receiver_id': self.receiver_id,
-            'receiver': self.receiver.to_dict() if self.receiver else None,
+            'receiver': user_card(self.receiver_id),
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'read_at': self.read_at.isoformat() if self.read_at else None
@@ -0,0 +1,68 @@
+from src.models.user import db
+from src.services.usercards import user_card
+from datetime import datetime
+
+# Type de notification -> (type de cible, message au singulier, message au pluriel)
+NOTIFICATION_TYPES = {
+    'post_liked': ('post', 'a aimé votre publication', 'personnes ont aimé votre publication'),
+    'post_commented': ('post', 'a commenté une publication', 'personnes ont commenté une publication'),
+    'prayer_supported': ('prayer', 'soutient votre demande de prière', 'personnes soutiennent votre demande de prière'),
+    'event_attended': ('event', 'participe à votre événement', 'personnes participent à votre événement'),
+    'group_joined': ('group', 'a rejoint votre groupe', 'personnes ont rejoint votre groupe'),
+}
+
+# Nombre d'acteurs récents conservés pour dédupliquer les rafales
+RECENT_ACTORS_LIMIT = 20
+
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    type = db.Column(db.String(30), nullable=False)
+    target_type = db.Column(db.String(20), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    actors_count = db.Column(db.Integer, default=1, nullable=False)
+    last_actor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    recent_actor_ids = db.Column(db.JSON, default=list)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relations
+    last_actor = db.relationship('User', foreign_keys=[last_actor_id])
+
+    __table_args__ = (
+        # Pagination par curseur (updated_at, id) pour un destinataire
+        db.Index('ix_notification_recipient_updated', 'recipient_id', 'updated_at', 'id'),
+        # Compteur de non lues et regroupement des rafales
+        db.Index('ix_notification_recipient_unread', 'recipient_id', 'is_read', 'type', 'target_id'),
+    )
+
+    def __repr__(self):
+        return f'<Notification {self.id}>'
+
+    def message(self, actor=None):
+        # Carte de l'acteur (cache partagé, toute la page en une requête)
+        # plutôt que la relation, chargée ligne par ligne
+        _, singular, plural = NOTIFICATION_TYPES.get(self.type, (None, '', ''))
+        if self.actors_count > 1:
+            return f'{self.actors_count} {plural}'
+        actor = actor or user_card(self.last_actor_id)
+        name = f"{actor['first_name']} {actor['last_name']}" if actor else 'Quelqu\'un'
+        return f'{name} {singular}'
+
+    def to_dict(self):
+        actor = user_card(self.last_actor_id)
+        return {
+            'id': self.id,
+            'recipient_id': self.recipient_id,
+            'type': self.type,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'actors_count': self.actors_count,
+            'last_actor_id': self.last_actor_id,
+            'last_actor': actor,
+            'message': self.message(actor),
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,6 +1,12 @@
 from src.models.user import db
+from src.services.usercards import user_card
+from src.models.media import media_variants
 from datetime import datetime
 
+def initial_trending_score(context):
+    from src.services.trending import initial_score
+    return initial_score(context)
+
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -9,11 +15,22 @@ class Post(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Score de tendance mis à jour à chaque like/commentaire (services/trending.py)
+    trending_score = db.Column(db.Float, default=initial_trending_score, nullable=True)
     
     # Relations
     likes = db.relationship('PostLike', backref='post', lazy=True, cascade='all, delete-orphan')
     comments = db.relationship('PostComment', backref='post', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_post_trending', 'trending_score', 'id'),
+        db.Index('ix_post_group_trending', 'group_id', 'trending_score', 'id'),
+        # Synchronisation différentielle (GET /api/sync)
+        db.Index('ix_post_updated', 'updated_at', 'id'),
+        # Identifiants jamais réutilisés : les lignes archivées les gardent
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f'<Post {self.id}>'
 
@@ -22,8 +39,9 @@ class Post(db.Model):
             'id': self.id,
             'content': self.content,
             'image_url': self.image_url,
+            'image_variants': media_variants(self.image_url),
             'author_id': self.author_id,
-            'author': self.author.to_dict() if self.author else None,
+            'author': user_card(self.author_id),
             'group_id': self.group_id,
             'likes_count': len(self.likes),
             'comments_count': len(self.comments),
@@ -37,7 +55,10 @@ class PostLike(db.Model):
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),
+        {'sqlite_autoincrement': True},
+    )
 
     def __repr__(self):
         return f'<PostLike {self.user_id}-{self.post_id}>'
@@ -47,12 +68,22 @@ class PostComment(db.Model):
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    # Réponse à un commentaire de premier niveau (un seul niveau d'imbrication)
+    parent_id = db.Column(db.Integer, db.ForeignKey('post_comment.id'), nullable=True)
+    replies_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relations
     user = db.relationship('User', backref='comments')
 
+    __table_args__ = (
+        # Pagination par curseur des commentaires et des réponses
+        db.Index('ix_post_comment_thread', 'post_id', 'parent_id', 'created_at', 'id'),
+        db.Index('ix_post_comment_updated', 'updated_at', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f'<PostComment {self.id}>'
 
@@ -61,8 +92,10 @@ class PostComment(db.Model):
             'id': self.id,
             'content': self.content,
             'user_id': self.user_id,
-            'user': self.user.to_dict() if self.user else None,
+            'user': user_card(self.user_id),
             'post_id': self.post_id,
+            'parent_id': self.parent_id,
+            'replies_count': self.replies_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,4 +1,5 @@
 from src.models.user import db
+from src.services.usercards import user_card
 from datetime import datetime
 
 class Prayer(db.Model):
@@ -11,10 +12,19 @@ class Prayer(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     answered_at = db.Column(db.DateTime, nullable=True)
+    # Compteur maintenu à chaque soutien, pour trier sans compter les lignes
+    supports_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Relations
     prayer_supports = db.relationship('PrayerSupport', backref='prayer', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # File « à soutenir » : moins soutenues d'abord, puis les plus anciennes
+        db.Index('ix_prayer_needs_support', 'supports_count', 'created_at', 'id'),
+        # Synchronisation différentielle (GET /api/sync)
+        db.Index('ix_prayer_updated', 'updated_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Prayer {self.title}>'
 
@@ -25,9 +35,9 @@ class Prayer(db.Model):
             'description': self.description,
             'status': self.status,
             'author_id': self.author_id,
-            'author': self.author.to_dict() if self.author else None,
+            'author': user_card(self.author_id),
             'is_private': self.is_private,
-            'supports_count': len(self.prayer_supports),
+            'supports_count': self.supports_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'answered_at': self.answered_at.isoformat() if self.answered_at else None
@@ -52,7 +62,7 @@ class PrayerSupport(db.Model):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'user': self.user.to_dict() if self.user else None,
+            'user': user_card(self.user_id),
             'prayer_id': self.prayer_id,
             'message': self.message,
             'created_at': self.created_at.isoformat() if self.created_at else None
@@ -0,0 +1,21 @@
+from src.models.user import db
+from datetime import datetime
+
+# Trace d'une ligne supprimée, pour propager les suppressions aux clients
+# synchronisés (GET /api/sync). Conservée SYNC_TOMBSTONE_DAYS jours.
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # posts, comments, prayers, events, groups, memberships
+    object_id = db.Column(db.Integer, nullable=False)
+    # Renseigné quand la suppression ne concerne qu'un utilisateur (ses adhésions)
+    user_id = db.Column(db.Integer, nullable=True)
+    # Objet parent, quand sa visibilité en dépend (groupe d'une adhésion)
+    parent_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_tombstone_deleted', 'deleted_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Tombstone {self.kind} {self.object_id}>'
@@ -1,8 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.services.hashing import hasher
+from src.services.replicas import RoutingSession
 
-db = SQLAlchemy()
+# Session routée : les GET peuvent lire sur un réplica (voir src/services/replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,6 +16,8 @@ class User(db.Model):
     bio = db.Column(db.Text)
     profile_picture = db.Column(db.String(255))
     is_active = db.Column(db.Boolean, default=True)
+    # member ou admin (administration de l'annuaire et des comptes)
+    role = db.Column(db.String(20), default='member', server_default='member', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -22,28 +26,48 @@ class User(db.Model):
     prayers = db.relationship('Prayer', backref='author', lazy=True, cascade='all, delete-orphan')
     group_memberships = db.relationship('GroupMembership', backref='user', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Annuaire (tri par nom) et synchronisation incrémentale de l'index de préfixes
+        db.Index('ix_user_name', 'last_name', 'first_name', 'id'),
+        db.Index('ix_user_updated_at', 'updated_at'),
+    )
+
+    # Hachage exécuté dans le pool borné (peut lever HashingBusy)
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return hasher.needs_rehash(self.password_hash)
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
 
     def __repr__(self):
         return f'<User {self.username}>'
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'bio': self.bio,
-            'profile_picture': self.profile_picture,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return user_to_dict(self)
+
+# Partagé avec le cache des cartes utilisateur, qui rend des lignes sans passer par l'ORM
+def user_to_dict(user):
+    from src.models.media import media_variants
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'bio': user.bio,
+        'profile_picture': user.profile_picture,
+        'profile_picture_variants': media_variants(user.profile_picture),
+        'is_active': user.is_active,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+        'updated_at': user.updated_at.isoformat() if user.updated_at else None
+    }
 
 class InvitationCode(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -53,6 +77,11 @@ class InvitationCode(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     used_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        # Listes filtrées par statut, triées par id
+        db.Index('ix_invitation_code_is_used_id', 'is_used', 'id'),
+    )
+
     def __repr__(self):
         return f'<InvitationCode {self.code}>'
 
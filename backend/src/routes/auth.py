@@ -1,11 +1,58 @@
 from flask import Blueprint, request, jsonify, session
+from sqlalchemy import insert, exists
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db, User, InvitationCode
+from src.services.hashing import HashingBusy
 from datetime import datetime
 import secrets
 import string
 
 auth_bp = Blueprint('auth', __name__)
 
+INVITATION_ALPHABET = string.ascii_uppercase + string.digits
+INVITATION_BATCH_MAX = 5000
+# Taille des IN (...) : sous la limite de paramètres de SQLite
+LOOKUP_CHUNK = 900
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+def make_invitation_code():
+    return ''.join(secrets.choice(INVITATION_ALPHABET) for _ in range(8))
+
+def existing_invitation_codes(codes):
+    codes = list(codes)
+    existing = set()
+    for start in range(0, len(codes), LOOKUP_CHUNK):
+        chunk = codes[start:start + LOOKUP_CHUNK]
+        existing.update(code for (code,) in db.session.query(InvitationCode.code).filter(InvitationCode.code.in_(chunk)))
+    return existing
+
+def issue_invitation_codes(count, attempts=3):
+    for _ in range(attempts):
+        codes = set()
+        while len(codes) < count:
+            codes.update(make_invitation_code() for _ in range(count - len(codes)))
+            # Vérification d'unicité ensembliste contre la table
+            codes -= existing_invitation_codes(codes)
+        now = datetime.utcnow()
+        rows = [{'code': code, 'is_used': False, 'created_at': now} for code in codes]
+        try:
+            # Une seule instruction INSERT multi-lignes
+            db.session.execute(insert(InvitationCode), rows)
+            db.session.commit()
+            return sorted(codes), now
+        except IntegrityError:
+            # Un code a été créé entre-temps par une autre requête : on recommence
+            db.session.rollback()
+    raise RuntimeError('Impossible de générer des codes d\'invitation uniques')
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -17,20 +64,24 @@ def register():
             if field not in data or not data[field]:
                 return jsonify({'error': f'Le champ {field} est requis'}), 400
         
-        # Vérification du code d'invitation
-        invitation = InvitationCode.query.filter_by(code=data['invitation_code'], is_used=False).first()
-        if not invitation:
-            return jsonify({'error': 'Code d\'invitation invalide ou déjà utilisé'}), 400
+        # Validation en une seule requête : code libre, email et nom d'utilisateur disponibles
+        validation = db.session.query(
+            InvitationCode.id,
+            exists().where(User.email == data['email']).label('email_taken'),
+            exists().where(User.username == data['username']).label('username_taken')
+        ).filter(
+            InvitationCode.code == data['invitation_code'],
+            InvitationCode.is_used == False
+        ).first()
         
-        # Vérification si l'email existe déjà
-        if User.query.filter_by(email=data['email']).first():
+        if not validation:
+            return jsonify({'error': 'Code d\'invitation invalide ou déjà utilisé'}), 400
+        if validation.email_taken:
             return jsonify({'error': 'Cet email est déjà utilisé'}), 400
-        
-        # Vérification si le nom d'utilisateur existe déjà
-        if User.query.filter_by(username=data['username']).first():
+        if validation.username_taken:
             return jsonify({'error': 'Ce nom d\'utilisateur est déjà pris'}), 400
         
-        # Création du nouvel utilisateur
+        # Création du nouvel utilisateur (hachage hors transaction)
         user = User(
             email=data['email'],
             username=data['username'],
@@ -40,16 +91,26 @@ def register():
         )
         user.set_password(data['password'])
         
-        # Marquer le code d'invitation comme utilisé
-        invitation.is_used = True
-        invitation.used_by = user.id
-        invitation.used_at = datetime.utcnow()
-        
+        # Insertion et réservation du code dans une seule transaction ; les
+        # contraintes d'unicité font foi en cas d'inscriptions concurrentes
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.flush()
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'email' in str(e.orig):
+                return jsonify({'error': 'Cet email est déjà utilisé'}), 400
+            return jsonify({'error': 'Ce nom d\'utilisateur est déjà pris'}), 400
+        
+        claimed = InvitationCode.query.filter_by(id=validation.id, is_used=False).update({
+            'is_used': True,
+            'used_by': user.id,
+            'used_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if not claimed:
+            db.session.rollback()
+            return jsonify({'error': 'Code d\'invitation invalide ou déjà utilisé'}), 400
         
-        # Mettre à jour l'invitation avec l'ID utilisateur
-        invitation.used_by = user.id
         db.session.commit()
         
         # Connexion automatique après inscription
@@ -60,6 +121,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Service momentanément surchargé, réessayez'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -80,6 +144,11 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Compte désactivé'}), 401
         
+        # Mise à niveau transparente des hachages aux anciens paramètres
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
         session['user_id'] = user.id
         
         return jsonify({
@@ -87,7 +156,11 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Service momentanément surchargé, réessayez'}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -105,6 +178,8 @@ def get_current_user():
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
+        if not user.is_active:
+            return jsonify({'error': 'Compte désactivé'}), 401
         
         return jsonify({'user': user.to_dict()}), 200
         
@@ -115,16 +190,15 @@ def get_current_user():
 def generate_invitation():
     try:
         # Vérifier si l'utilisateur est connecté et autorisé
-        user_id = session.get('user_id')
-        if not user_id:
+        if not require_auth():
             return jsonify({'error': 'Non authentifié'}), 401
         
         # Générer un code d'invitation unique
-        code = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
+        code = make_invitation_code()
         
         # Vérifier l'unicité du code
         while InvitationCode.query.filter_by(code=code).first():
-            code = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
+            code = make_invitation_code()
         
         invitation = InvitationCode(code=code)
         db.session.add(invitation)
@@ -139,6 +213,69 @@ def generate_invitation():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/invitations/batch', methods=['POST'])
+def generate_invitations_batch():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        if not user.is_admin:
+            return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        count = data.get('count')
+        
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1 or count > INVITATION_BATCH_MAX:
+            return jsonify({'error': f'Le champ count doit être compris entre 1 et {INVITATION_BATCH_MAX}'}), 400
+        
+        codes, created_at = issue_invitation_codes(count)
+        
+        return jsonify({
+            'message': f'{len(codes)} codes d\'invitation générés',
+            'codes': codes,
+            'created_at': created_at.isoformat()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/invitations', methods=['GET'])
+def get_invitations():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        if not user.is_admin:
+            return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+        status = request.args.get('status')  # used, unused
+        
+        query = InvitationCode.query
+        
+        if status == 'used':
+            query = query.filter_by(is_used=True)
+        elif status == 'unused':
+            query = query.filter_by(is_used=False)
+        elif status:
+            return jsonify({'error': 'Statut invalide'}), 400
+        
+        invitations = query.order_by(InvitationCode.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'invitations': [invitation.to_dict() for invitation in invitations.items],
+            'total': invitations.total,
+            'pages': invitations.pages,
+            'current_page': page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/validate-invitation', methods=['POST'])
 def validate_invitation():
     try:
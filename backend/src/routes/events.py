@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User
 from src.models.event import Event, EventAttendance
+from src.services.notifications import notify
+from src.services import purge
+from src.services.singleflight import coalesce
+from src.services import reads
+from src.services import visibility
 from datetime import datetime
 
 events_bp = Blueprint('events', __name__)
@@ -9,45 +14,33 @@ def require_auth():
     user_id = session.get('user_id')
     if not user_id:
         return None
-    return User.query.get(user_id)
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+# Les événements publics sont les mêmes pour tous ; « mes événements » dépend de l'utilisateur
+def events_visibility():
+    user = require_auth()
+    if not user:
+        return None
+    if request.args.get('my_events', 'false').lower() == 'true':
+        return ('user', user.id)
+    return 'members'
+
+def events_viewer_flags(payload):
+    return reads.event_flags(db.session, payload, session['user_id'], request.args)
 
 @events_bp.route('/', methods=['GET'])
+@coalesce(events_visibility, per_viewer=events_viewer_flags)
 def get_events():
     try:
         user = require_auth()
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        upcoming = request.args.get('upcoming', 'false').lower() == 'true'
-        my_events = request.args.get('my_events', 'false').lower() == 'true'
-        
-        query = Event.query
-        
-        if my_events:
-            # Événements créés par l'utilisateur ou auxquels il participe
-            user_event_ids = [attendance.event_id for attendance in user.event_attendances]
-            query = query.filter(
-                (Event.created_by == user.id) | (Event.id.in_(user_event_ids))
-            )
-        else:
-            # Événements publics seulement
-            query = query.filter_by(is_public=True)
-        
-        if upcoming:
-            query = query.filter(Event.start_date >= datetime.utcnow())
-        
-        events = query.order_by(Event.start_date.asc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'events': [event.to_dict() for event in events.items],
-            'total': events.total,
-            'pages': events.pages,
-            'current_page': page
-        }), 200
+        payload, status = reads.list_events(db.session, user.id, request.args, flags=False)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -115,15 +108,8 @@ def get_event(event_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        event = Event.query.get_or_404(event_id)
-        
-        # Vérifier si l'utilisateur peut voir cet événement
-        if not event.is_public:
-            attendance = EventAttendance.query.filter_by(user_id=user.id, event_id=event_id).first()
-            if not attendance and event.created_by != user.id:
-                return jsonify({'error': 'Accès refusé'}), 403
-        
-        return jsonify({'event': event.to_dict()}), 200
+        payload, status = reads.get_event(db.session, user.id, request.args, event_id)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -135,7 +121,7 @@ def update_event(event_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        event = Event.query.get_or_404(event_id)
+        event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
         
         if event.created_by != user.id:
             return jsonify({'error': 'Non autorisé'}), 403
@@ -185,13 +171,15 @@ def delete_event(event_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        event = Event.query.get_or_404(event_id)
+        event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
         
         if event.created_by != user.id:
             return jsonify({'error': 'Non autorisé'}), 403
         
-        db.session.delete(event)
+        # Masqué tout de suite, participations purgées en arrière-plan
+        event.deleted_at = datetime.utcnow()
         db.session.commit()
+        purge.schedule('event', event_id)
         
         return jsonify({'message': 'Événement supprimé avec succès'}), 200
         
@@ -206,10 +194,10 @@ def attend_event(event_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        event = Event.query.get_or_404(event_id)
+        event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
         
         # Vérifier si l'utilisateur peut voir cet événement
-        if not event.is_public and event.created_by != user.id:
+        if not visibility.can_see_event(user.id, event):
             return jsonify({'error': 'Accès refusé'}), 403
         
         data = request.get_json()
@@ -235,6 +223,9 @@ def attend_event(event_id):
         
         db.session.commit()
         
+        if status != 'not_attending':
+            notify('event_attended', user.id, event_id)
+        
         return jsonify({'message': message}), 200
         
     except Exception as e:
@@ -248,13 +239,11 @@ def get_event_attendees(event_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        event = Event.query.get_or_404(event_id)
+        event = Event.query.filter_by(id=event_id, deleted_at=None).first_or_404()
         
         # Vérifier si l'utilisateur peut voir cet événement
-        if not event.is_public:
-            attendance = EventAttendance.query.filter_by(user_id=user.id, event_id=event_id).first()
-            if not attendance and event.created_by != user.id:
-                return jsonify({'error': 'Accès refusé'}), 403
+        if not visibility.can_see_event(user.id, event):
+            return jsonify({'error': 'Accès refusé'}), 403
         
         attendees = db.session.query(EventAttendance, User).join(User).filter(
             EventAttendance.event_id == event_id
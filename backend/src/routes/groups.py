@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User
 from src.models.group import Group, GroupMembership
+from src.services.notifications import notify
+from src.services import purge
+from datetime import datetime
+from src.services import reads
+from src.services import visibility
 
 groups_bp = Blueprint('groups', __name__)
 
@@ -8,7 +13,10 @@ def require_auth():
     user_id = session.get('user_id')
     if not user_id:
         return None
-    return User.query.get(user_id)
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
 
 @groups_bp.route('/', methods=['GET'])
 def get_groups():
@@ -17,28 +25,8 @@ def get_groups():
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        my_groups = request.args.get('my_groups', 'false').lower() == 'true'
-        
-        if my_groups:
-            # Récupérer les groupes dont l'utilisateur est membre
-            user_group_ids = [membership.group_id for membership in user.group_memberships]
-            query = Group.query.filter(Group.id.in_(user_group_ids))
-        else:
-            # Récupérer tous les groupes publics
-            query = Group.query.filter_by(is_private=False)
-        
-        groups = query.order_by(Group.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'groups': [group.to_dict() for group in groups.items],
-            'total': groups.total,
-            'pages': groups.pages,
-            'current_page': page
-        }), 200
+        payload, status = reads.list_groups(db.session, user.id, request.args)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -92,15 +80,8 @@ def get_group(group_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        group = Group.query.get_or_404(group_id)
-        
-        # Vérifier si l'utilisateur peut voir ce groupe
-        if group.is_private:
-            membership = GroupMembership.query.filter_by(user_id=user.id, group_id=group_id).first()
-            if not membership:
-                return jsonify({'error': 'Accès refusé'}), 403
-        
-        return jsonify({'group': group.to_dict()}), 200
+        payload, status = reads.get_group(db.session, user.id, request.args, group_id)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -112,7 +93,7 @@ def join_group(group_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        group = Group.query.get_or_404(group_id)
+        group = Group.query.filter_by(id=group_id, deleted_at=None).first_or_404()
         
         # Vérifier si l'utilisateur est déjà membre
         existing_membership = GroupMembership.query.filter_by(user_id=user.id, group_id=group_id).first()
@@ -132,6 +113,8 @@ def join_group(group_id):
         db.session.add(membership)
         db.session.commit()
         
+        notify('group_joined', user.id, group_id)
+        
         return jsonify({
             'message': 'Vous avez rejoint le groupe avec succès',
             'membership': membership.to_dict()
@@ -141,6 +124,29 @@ def join_group(group_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@groups_bp.route('/<int:group_id>', methods=['DELETE'])
+def delete_group(group_id):
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        
+        group = Group.query.filter_by(id=group_id, deleted_at=None).first_or_404()
+        
+        if group.created_by != user.id and not user.is_admin:
+            return jsonify({'error': 'Non autorisé'}), 403
+        
+        # Masqué tout de suite, publications et adhésions purgées en arrière-plan
+        group.deleted_at = datetime.utcnow()
+        db.session.commit()
+        purge.schedule('group', group_id)
+        
+        return jsonify({'message': 'Suppression du groupe en cours'}), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @groups_bp.route('/<int:group_id>/leave', methods=['POST'])
 def leave_group(group_id):
     try:
@@ -173,13 +179,11 @@ def get_group_members(group_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        group = Group.query.get_or_404(group_id)
+        group = Group.query.filter_by(id=group_id, deleted_at=None).first_or_404()
         
         # Vérifier si l'utilisateur peut voir les membres
-        if group.is_private:
-            membership = GroupMembership.query.filter_by(user_id=user.id, group_id=group_id).first()
-            if not membership:
-                return jsonify({'error': 'Accès refusé'}), 403
+        if not visibility.can_see_group(user.id, group):
+            return jsonify({'error': 'Accès refusé'}), 403
         
         members = db.session.query(GroupMembership, User).join(User).filter(
             GroupMembership.group_id == group_id
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, session, current_app
+from src.models.user import User
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+@jobs_bp.route('/stats', methods=['GET'])
+def get_job_stats():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        return jsonify(current_app.extensions['jobs'].stats()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
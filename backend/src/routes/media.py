@@ -0,0 +1,100 @@
+import os
+import re
+from flask import Blueprint, request, jsonify, session, send_file, abort
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, User
+from src.models.media import Media, MEDIA_VARIANT_NAMES
+from src.services.media import processor, MediaTooLarge, UnsupportedMedia
+
+media_bp = Blueprint('media', __name__)
+
+# Contenu adressé par hash : une URL ne change jamais de contenu
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+@media_bp.route('', methods=['POST'])
+def upload_media():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        # multipart/form-data (champ « file ») ou corps brut
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if not upload:
+                return jsonify({'error': 'Le fichier est requis'}), 400
+            stream = upload.stream
+        else:
+            stream = request.stream
+
+        try:
+            sha256, content_type, size = processor.storage.save_stream(stream)
+        except MediaTooLarge:
+            return jsonify({'error': 'Fichier trop volumineux'}), 413
+        except UnsupportedMedia:
+            return jsonify({'error': 'Format d\'image non supporté'}), 415
+
+        # Déduplication : le même contenu n'est stocké et traité qu'une fois
+        media = Media.query.filter_by(sha256=sha256).first()
+        if media:
+            return jsonify({'media': media.to_dict()}), 200
+
+        media = Media(sha256=sha256, content_type=content_type, size=size, uploaded_by=user.id, status='pending')
+        db.session.add(media)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            media = Media.query.filter_by(sha256=sha256).first()
+            return jsonify({'media': media.to_dict()}), 200
+
+        processor.submit(media)
+
+        return jsonify({
+            'message': 'Média téléversé avec succès',
+            'media': media.to_dict()
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@media_bp.route('/<string:sha256>', methods=['GET'])
+@media_bp.route('/<string:sha256>/<string:variant>', methods=['GET'])
+def get_media(sha256, variant=None):
+    if not re.fullmatch(r'[0-9a-f]{64}', sha256) or (variant is not None and variant not in MEDIA_VARIANT_NAMES):
+        abort(404)
+
+    path = processor.storage.path(sha256, variant) if variant else None
+    mimetype = 'image/jpeg'
+    fallback = False
+    if not path or not os.path.exists(path):
+        media = Media.query.filter_by(sha256=sha256).first()
+        if not media:
+            abort(404)
+        # Variante pas encore prête : on sert l'original
+        fallback = variant is not None
+        path = processor.storage.path(sha256)
+        mimetype = media.content_type
+
+    # conditional=True : ETag, If-None-Match et requêtes Range (206)
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=f'{sha256}-{variant or "original"}',
+        max_age=60 if fallback else CACHE_MAX_AGE
+    )
+    if not fallback:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,105 @@
+from flask import Blueprint, request, jsonify, session
+from src.models.user import db, User
+from src.models.notification import Notification
+from datetime import datetime
+
+notifications_bp = Blueprint('notifications', __name__)
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+def encode_cursor(notification):
+    return f'{notification.updated_at.isoformat()}|{notification.id}'
+
+def decode_cursor(cursor):
+    updated_at, notification_id = cursor.split('|', 1)
+    return datetime.fromisoformat(updated_at), int(notification_id)
+
+@notifications_bp.route('/', methods=['GET'])
+def get_notifications():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        unread_only = request.args.get('unread', 'false').lower() == 'true'
+
+        query = Notification.query.filter_by(recipient_id=user.id)
+
+        if unread_only:
+            query = query.filter_by(is_read=False)
+
+        if cursor:
+            try:
+                updated_at, notification_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Curseur invalide'}), 400
+            query = query.filter(
+                (Notification.updated_at < updated_at) |
+                ((Notification.updated_at == updated_at) & (Notification.id < notification_id))
+            )
+
+        notifications = query.order_by(
+            Notification.updated_at.desc(), Notification.id.desc()
+        ).limit(limit + 1).all()
+
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+
+        unread_count = Notification.query.filter_by(recipient_id=user.id, is_read=False).count()
+
+        return jsonify({
+            'notifications': [notification.to_dict() for notification in notifications],
+            'unread_count': unread_count,
+            'next_cursor': encode_cursor(notifications[-1]) if has_more else None
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notifications_bp.route('/unread-count', methods=['GET'])
+def get_unread_count():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        unread_count = Notification.query.filter_by(recipient_id=user.id, is_read=False).count()
+
+        return jsonify({'unread_count': unread_count}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notifications_bp.route('/read', methods=['POST'])
+def mark_notifications_read():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+
+        query = Notification.query.filter_by(recipient_id=user.id, is_read=False)
+
+        # Sans liste d'identifiants, tout est marqué comme lu
+        if ids:
+            query = query.filter(Notification.id.in_(ids))
+
+        updated = query.update({'is_read': True}, synchronize_session=False)
+        db.session.commit()
+
+        return jsonify({'message': 'Notifications marquées comme lues', 'updated': updated}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
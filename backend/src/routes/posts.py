@@ -1,41 +1,137 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User
 from src.models.post import Post, PostLike, PostComment
+from src.models.archive import ArchivedPost, ArchivedPostComment
+from src.services.notifications import notify
+from src.services import trending
+from src.services.singleflight import coalesce
+from src.services import reads
+from src.services import visibility
+from src.services.fields import POST_FIELDS, InvalidFields, requested_fields, serialize
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
 posts_bp = Blueprint('posts', __name__)
 
+# Réponses incluses sous chaque commentaire de premier niveau
+DEFAULT_INLINE_REPLIES = 3
+MAX_INLINE_REPLIES = 20
+
 def require_auth():
     user_id = session.get('user_id')
     if not user_id:
         return None
-    return User.query.get(user_id)
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+# Les publications visibles ne dépendent que des groupes privés dont
+# l'utilisateur est membre : les lectures simultanées identiques du fil sont
+# regroupées entre utilisateurs ayant les mêmes groupes privés.
+def feed_visibility():
+    user = require_auth()
+    if not user:
+        return None
+    return ('private_groups', tuple(sorted(visibility.memberships.private_memberships(user.id))))
+
+# Indicateurs propres à l'utilisateur, ajoutés à la réponse commune
+def feed_viewer_flags(payload):
+    return reads.feed_flags(db.session, payload, session['user_id'], request.args)
+
+def encode_comment_cursor(comment):
+    return f'{comment.created_at.isoformat()}|{comment.id}'
+
+def comment_page(model, query, cursor, limit):
+    # Pagination par curseur, du plus ancien au plus récent
+    if cursor:
+        created_at, comment_id = cursor.split('|', 1)
+        created_at, comment_id = datetime.fromisoformat(created_at), int(comment_id)
+        query = query.filter(
+            (model.created_at > created_at) |
+            ((model.created_at == created_at) & (model.id > comment_id))
+        )
+    comments = query.order_by(model.created_at.asc(), model.id.asc()).limit(limit + 1).all()
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+    return comments, encode_comment_cursor(comments[-1]) if has_more else None
+
+def first_replies(model, parent_ids, count):
+    # Les `count` premières réponses de chaque commentaire, en une requête
+    if not parent_ids or count <= 0:
+        return {}
+    position = func.row_number().over(
+        partition_by=model.parent_id, order_by=(model.created_at.asc(), model.id.asc())
+    ).label('position')
+    ranked = db.session.query(model.id, position).filter(model.parent_id.in_(parent_ids)).subquery()
+    replies = model.query.join(ranked, model.id == ranked.c.id).filter(ranked.c.position <= count).order_by(
+        model.created_at.asc(), model.id.asc()
+    ).all()
+    by_parent = {}
+    for reply in replies:
+        by_parent.setdefault(reply.parent_id, []).append(reply)
+    return by_parent
 
 @posts_bp.route('/', methods=['GET'])
+@coalesce(feed_visibility, per_viewer=feed_viewer_flags)
 def get_posts():
     try:
         user = require_auth()
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        group_id = request.args.get('group_id', type=int)
+        payload, status = reads.list_posts(db.session, user.id, request.args, flags=False)
+        return jsonify(payload), status
         
-        query = Post.query
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@posts_bp.route('/trending', methods=['GET'])
+@coalesce(feed_visibility, per_viewer=feed_viewer_flags)
+def get_trending_posts():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
         
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        group_id = request.args.get('group_id', type=int)
+        cursor = request.args.get('cursor')
+        try:
+            fieldset = requested_fields(POST_FIELDS)
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if group_id and not visibility.can_see_group_id(user.id, group_id):
+            return jsonify({'error': 'Accès refusé'}), 403
+        
+        # Score précalculé : simple parcours de ix_post_trending / ix_post_group_trending
+        query = Post.query.filter(Post.trending_score.isnot(None), visibility.posts(user.id))
+        if fieldset:
+            query = query.options(*fieldset.options, load_only(Post.trending_score))
         if group_id:
             query = query.filter_by(group_id=group_id)
         
-        posts = query.order_by(Post.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if cursor:
+            try:
+                score, post_id = cursor.split('|', 1)
+                score, post_id = float(score), int(post_id)
+            except ValueError:
+                return jsonify({'error': 'Curseur invalide'}), 400
+            query = query.filter(
+                (Post.trending_score < score) |
+                ((Post.trending_score == score) & (Post.id < post_id))
+            )
+        
+        posts = query.order_by(Post.trending_score.desc(), Post.id.desc()).limit(limit + 1).all()
+        
+        has_more = len(posts) > limit
+        posts = posts[:limit]
         
         return jsonify({
-            'posts': [post.to_dict() for post in posts.items],
-            'total': posts.total,
-            'pages': posts.pages,
-            'current_page': page
+            'posts': [serialize(post, fieldset) for post in posts],
+            'next_cursor': f'{posts[-1].trending_score!r}|{posts[-1].id}' if has_more else None
         }), 200
         
     except Exception as e:
@@ -53,11 +149,19 @@ def create_post():
         if not data.get('content'):
             return jsonify({'error': 'Le contenu est requis'}), 400
         
+        group_id = data.get('group_id')
+        if group_id is not None:
+            group_id = visibility.as_id(group_id)
+            if group_id is None:
+                return jsonify({'error': 'Identifiant de groupe invalide'}), 400
+            if not visibility.can_see_group_id(user.id, group_id):
+                return jsonify({'error': 'Accès refusé'}), 403
+        
         post = Post(
             content=data['content'],
             image_url=data.get('image_url'),
             author_id=user.id,
-            group_id=data.get('group_id')
+            group_id=group_id
         )
         
         db.session.add(post)
@@ -79,8 +183,8 @@ def get_post(post_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        post = Post.query.get_or_404(post_id)
-        return jsonify({'post': post.to_dict()}), 200
+        payload, status = reads.get_post(db.session, user.id, request.args, post_id)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -145,6 +249,8 @@ def like_post(post_id):
             return jsonify({'error': 'Non authentifié'}), 401
         
         post = Post.query.get_or_404(post_id)
+        if not visibility.can_see_post(user.id, post):
+            return jsonify({'error': 'Accès refusé'}), 403
         
         # Vérifier si l'utilisateur a déjà liké ce post
         existing_like = PostLike.query.filter_by(user_id=user.id, post_id=post_id).first()
@@ -152,17 +258,23 @@ def like_post(post_id):
         if existing_like:
             # Retirer le like
             db.session.delete(existing_like)
+            db.session.flush()
+            trending.retract(post_id)
             message = 'Like retiré'
             liked = False
         else:
             # Ajouter le like
             like = PostLike(user_id=user.id, post_id=post_id)
             db.session.add(like)
+            trending.record(post_id, 'like')
             message = 'Post liké'
             liked = True
         
         db.session.commit()
         
+        if liked:
+            notify('post_liked', user.id, post_id)
+        
         return jsonify({
             'message': message,
             'liked': liked,
@@ -180,11 +292,70 @@ def get_post_comments(post_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        post = Post.query.get_or_404(post_id)
-        comments = PostComment.query.filter_by(post_id=post_id).order_by(PostComment.created_at.asc()).all()
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        inline = min(request.args.get('replies', DEFAULT_INLINE_REPLIES, type=int), MAX_INLINE_REPLIES)
+        cursor = request.args.get('cursor')
+        
+        post = Post.query.get(post_id)
+        if post:
+            model = PostComment
+        else:
+            post = ArchivedPost.query.get_or_404(post_id)
+            model = ArchivedPostComment
+        if not visibility.can_see_post(user.id, post):
+            return jsonify({'error': 'Accès refusé'}), 403
+        
+        try:
+            comments, next_cursor = comment_page(
+                model, model.query.filter_by(post_id=post_id, parent_id=None), cursor, limit
+            )
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        # Auteurs de toute la page résolus ensemble par le cache des cartes utilisateur
+        replies = first_replies(model, [comment.id for comment in comments if comment.replies_count], inline)
+        
+        results = []
+        for comment in comments:
+            thread = replies.get(comment.id, [])
+            data = comment.to_dict()
+            data['replies'] = [reply.to_dict() for reply in thread]
+            data['replies_cursor'] = encode_comment_cursor(thread[-1]) if len(thread) < (comment.replies_count or 0) else None
+            results.append(data)
         
         return jsonify({
-            'comments': [comment.to_dict() for comment in comments]
+            'comments': results,
+            'next_cursor': next_cursor
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@posts_bp.route('/<int:post_id>/comments/<int:comment_id>/replies', methods=['GET'])
+def get_comment_replies(post_id, comment_id):
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        
+        post = Post.query.get(post_id)
+        model = PostComment if post else ArchivedPostComment
+        if not visibility.can_see_post(user.id, post or ArchivedPost.query.get_or_404(post_id)):
+            return jsonify({'error': 'Accès refusé'}), 403
+        model.query.filter_by(id=comment_id, post_id=post_id).first_or_404()
+        
+        try:
+            replies, next_cursor = comment_page(
+                model, model.query.filter_by(post_id=post_id, parent_id=comment_id), cursor, limit
+            )
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        
+        return jsonify({
+            'replies': [reply.to_dict() for reply in replies],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -198,20 +369,38 @@ def add_comment(post_id):
             return jsonify({'error': 'Non authentifié'}), 401
         
         post = Post.query.get_or_404(post_id)
+        if not visibility.can_see_post(user.id, post):
+            return jsonify({'error': 'Accès refusé'}), 403
         data = request.get_json()
         
         if not data.get('content'):
             return jsonify({'error': 'Le contenu du commentaire est requis'}), 400
         
+        parent_id = data.get('parent_id')
+        if parent_id is not None:
+            parent = PostComment.query.filter_by(id=parent_id, post_id=post_id).first()
+            if not parent:
+                return jsonify({'error': 'Commentaire parent introuvable'}), 404
+            # Une réponse à une réponse est rattachée au commentaire de premier niveau
+            parent_id = parent.parent_id or parent.id
+        
         comment = PostComment(
             content=data['content'],
             user_id=user.id,
-            post_id=post_id
+            post_id=post_id,
+            parent_id=parent_id
         )
         
         db.session.add(comment)
+        if parent_id is not None:
+            PostComment.query.filter_by(id=parent_id).update(
+                {PostComment.replies_count: PostComment.replies_count + 1}, synchronize_session=False
+            )
+        trending.record(post_id, 'comment')
         db.session.commit()
         
+        notify('post_commented', user.id, post_id)
+        
         return jsonify({
             'message': 'Commentaire ajouté avec succès',
             'comment': comment.to_dict()
@@ -1,15 +1,31 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User
 from src.models.prayer import Prayer, PrayerSupport
+from src.services.notifications import notify
+from src.services import reads
+from src.services import visibility
+from sqlalchemy import func, exists
 from datetime import datetime
 
 prayers_bp = Blueprint('prayers', __name__)
 
+PRAYER_STATUSES = ('to_pray', 'in_progress', 'answered')
+
 def require_auth():
     user_id = session.get('user_id')
     if not user_id:
         return None
-    return User.query.get(user_id)
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+def encode_cursor(prayer):
+    return f'{prayer.supports_count}|{prayer.created_at.isoformat()}|{prayer.id}'
+
+def decode_cursor(cursor):
+    supports_count, created_at, prayer_id = cursor.split('|', 2)
+    return int(supports_count), datetime.fromisoformat(created_at), int(prayer_id)
 
 @prayers_bp.route('/', methods=['GET'])
 def get_prayers():
@@ -18,33 +34,63 @@ def get_prayers():
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        status = request.args.get('status')
-        my_prayers = request.args.get('my_prayers', 'false').lower() == 'true'
+        payload, status = reads.list_prayers(db.session, user.id, request.args)
+        return jsonify(payload), status
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@prayers_bp.route('/board', methods=['GET'])
+def get_prayer_board():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        
+        # Compteurs par statut en une seule requête agrégée
+        counts = dict.fromkeys(PRAYER_STATUSES, 0)
+        rows = db.session.query(Prayer.status, func.count(Prayer.id)).filter(visibility.prayers(user.id)).group_by(Prayer.status)
+        for status, count in rows:
+            counts[status] = count
         
-        query = Prayer.query
+        # Prières non exaucées que l'utilisateur ne soutient pas encore,
+        # les moins soutenues et les plus anciennes d'abord (ix_prayer_needs_support)
+        supported = exists().where(
+            (PrayerSupport.prayer_id == Prayer.id) & (PrayerSupport.user_id == user.id)
+        )
+        query = Prayer.query.filter(
+            Prayer.is_private == False,
+            Prayer.author_id != user.id,
+            Prayer.status != 'answered',
+            ~supported
+        )
         
-        if my_prayers:
-            query = query.filter_by(author_id=user.id)
-        else:
-            # Afficher seulement les prières publiques ou celles de l'utilisateur
+        if cursor:
+            try:
+                supports_count, created_at, prayer_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Curseur invalide'}), 400
             query = query.filter(
-                (Prayer.is_private == False) | (Prayer.author_id == user.id)
+                (Prayer.supports_count > supports_count) |
+                ((Prayer.supports_count == supports_count) & (Prayer.created_at > created_at)) |
+                ((Prayer.supports_count == supports_count) & (Prayer.created_at == created_at) & (Prayer.id > prayer_id))
             )
         
-        if status:
-            query = query.filter_by(status=status)
+        prayers = query.order_by(
+            Prayer.supports_count.asc(), Prayer.created_at.asc(), Prayer.id.asc()
+        ).limit(limit + 1).all()
         
-        prayers = query.order_by(Prayer.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        has_more = len(prayers) > limit
+        prayers = prayers[:limit]
         
         return jsonify({
-            'prayers': [prayer.to_dict() for prayer in prayers.items],
-            'total': prayers.total,
-            'pages': prayers.pages,
-            'current_page': page
+            'counts': dict(counts, total=sum(counts.values())),
+            # Par construction, aucune n'est déjà soutenue par l'utilisateur
+            'needs_support': [dict(prayer.to_dict(), supported_by_me=False) for prayer in prayers],
+            'next_cursor': encode_cursor(prayers[-1]) if has_more else None
         }), 200
         
     except Exception as e:
@@ -89,13 +135,8 @@ def get_prayer(prayer_id):
         if not user:
             return jsonify({'error': 'Non authentifié'}), 401
         
-        prayer = Prayer.query.get_or_404(prayer_id)
-        
-        # Vérifier si l'utilisateur peut voir cette prière
-        if prayer.is_private and prayer.author_id != user.id:
-            return jsonify({'error': 'Accès refusé'}), 403
-        
-        return jsonify({'prayer': prayer.to_dict()}), 200
+        payload, status = reads.get_prayer(db.session, user.id, request.args, prayer_id)
+        return jsonify(payload), status
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -168,7 +209,7 @@ def support_prayer(prayer_id):
         prayer = Prayer.query.get_or_404(prayer_id)
         
         # Vérifier si l'utilisateur peut voir cette prière
-        if prayer.is_private and prayer.author_id != user.id:
+        if not visibility.can_see_prayer(user.id, prayer):
             return jsonify({'error': 'Accès refusé'}), 403
         
         # Vérifier si l'utilisateur soutient déjà cette prière
@@ -186,8 +227,14 @@ def support_prayer(prayer_id):
         )
         
         db.session.add(support)
+        # Incrément atomique, dans la même transaction que le soutien
+        Prayer.query.filter_by(id=prayer_id).update(
+            {Prayer.supports_count: Prayer.supports_count + 1}, synchronize_session=False
+        )
         db.session.commit()
         
+        notify('prayer_supported', user.id, prayer_id)
+        
         return jsonify({
             'message': 'Soutien ajouté avec succès',
             'support': support.to_dict()
@@ -207,7 +254,7 @@ def get_prayer_supports(prayer_id):
         prayer = Prayer.query.get_or_404(prayer_id)
         
         # Vérifier si l'utilisateur peut voir cette prière
-        if prayer.is_private and prayer.author_id != user.id:
+        if not visibility.can_see_prayer(user.id, prayer):
             return jsonify({'error': 'Accès refusé'}), 403
         
         supports = PrayerSupport.query.filter_by(prayer_id=prayer_id).order_by(PrayerSupport.created_at.desc()).all()
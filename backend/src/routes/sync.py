@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify, session
+from src.models.user import User
+from src.services import sync
+
+sync_bp = Blueprint('sync', __name__)
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+# Synchronisation différentielle des clients hors ligne : sans `since`, tout ce
+# que l'utilisateur peut voir ; avec, les créations, modifications et
+# suppressions depuis. Par tranches : rappeler avec `next` tant que `has_more`.
+@sync_bp.route('/', methods=['GET'], strict_slashes=False)
+def get_changes():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        
+        try:
+            result = sync.changes(user.id, request.args.get('since'), request.args.get('limit', type=int))
+        except sync.InvalidToken:
+            return jsonify({'error': 'Jeton de synchronisation invalide'}), 400
+        except sync.ExpiredToken:
+            return jsonify({'error': 'Jeton de synchronisation expiré, synchronisation complète nécessaire', 'reset': True}), 410
+        except sync.ResyncRequired:
+            return jsonify({'error': 'Accès élargi, synchronisation complète nécessaire', 'reset': True}), 410
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
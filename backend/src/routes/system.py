@@ -0,0 +1,91 @@
+from flask import Blueprint, Response, jsonify, request, session, current_app
+from src.models.user import User
+from src.services.database import pool_stats
+from src.services.profiler import profiler
+
+system_bp = Blueprint('system', __name__)
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+@system_bp.route('/database', methods=['GET'])
+def get_database():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        status = current_app.extensions['database_profile'].status()
+        status['replicas'] = [
+            dict(replica.to_dict(), pool=pool_stats(replica.engine))
+            for replica in current_app.extensions['replicas'].replicas
+        ]
+        return jsonify(status), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@system_bp.route('/replicas', methods=['GET'])
+def get_replicas():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        return jsonify({'replicas': current_app.extensions['replicas'].status()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Profils échantillonnés : réservés aux détenteurs du jeton PROFILER_TOKEN
+def require_profiler_access():
+    user = require_auth()
+    if not user:
+        return jsonify({'error': 'Non authentifié'}), 401
+    if not profiler.authorized(request):
+        return jsonify({'error': 'Accès refusé'}), 403
+    return None
+
+@system_bp.route('/profiles', methods=['GET'])
+def get_profiles():
+    try:
+        denied = require_profiler_access()
+        if denied:
+            return denied
+
+        return jsonify(profiler.summary()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@system_bp.route('/profiles/collapsed', methods=['GET'])
+def get_collapsed_profiles():
+    try:
+        denied = require_profiler_access()
+        if denied:
+            return denied
+
+        # ?endpoint=posts.get_posts pour un seul endpoint
+        return Response(profiler.collapsed(request.args.get('endpoint')), mimetype='text/plain'), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@system_bp.route('/profiles', methods=['DELETE'])
+def reset_profiles():
+    try:
+        denied = require_profiler_access()
+        if denied:
+            return denied
+
+        profiler.reset()
+        return jsonify({'message': 'Profils réinitialisés'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
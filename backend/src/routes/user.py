@@ -1,12 +1,121 @@
-from flask import Blueprint, jsonify, request
+import base64
+import csv
+import io
+import json
+import os
+import re
+import secrets
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, request, session, send_file, stream_with_context, url_for
+from sqlalchemy import insert
+from sqlalchemy.orm import load_only
 from src.models.user import User, db
+from src.services.hashing import hasher
+from src.services.fields import USER_FIELDS, InvalidFields, requested_fields, serialize
+from src.services.directory import directory
+from src.services import purge
+from src.services import export
+from src.models.job import Job
+from src.models.event import Event
 
 user_bp = Blueprint('user', __name__)
 
+BULK_MAX_USERS = 5000
+BULK_INSERT_BATCH = 500
+BULK_REQUIRED_FIELDS = ('email', 'username', 'first_name', 'last_name')
+# Taille des IN (...) : sous la limite de paramètres de SQLite
+LOOKUP_CHUNK = 900
+TYPEAHEAD_MAX_RESULTS = 20
+
+def require_auth():
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    user = User.query.get(user_id)
+    if not user or not user.is_active:
+        return None
+    return user
+
+# Curseur opaque (JSON en base64) : les noms peuvent contenir n'importe quel séparateur
+def encode_cursor(user):
+    raw = json.dumps([user.last_name, user.first_name, user.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        last_name, first_name, user_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except TypeError:
+        raise ValueError('Curseur invalide')
+    if not isinstance(last_name, str) or not isinstance(first_name, str) or type(user_id) is not int:
+        raise ValueError('Curseur invalide')
+    return last_name, first_name, user_id
+
+def _existing_values(column, values):
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        chunk = values[start:start + LOOKUP_CHUNK]
+        existing.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)))
+    return existing
+
+def _read_members():
+    # JSON ({"users": [...]} ou liste) ou CSV avec en-tête (corps brut ou champ « file »)
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if not upload:
+            return None
+        return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('users')
+    return data if isinstance(data, list) else None
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    # Annuaire des membres actifs, trié par nom (ix_user_name), paginé par curseur
+    if not require_auth():
+        return jsonify({'error': 'Non authentifié'}), 401
+    try:
+        fieldset = requested_fields(USER_FIELDS)
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    cursor = request.args.get('cursor')
+
+    query = User.query.filter(User.is_active == True)
+    if fieldset:
+        # Colonnes du tri nécessaires au curseur
+        query = query.options(*fieldset.options, load_only(User.last_name, User.first_name))
+    if cursor:
+        try:
+            last_name, first_name, user_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        query = query.filter(
+            (User.last_name > last_name) |
+            ((User.last_name == last_name) & (User.first_name > first_name)) |
+            ((User.last_name == last_name) & (User.first_name == first_name) & (User.id > user_id))
+        )
+
+    users = query.order_by(User.last_name.asc(), User.first_name.asc(), User.id.asc()).limit(limit + 1).all()
+    has_more = len(users) > limit
+    users = users[:limit]
+
+    return jsonify({
+        'users': [serialize(user, fieldset) for user in users],
+        'next_cursor': encode_cursor(users[-1]) if has_more else None
+    })
+
+@user_bp.route('/users/typeahead', methods=['GET'])
+def typeahead_users():
+    # Autocomplétion des @mentions : préfixe du pseudo, du prénom ou du nom
+    if not require_auth():
+        return jsonify({'error': 'Non authentifié'}), 401
+    limit = min(request.args.get('limit', 8, type=int), TYPEAHEAD_MAX_RESULTS)
+    return jsonify({'users': directory.search(request.args.get('q', ''), limit)})
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -19,8 +128,14 @@ def create_user():
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    try:
+        fieldset = requested_fields(USER_FIELDS)
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
+    query = User.query
+    if fieldset:
+        query = query.options(*fieldset.options)
+    return jsonify(serialize(query.get_or_404(user_id), fieldset))
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
@@ -33,7 +148,181 @@ def update_user(user_id):
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
+    # Compte désactivé et événements masqués immédiatement ; contenus purgés
+    # par lots dans un job (services/purge.py), sans retour possible
+    current_user = require_auth()
+    if not current_user:
+        return jsonify({'error': 'Non authentifié'}), 401
+    if current_user.id != user_id and not current_user.is_admin:
+        return jsonify({'error': 'Non autorisé'}), 403
+    user = User.query.filter_by(id=user_id, is_active=True).first_or_404()
+    user.is_active = False
+    Event.query.filter_by(created_by=user_id, deleted_at=None).update(
+        {Event.deleted_at: datetime.utcnow()}, synchronize_session=False
+    )
     db.session.commit()
-    return '', 204
+    purge.schedule('user', user_id)
+    if current_user.id == user_id:
+        session.pop('user_id', None)
+    return jsonify({'message': 'Suppression du compte en cours'}), 202
+
+@user_bp.route('/users/bulk', methods=['POST'])
+def bulk_provision_users():
+    user = require_auth()
+    if not user:
+        return jsonify({'error': 'Non authentifié'}), 401
+    if not user.is_admin:
+        return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
+
+    members = _read_members()
+    if members is None:
+        return jsonify({'error': 'Liste de membres invalide (JSON ou CSV attendu)'}), 400
+    if len(members) > BULK_MAX_USERS:
+        return jsonify({'error': f'Au plus {BULK_MAX_USERS} membres par envoi'}), 400
+    for index, member in enumerate(members):
+        # Colonnes en trop d'une ligne CSV : clé None, ignorée
+        if not isinstance(member, dict) or not all(
+            isinstance(value, str) or value is None for key, value in member.items() if key
+        ):
+            return jsonify({'error': f'Membre {index} invalide : objet de champs texte attendu'}), 400
+
+    rejected = []
+    valid = []
+    seen_emails = set()
+    seen_usernames = set()
+    for index, member in enumerate(members):
+        member = {key: (value or '').strip() for key, value in member.items() if key}
+        missing = [field for field in BULK_REQUIRED_FIELDS if not member.get(field)]
+        if missing:
+            rejected.append({'row': index, 'error': f'Champs manquants : {", ".join(missing)}'})
+        elif member['email'] in seen_emails or member['username'] in seen_usernames:
+            rejected.append({'row': index, 'error': 'Doublon dans la liste'})
+        else:
+            seen_emails.add(member['email'])
+            seen_usernames.add(member['username'])
+            valid.append((index, member))
+
+    # Conflits avec les comptes existants : une requête ensembliste par colonne
+    taken_emails = _existing_values(User.email, seen_emails)
+    taken_usernames = _existing_values(User.username, seen_usernames)
+    to_create = []
+    for index, member in valid:
+        if member['email'] in taken_emails:
+            rejected.append({'row': index, 'error': 'Cet email est déjà utilisé'})
+        elif member['username'] in taken_usernames:
+            rejected.append({'row': index, 'error': 'Ce nom d\'utilisateur est déjà pris'})
+        else:
+            to_create.append(member)
+
+    # Mot de passe temporaire pour les membres fournis sans mot de passe
+    temporary_passwords = {}
+    for member in to_create:
+        if not member.get('password'):
+            member['password'] = secrets.token_urlsafe(12)
+            temporary_passwords[member['email']] = member['password']
+
+    hashes = hasher.hash_many([member['password'] for member in to_create])
+
+    now = datetime.utcnow()
+    rows = [{
+        'email': member['email'],
+        'username': member['username'],
+        'first_name': member['first_name'],
+        'last_name': member['last_name'],
+        'bio': member.get('bio', ''),
+        'password_hash': password_hash,
+        'is_active': True,
+        'created_at': now,
+        'updated_at': now
+    } for member, password_hash in zip(to_create, hashes)]
+
+    try:
+        for start in range(0, len(rows), BULK_INSERT_BATCH):
+            db.session.execute(insert(User), rows[start:start + BULK_INSERT_BATCH])
+        db.session.commit()
+        # Insertion ensembliste : pas d'événements ORM, invalidation explicite
+        directory.invalidate()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    rejected.sort(key=lambda item: item['row'])
+    return jsonify({
+        'message': f'{len(rows)} membres créés',
+        'created': len(rows),
+        'rejected': rejected,
+        'temporary_passwords': temporary_passwords
+    }), 201
+
+@user_bp.route('/me/export', methods=['GET'])
+def export_my_data():
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+
+        # Comptes volumineux (ou ?async=true) : archive préparée en tâche de fond,
+        # téléchargeable ensuite avec reprise (Range)
+        if request.args.get('async', 'false').lower() == 'true' or export.is_heavy(user.id):
+            job_id = export.schedule(user.id, secrets.token_urlsafe(16))
+            job = Job.query.get(job_id)
+            token = job.payload['token']
+            return jsonify({
+                'message': 'Export en préparation',
+                'status': job.status,
+                'download_url': url_for('user.download_my_export', token=token)
+            }), 202
+
+        filename = f"export-{user.username}-{datetime.utcnow().strftime('%Y%m%d')}.zip"
+        return Response(
+            stream_with_context(export.iter_archive(user.id)),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'private, no-store',
+                # Taille inconnue à l'avance : reprise possible seulement en mode différé
+                'Accept-Ranges': 'none'
+            }
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/me/export/<string:token>', methods=['GET'])
+def download_my_export(token):
+    try:
+        user = require_auth()
+        if not user:
+            return jsonify({'error': 'Non authentifié'}), 401
+        if not re.fullmatch(r'[A-Za-z0-9_-]{8,64}', token):
+            return jsonify({'error': 'Export non trouvé'}), 404
+
+        path = export.export_path(user.id, token)
+        if os.path.exists(path):
+            # conditional=True : Range, If-Range et ETag pour reprendre un téléchargement
+            response = send_file(
+                path,
+                mimetype='application/zip',
+                as_attachment=True,
+                download_name=f'export-{user.username}.zip',
+                conditional=True,
+                etag=token,
+                max_age=0
+            )
+            response.cache_control.private = True
+            return response
+
+        job = Job.query.filter(
+            Job.kind == 'export.build',
+            Job.payload['user_id'].as_integer() == user.id,
+            Job.payload['token'].as_string() == token
+        ).order_by(Job.id.desc()).first()
+        if not job or job.status == 'done':
+            # Jamais demandé, ou expiré et supprimé
+            return jsonify({'error': 'Export non trouvé'}), 404
+        if job.status == 'failed':
+            return jsonify({'error': "L'export a échoué", 'status': job.status}), 500
+        return jsonify({'message': 'Export en préparation', 'status': job.status}), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,123 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, delete, select, exists, and_
+
+from src.models.user import db
+from src.models.job import Job
+from src.models.post import Post, PostLike, PostComment
+from src.models.message import Message
+from src.models.archive import ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedMessage
+from src.services.jobs import job_handler, enqueue
+from src.services import sync
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+DEFAULT_ARCHIVE_BATCH = 500
+# Lots traités par exécution de job avant de rendre la main à la file
+DEFAULT_ARCHIVE_MAX_BATCHES = 20
+DEFAULT_ARCHIVE_INTERVAL = 24 * 3600
+
+def _config(name, default):
+    return type(default)(os.environ.get(name, current_app.config.get(name, default)))
+
+def cutoff():
+    return datetime.utcnow() - timedelta(days=_config('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+
+def _copy(source, target, where, archived_at):
+    # Colonnes communes : les colonnes propres à la table chaude (scores...) ne sont pas archivées
+    columns = [column.name for column in source.__table__.columns if column.name in target.__table__.columns]
+    query = select(*[source.__table__.c[name] for name in columns], db.literal(archived_at)).where(where)
+    db.session.execute(insert(target.__table__).from_select(columns + ['archived_at'], query))
+
+def _archived(source, target):
+    # Identifiant déjà archivé : base SQLite créée sans AUTOINCREMENT, qui a
+    # réattribué l'identifiant d'une ligne archivée. La ligne reste dans la
+    # table chaude plutôt que de faire échouer chaque lot.
+    return exists().where(target.id == source.id)
+
+def archive_posts(horizon, batch_size):
+    # Une publication part avec ses likes et commentaires, sauf si la discussion
+    # est encore active (commentaire ou like récent)
+    recent_comment = exists().where(and_(PostComment.post_id == Post.id, PostComment.created_at >= horizon))
+    recent_like = exists().where(and_(PostLike.post_id == Post.id, PostLike.created_at >= horizon))
+    reused = (
+        _archived(Post, ArchivedPost)
+        | exists().where(PostComment.post_id == Post.id, _archived(PostComment, ArchivedPostComment))
+        | exists().where(PostLike.post_id == Post.id, _archived(PostLike, ArchivedPostLike))
+    )
+    ids = db.session.execute(
+        select(Post.id).where(Post.created_at < horizon, ~recent_comment, ~recent_like, ~reused)
+        .order_by(Post.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    now = datetime.utcnow()
+    _copy(Post, ArchivedPost, Post.id.in_(ids), now)
+    _copy(PostComment, ArchivedPostComment, PostComment.post_id.in_(ids), now)
+    _copy(PostLike, ArchivedPostLike, PostLike.post_id.in_(ids), now)
+    # Sorties du fil : retirées chez les clients synchronisés
+    comment_ids = db.session.execute(select(PostComment.id).where(PostComment.post_id.in_(ids))).scalars().all()
+    sync.record_deleted(PostComment, comment_ids)
+    sync.record_deleted(Post, ids)
+    db.session.execute(delete(PostLike).where(PostLike.post_id.in_(ids)))
+    db.session.execute(delete(PostComment).where(PostComment.post_id.in_(ids)))
+    db.session.execute(delete(Post).where(Post.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+def archive_messages(horizon, batch_size):
+    # Les messages non lus restent dans la table chaude
+    ids = db.session.execute(
+        select(Message.id).where(Message.created_at < horizon, Message.is_read == True, ~_archived(Message, ArchivedMessage))
+        .order_by(Message.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    _copy(Message, ArchivedMessage, Message.id.in_(ids), datetime.utcnow())
+    db.session.execute(delete(Message).where(Message.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+ARCHIVERS = {
+    'posts': archive_posts,
+    'messages': archive_messages,
+}
+
+@job_handler('archive.run')
+def archive_job(payload):
+    table = payload['table']
+    horizon = cutoff()
+    batch_size = _config('ARCHIVE_BATCH_SIZE', DEFAULT_ARCHIVE_BATCH)
+    moved = 0
+    for _ in range(_config('ARCHIVE_MAX_BATCHES', DEFAULT_ARCHIVE_MAX_BATCHES)):
+        count = ARCHIVERS[table](horizon, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+    else:
+        # Reste du travail : on reprend aussitôt dans un nouveau job
+        enqueue('archive.run', {'table': table})
+        logger.info('Archivage %s : %d lignes déplacées, suite en file', table, moved)
+        return
+    logger.info('Archivage %s : %d lignes déplacées', table, moved)
+    enqueue('archive.run', {'table': table}, delay=_config('ARCHIVE_INTERVAL', DEFAULT_ARCHIVE_INTERVAL))
+
+def schedule():
+    # Une seule chaîne de jobs par table, même après plusieurs redémarrages
+    for table in ARCHIVERS:
+        pending = db.session.query(Job.id).filter(
+            Job.kind == 'archive.run',
+            Job.status.in_(('queued', 'running')),
+            Job.payload['table'].as_string() == table
+        ).first()
+        if not pending:
+            enqueue('archive.run', {'table': table}, dedupe_key=f'archive.run:{table}')
+    db.session.remove()
+
+def init_app(app):
+    if int(os.environ.get('ARCHIVE_AFTER_DAYS', app.config.get('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))) > 0:
+        schedule()
@@ -0,0 +1,156 @@
+import logging
+import multiprocessing
+import os
+import threading
+
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Profils de moteur, choisis par DATABASE_PROFILE (par défaut d'après l'URL) et
+# ajustables un par un par variables d'environnement.
+PROFILES = {
+    'sqlite': {
+        'busy_timeout_ms': ('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'journal_mode': ('SQLITE_JOURNAL_MODE', 'WAL'),
+        # NORMAL suffit en WAL : pas de corruption possible, au pire la perte
+        # des dernières transactions en cas de coupure de courant
+        'synchronous': ('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': ('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size_kb': ('SQLITE_CACHE_SIZE_KB', 64 * 1024),
+        'checkpoint_interval': ('SQLITE_CHECKPOINT_INTERVAL', 300),
+        'pool_size': ('DB_POOL_SIZE', 10),
+        'max_overflow': ('DB_MAX_OVERFLOW', 20),
+    },
+    'postgres': {
+        'pool_size': ('DB_POOL_SIZE', 10),
+        'max_overflow': ('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': ('DB_POOL_TIMEOUT', 10),
+        # Sous les délais d'inactivité des pare-feux et de PgBouncer
+        'pool_recycle': ('DB_POOL_RECYCLE', 1800),
+        'statement_timeout_ms': ('DB_STATEMENT_TIMEOUT_MS', 15000),
+        'lock_timeout_ms': ('DB_LOCK_TIMEOUT_MS', 5000),
+        'idle_in_transaction_timeout_ms': ('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000),
+    },
+    # Réglages par défaut de SQLAlchemy, pour comparaison
+    'none': {},
+}
+
+def profile_name(url):
+    name = os.environ.get('DATABASE_PROFILE')
+    if name:
+        if name not in PROFILES:
+            raise ValueError(f'Profil de base de données inconnu : {name}')
+        return name
+    if url.startswith('sqlite'):
+        return 'sqlite'
+    if url.startswith('postgresql'):
+        return 'postgres'
+    return 'none'
+
+def profile_settings(name):
+    settings = {}
+    for key, (variable, default) in PROFILES[name].items():
+        settings[key] = type(default)(os.environ.get(variable, default))
+    return settings
+
+def engine_options(url, name=None):
+    # Options de create_engine() (SQLALCHEMY_ENGINE_OPTIONS, moteurs des réplicas)
+    name = name or profile_name(url)
+    settings = profile_settings(name)
+    if name == 'sqlite':
+        options = {
+            # Attente gérée par busy_timeout plutôt que par le pilote
+            'connect_args': {'timeout': settings['busy_timeout_ms'] / 1000, 'check_same_thread': False},
+        }
+        if ':memory:' not in url and url not in ('sqlite://', 'sqlite:///'):
+            options.update(poolclass=QueuePool, pool_size=settings['pool_size'], max_overflow=settings['max_overflow'])
+        return options
+    if name == 'postgres':
+        server_options = ' '.join([
+            f"-c statement_timeout={settings['statement_timeout_ms']}",
+            f"-c lock_timeout={settings['lock_timeout_ms']}",
+            f"-c idle_in_transaction_session_timeout={settings['idle_in_transaction_timeout_ms']}",
+        ])
+        return {
+            'pool_size': settings['pool_size'],
+            'max_overflow': settings['max_overflow'],
+            'pool_timeout': settings['pool_timeout'],
+            'pool_recycle': settings['pool_recycle'],
+            'pool_pre_ping': True,
+            'connect_args': {'options': server_options},
+        }
+    return {}
+
+def apply_sqlite_pragmas(engine, settings):
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+        cursor.execute(f"PRAGMA busy_timeout={settings['busy_timeout_ms']}")
+        cursor.execute(f"PRAGMA mmap_size={settings['mmap_size']}")
+        cursor.execute(f"PRAGMA cache_size=-{settings['cache_size_kb']}")
+        cursor.close()
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout()
+        )
+    return stats
+
+class DatabaseProfile:
+    def __init__(self):
+        self.name = None
+        self.settings = {}
+        self.engine = None
+        self._thread = None
+
+    def configure(self, app):
+        # Avant db.init_app() : options du moteur créé par Flask-SQLAlchemy
+        url = app.config['SQLALCHEMY_DATABASE_URI']
+        self.name = profile_name(url)
+        self.settings = profile_settings(self.name)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url, self.name)
+        app.extensions['database_profile'] = self
+
+    def init_app(self, app, engine):
+        # Après db.init_app(), avant toute connexion
+        self.engine = engine
+        if self.name == 'sqlite':
+            apply_sqlite_pragmas(engine, self.settings)
+            interval = self.settings['checkpoint_interval']
+            if interval > 0 and multiprocessing.parent_process() is None:
+                self._thread = threading.Thread(target=self._checkpoint_loop, args=(interval,), name='sqlite-checkpoint', daemon=True)
+                self._thread.start()
+
+    def _checkpoint_loop(self, interval):
+        # Le point de contrôle automatique (PASSIVE) ne tronque jamais le WAL :
+        # on le ramène périodiquement à zéro quand aucun lecteur ne le retient
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                with self.engine.connect() as conn:
+                    busy, log, checkpointed = conn.execute(text('PRAGMA wal_checkpoint(TRUNCATE)')).one()
+                if busy:
+                    logger.info('Point de contrôle WAL partiel : %d/%d pages', checkpointed, log)
+            except Exception as e:
+                logger.warning('Point de contrôle WAL impossible : %s', e)
+
+    def status(self):
+        return {
+            'profile': self.name,
+            'dialect': self.engine.dialect.name if self.engine else None,
+            'settings': self.settings,
+            'pool': pool_stats(self.engine) if self.engine else None
+        }
+
+profile = DatabaseProfile()
@@ -0,0 +1,176 @@
+import bisect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import unicodedata
+
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import object_session
+
+from src.models.user import db, User
+from src.services.replicas import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+CARD_COLUMNS = (User.id, User.username, User.first_name, User.last_name, User.profile_picture, User.updated_at)
+
+def normalize(value):
+    # Recherche insensible à la casse et aux accents (« Émilie » -> « emilie »)
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in value if not unicodedata.combining(char)).casefold().strip()
+
+def _card(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'profile_picture': row.profile_picture
+    }
+
+def _keys(card):
+    full_name = f"{card['first_name'] or ''} {card['last_name'] or ''}"
+    keys = {normalize(card['username']), normalize(card['first_name']), normalize(card['last_name']), normalize(full_name)}
+    keys.discard('')
+    return keys
+
+# Index des préfixes des membres actifs pour l'autocomplétion des mentions :
+# liste triée de (clé normalisée, user_id) parcourue par dichotomie. Les écritures
+# de ce processus marquent l'index comme périmé ; celles des autres processus
+# sont reprises au plus tard après `refresh_interval` secondes.
+class DirectoryIndex:
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._entries = []
+        self._cards = {}
+        self._removed = set()
+        self._watermark = None
+        self._synced_at = 0.0
+        self._loaded = False
+        self._stale = True
+
+    def init_app(self, app):
+        self.refresh_interval = float(os.environ.get(
+            'DIRECTORY_REFRESH_SECONDS', app.config.get('DIRECTORY_REFRESH_SECONDS', self.refresh_interval)
+        ))
+        app.extensions['directory'] = self
+
+    def warm(self, app):
+        # Premier chargement en tâche de fond, pour ne pas le faire payer à une requête
+        if multiprocessing.parent_process() is not None:
+            return
+        def run():
+            with app.app_context():
+                try:
+                    self.sync()
+                except Exception:
+                    logger.exception("Chargement de l'index de l'annuaire impossible")
+                finally:
+                    db.session.remove()
+        threading.Thread(target=run, name='directory-warm', daemon=True).start()
+
+    def invalidate(self, removed=()):
+        self._removed.update(removed)
+        self._stale = True
+
+    def _put(self, card):
+        self._drop(card['id'])
+        self._cards[card['id']] = card
+        for key in _keys(card):
+            bisect.insort(self._entries, (key, card['id']))
+
+    def _drop(self, user_id):
+        card = self._cards.pop(user_id, None)
+        if card is None:
+            return
+        for key in _keys(card):
+            index = bisect.bisect_left(self._entries, (key, user_id))
+            if index < len(self._entries) and self._entries[index] == (key, user_id):
+                del self._entries[index]
+
+    def _load(self):
+        rows = db.session.execute(select(*CARD_COLUMNS).where(User.is_active == True)).all()
+        cards = {row.id: _card(row) for row in rows}
+        self._entries = sorted((key, user_id) for user_id, card in cards.items() for key in _keys(card))
+        self._cards = cards
+        self._watermark = max((row.updated_at for row in rows if row.updated_at), default=None)
+        self._loaded = True
+
+    def sync(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            else:
+                # Mises à jour incrémentales depuis le dernier passage (index sur updated_at)
+                query = select(*CARD_COLUMNS, User.is_active)
+                if self._watermark:
+                    query = query.where(User.updated_at >= self._watermark)
+                for row in db.session.execute(query):
+                    if row.is_active:
+                        self._put(_card(row))
+                    else:
+                        self._drop(row.id)
+                    if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+                        self._watermark = row.updated_at
+                for user_id in self._removed:
+                    self._drop(user_id)
+                self._removed.clear()
+                # Suppressions faites ailleurs : invisibles en incrémental, on recharge
+                active = db.session.execute(select(func.count(User.id)).where(User.is_active == True)).scalar()
+                if active != len(self._cards):
+                    self._load()
+            self._synced_at = time.monotonic()
+            self._stale = False
+
+    def _ensure_fresh(self):
+        if self._stale or time.monotonic() - self._synced_at > self.refresh_interval:
+            self.sync()
+
+    def search(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        with self._lock:
+            results = []
+            seen = set()
+            index = bisect.bisect_left(self._entries, (prefix,))
+            while index < len(self._entries) and len(results) < limit:
+                key, user_id = self._entries[index]
+                if not key.startswith(prefix):
+                    break
+                if user_id not in seen:
+                    seen.add(user_id)
+                    results.append(self._cards[user_id])
+                index += 1
+            return results
+
+    def __len__(self):
+        return len(self._cards)
+
+directory = DirectoryIndex()
+
+# Invalidation après commit uniquement, quand les changements sont visibles
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+def _user_written(mapper, connection, target):
+    object_session(target).info['directory_dirty'] = True
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    session = object_session(target)
+    session.info['directory_dirty'] = True
+    session.info.setdefault('directory_removed', set()).add(target.id)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('directory_dirty', False):
+        directory.invalidate(session.info.pop('directory_removed', ()))
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('directory_dirty', None)
+    session.info.pop('directory_removed', None)
@@ -0,0 +1,169 @@
+import glob
+import json
+import logging
+import os
+import time
+import zipfile
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import select, func
+
+from src.models.user import db, User
+from src.models.post import Post, PostLike, PostComment
+from src.models.prayer import Prayer, PrayerSupport
+from src.models.event import Event, EventAttendance
+from src.models.group import GroupMembership
+from src.models.message import Message
+from src.models.archive import ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedMessage
+from src.services.jobs import job_handler, enqueue
+
+logger = logging.getLogger(__name__)
+
+# Lignes lues par aller-retour (yield_per) et volume compressé avant envoi
+DEFAULT_EXPORT_CHUNK = 500
+FLUSH_BYTES = 64 * 1024
+# Au-delà, l'archive est préparée en tâche de fond puis téléchargée (reprise par Range)
+DEFAULT_EXPORT_INLINE_MAX_ROWS = 10000
+DEFAULT_EXPORT_TTL_HOURS = 48
+# Date fixe des entrées : deux exports des mêmes données donnent les mêmes octets
+ENTRY_DATE = (1980, 1, 1, 0, 0, 0)
+
+def _config(name, default):
+    return type(default)(os.environ.get(name, current_app.config.get(name, default)))
+
+def _table_columns(model, exclude=()):
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+# Fichier NDJSON -> requêtes (tables chaudes puis archivées), triées par id
+def sections(user_id):
+    return [
+        ('profile.ndjson', [
+            select(*_table_columns(User, exclude=('password_hash',))).where(User.id == user_id),
+        ]),
+        ('posts.ndjson', [
+            select(Post.__table__).where(Post.author_id == user_id).order_by(Post.id),
+            select(ArchivedPost.__table__).where(ArchivedPost.author_id == user_id).order_by(ArchivedPost.id),
+        ]),
+        ('comments.ndjson', [
+            select(PostComment.__table__).where(PostComment.user_id == user_id).order_by(PostComment.id),
+            select(ArchivedPostComment.__table__).where(ArchivedPostComment.user_id == user_id).order_by(ArchivedPostComment.id),
+        ]),
+        ('likes.ndjson', [
+            select(PostLike.__table__).where(PostLike.user_id == user_id).order_by(PostLike.id),
+            select(ArchivedPostLike.__table__).where(ArchivedPostLike.user_id == user_id).order_by(ArchivedPostLike.id),
+        ]),
+        ('prayers.ndjson', [
+            select(Prayer.__table__).where(Prayer.author_id == user_id).order_by(Prayer.id),
+        ]),
+        ('supports.ndjson', [
+            select(PrayerSupport.__table__).where(PrayerSupport.user_id == user_id).order_by(PrayerSupport.id),
+        ]),
+        ('events.ndjson', [
+            select(Event.__table__).where(Event.created_by == user_id).order_by(Event.id),
+        ]),
+        ('event_attendances.ndjson', [
+            select(EventAttendance.__table__).where(EventAttendance.user_id == user_id).order_by(EventAttendance.id),
+        ]),
+        ('memberships.ndjson', [
+            select(GroupMembership.__table__).where(GroupMembership.user_id == user_id).order_by(GroupMembership.id),
+        ]),
+        ('messages.ndjson', [
+            select(Message.__table__).where((Message.sender_id == user_id) | (Message.receiver_id == user_id)).order_by(Message.id),
+            select(ArchivedMessage.__table__).where(
+                (ArchivedMessage.sender_id == user_id) | (ArchivedMessage.receiver_id == user_id)
+            ).order_by(ArchivedMessage.id),
+        ]),
+    ]
+
+def count_rows(user_id):
+    total = 0
+    for _, queries in sections(user_id):
+        for query in queries:
+            total += db.session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+    return total
+
+def is_heavy(user_id):
+    return count_rows(user_id) > _config('EXPORT_INLINE_MAX_ROWS', DEFAULT_EXPORT_INLINE_MAX_ROWS)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+# Destination de zipfile non positionnable : zipfile écrit alors des
+# descripteurs de données après chaque entrée, et on vide le tampon au fil de l'eau
+class _Sink:
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+def iter_archive(user_id):
+    # Archive zip produite par morceaux : mémoire bornée par yield_per et FLUSH_BYTES
+    chunk_size = _config('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK)
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, queries in sections(user_id):
+            info = zipfile.ZipInfo(name, date_time=ENTRY_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, 'w', force_zip64=True) as entry:
+                for query in queries:
+                    archived = query.get_final_froms()[0].name.startswith('archived_')
+                    for row in db.session.execute(query.execution_options(yield_per=chunk_size)).mappings():
+                        record = dict(row)
+                        if archived:
+                            record['archived'] = True
+                        entry.write(json.dumps(record, default=_json_default, ensure_ascii=False).encode() + b'\n')
+                        if sink.size >= FLUSH_BYTES:
+                            yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+# Exports préparés en tâche de fond : MEDIA_ROOT/exports/<user_id>-<jeton>.zip
+
+def export_dir():
+    return os.path.join(current_app.config['MEDIA_ROOT'], 'exports')
+
+def export_path(user_id, token):
+    return os.path.join(export_dir(), f'{user_id}-{token}.zip')
+
+def purge_expired():
+    horizon = time.time() - _config('EXPORT_TTL_HOURS', DEFAULT_EXPORT_TTL_HOURS) * 3600
+    for path in glob.glob(os.path.join(export_dir(), '*.zip')):
+        if os.path.getmtime(path) < horizon:
+            os.remove(path)
+
+def remove_exports(user_id):
+    for path in glob.glob(os.path.join(export_dir(), f'{user_id}-*')):
+        os.remove(path)
+
+@job_handler('export.build')
+def build_export_job(payload):
+    user_id, token = payload['user_id'], payload['token']
+    os.makedirs(export_dir(), exist_ok=True)
+    path = export_path(user_id, token)
+    # Écriture dans un fichier temporaire renommé à la fin : jamais d'archive partielle servie
+    partial = f'{path}.part'
+    with open(partial, 'wb') as output:
+        for data in iter_archive(user_id):
+            output.write(data)
+    os.replace(partial, path)
+    purge_expired()
+    logger.info('Export de l\'utilisateur %s prêt : %d octets', user_id, os.path.getsize(path))
+
+def schedule(user_id, token):
+    return enqueue('export.build', {'user_id': user_id, 'token': token}, dedupe_key=f'export:{user_id}')
@@ -0,0 +1,171 @@
+from datetime import datetime
+from functools import lru_cache
+
+from flask import request
+from sqlalchemy.orm import load_only, joinedload, selectinload, raiseload
+
+from src.models.media import media_variants
+from src.models.user import User
+from src.models.post import Post
+from src.models.prayer import Prayer
+from src.models.event import Event
+from src.models.group import Group
+from src.models.archive import ArchivedPost
+from src.services.usercards import user_card
+
+class InvalidFields(ValueError):
+    pass
+
+# Description des champs exposés par un modèle pour ?fields= :
+#  - columns : colonnes renvoyées telles quelles (dates au format ISO)
+#  - relations : champ -> relation many-to-one sérialisée avec to_dict() (cartes en cache pour User)
+#  - counts : champ -> collection dont on renvoie la taille
+#  - computed : champ -> (colonnes requises, fonction)
+#  - viewer : indicateurs propres à l'utilisateur, ajoutés par services/viewer.py
+class FieldSpec:
+    def __init__(self, model, columns, relations=None, counts=None, computed=None, viewer=()):
+        self.model = model
+        self.columns = columns
+        self.relations = relations or {}
+        self.counts = counts or {}
+        self.computed = computed or {}
+        self.viewer = viewer
+        self.names = (frozenset(columns) | frozenset(self.relations) | frozenset(self.counts) |
+                      frozenset(self.computed) | frozenset(viewer))
+
+def _column_getter(name):
+    def getter(obj):
+        value = getattr(obj, name)
+        return value.isoformat() if isinstance(value, datetime) and value else value
+    return getter
+
+def _relation_getter(attr):
+    def getter(obj):
+        related = getattr(obj, attr)
+        return related.to_dict() if related else None
+    return getter
+
+def _card_getter(column):
+    return lambda obj: user_card(getattr(obj, column))
+
+def _count_getter(attr):
+    return lambda obj: len(getattr(obj, attr))
+
+class FieldSet:
+    def __init__(self, fields, options, getters):
+        self.fields = fields
+        self.options = options
+        self.getters = getters
+
+    def serialize(self, obj):
+        return {name: getter(obj) for name, getter in self.getters}
+
+@lru_cache(maxsize=256)
+def build_fieldset(spec, fields):
+    # Projection et sérialiseur calculés une fois par ensemble de champs
+    model = spec.model
+    columns = {'id'}
+    options = []
+    getters = [('id', _column_getter('id'))]
+    for name in sorted(fields - {'id'}):
+        if name in spec.columns:
+            columns.add(name)
+            getters.append((name, _column_getter(name)))
+        elif name in spec.relations:
+            attr = spec.relations[name]
+            relationship = getattr(model, attr)
+            # La clé étrangère est nécessaire pour la jointure
+            local_columns = [column.key for column in relationship.property.local_columns]
+            columns.update(local_columns)
+            if relationship.property.mapper.class_ is User:
+                # Carte utilisateur servie par le cache, sans jointure
+                getters.append((name, _card_getter(local_columns[0])))
+            else:
+                options.append(joinedload(relationship))
+                getters.append((name, _relation_getter(attr)))
+        elif name in spec.counts:
+            attr = spec.counts[name]
+            relationship = getattr(model, attr)
+            target = relationship.property.mapper.class_
+            options.append(selectinload(relationship).load_only(target.id))
+            getters.append((name, _count_getter(attr)))
+        elif name in spec.viewer:
+            continue
+        else:
+            required, fn = spec.computed[name]
+            columns.update(required)
+            getters.append((name, fn))
+    options.insert(0, load_only(*[getattr(model, column) for column in sorted(columns)]))
+    # Toute autre relation lève une erreur au lieu d'être chargée en silence
+    options.append(raiseload('*'))
+    return FieldSet(fields, tuple(options), tuple(getters))
+
+def parse_fields(value, spec):
+    if not value:
+        return None
+    fields = frozenset(field.strip() for field in value.split(',') if field.strip())
+    unknown = fields - spec.names
+    if unknown:
+        raise InvalidFields(f'Champs inconnus : {", ".join(sorted(unknown))}')
+    if not fields:
+        return None
+    return build_fieldset(spec, fields)
+
+def requested_fields(spec):
+    return parse_fields(request.args.get('fields'), spec)
+
+def serialize(obj, fieldset):
+    return fieldset.serialize(obj) if fieldset else obj.to_dict()
+
+POST_FIELDS = FieldSpec(
+    Post,
+    columns=('id', 'content', 'image_url', 'author_id', 'group_id', 'created_at', 'updated_at'),
+    relations={'author': 'author'},
+    counts={'likes_count': 'likes', 'comments_count': 'comments'},
+    computed={'image_variants': (('image_url',), lambda post: media_variants(post.image_url))},
+    viewer=('liked_by_me',)
+)
+
+# Mêmes champs, servis depuis la table d'archive
+ARCHIVED_POST_FIELDS = FieldSpec(
+    ArchivedPost,
+    columns=POST_FIELDS.columns,
+    relations=POST_FIELDS.relations,
+    counts=POST_FIELDS.counts,
+    computed=POST_FIELDS.computed,
+    viewer=POST_FIELDS.viewer
+)
+
+PRAYER_FIELDS = FieldSpec(
+    Prayer,
+    columns=('id', 'title', 'description', 'status', 'author_id', 'is_private', 'supports_count', 'created_at',
+             'updated_at', 'answered_at'),
+    relations={'author': 'author'},
+    viewer=('supported_by_me',)
+)
+
+EVENT_FIELDS = FieldSpec(
+    Event,
+    columns=('id', 'title', 'description', 'location', 'start_date', 'end_date', 'image_url', 'is_public',
+             'created_by', 'created_at', 'updated_at'),
+    relations={'creator': 'creator'},
+    counts={'attendees_count': 'attendees'},
+    computed={'image_variants': (('image_url',), lambda event: media_variants(event.image_url))},
+    viewer=('my_rsvp',)
+)
+
+GROUP_FIELDS = FieldSpec(
+    Group,
+    columns=('id', 'name', 'description', 'image_url', 'is_private', 'created_by', 'created_at', 'updated_at'),
+    relations={'creator': 'creator'},
+    counts={'members_count': 'members'},
+    computed={'image_variants': (('image_url',), lambda group: media_variants(group.image_url))},
+    viewer=('is_member',)
+)
+
+USER_FIELDS = FieldSpec(
+    User,
+    columns=('id', 'username', 'email', 'first_name', 'last_name', 'bio', 'profile_picture', 'is_active',
+             'created_at', 'updated_at'),
+    computed={'profile_picture_variants': (('profile_picture',), lambda user: media_variants(user.profile_picture))}
+)
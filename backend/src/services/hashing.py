@@ -0,0 +1,74 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+
+class HashingBusy(Exception):
+    pass
+
+# Pool borné pour le hachage des mots de passe. hashlib libère le GIL pendant
+# scrypt/PBKDF2 : un petit nombre de threads suffit, et la file bornée évite
+# qu'un pic de connexions occupe tous les threads du serveur.
+class PasswordHasher:
+    def __init__(self, workers=2, max_queue=32, timeout=5.0, method=DEFAULT_HASH_METHOD):
+        self.configure(workers, max_queue, timeout, method)
+
+    def configure(self, workers, max_queue, timeout, method):
+        self.workers = workers
+        self.timeout = timeout
+        self.method = method
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.configure(
+            int(os.environ.get('PASSWORD_HASH_WORKERS', app.config.get('PASSWORD_HASH_WORKERS', 2))),
+            int(os.environ.get('PASSWORD_HASH_QUEUE', app.config.get('PASSWORD_HASH_QUEUE', 32))),
+            float(os.environ.get('PASSWORD_HASH_TIMEOUT', app.config.get('PASSWORD_HASH_TIMEOUT', 5.0))),
+            os.environ.get('PASSWORD_HASH_METHOD', app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD))
+        )
+        app.extensions['password_hasher'] = self
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingBusy()
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+    def hash_many(self, passwords, workers=None):
+        # Provisionnement en masse : pool dédié, pour ne pas saturer celui des connexions
+        workers = workers or os.cpu_count() or 2
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash-bulk') as executor:
+            return list(executor.map(lambda password: generate_password_hash(password, self.method), passwords))
+
+    def prefix(self):
+        # Le préfixe avant le premier « $ » contient la méthode et ses paramètres,
+        # complétés par werkzeug (« scrypt » → « scrypt:32768:8:1 ») : on le
+        # relève une fois sur un hachage produit avec la méthode configurée
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefix()
+
+hasher = PasswordHasher()
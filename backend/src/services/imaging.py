@@ -0,0 +1,30 @@
+# Fonctions exécutées dans les processus du pool d'images. Ce module n'importe
+# ni Flask ni SQLAlchemy, mais en mode spawn chaque enfant réimporte aussi le
+# module principal du parent : lancé par `python src/main.py`, c'est toute
+# l'application (d'où la garde des workers dans jobs.init_app). Les processus
+# du pool sont gardés d'une image à l'autre : ce coût n'est payé qu'une fois.
+import os
+
+from PIL import Image, ImageOps
+
+def generate_variants(source_path, variants, quality=82):
+    # variants : {nom: (taille max en pixels, chemin de sortie)}
+    results = {}
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        if image.mode not in ('RGB', 'L'):
+            # Aplatir la transparence sur fond blanc pour le JPEG
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        for name, (max_size, output_path) in variants.items():
+            variant = image.copy()
+            variant.thumbnail((max_size, max_size), Image.LANCZOS)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            tmp_path = f'{output_path}.{os.getpid()}.tmp'
+            variant.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, output_path)
+            results[name] = {'width': variant.width, 'height': variant.height}
+    return {'width': width, 'height': height, 'variants': results}
@@ -0,0 +1,304 @@
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import create_engine, select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+job_table = Job.__table__
+
+# kind -> (fonction, taille de lot)
+_handlers = {}
+
+def job_handler(kind, batch_size=1):
+    # Avec batch_size > 1, la fonction reçoit la liste des payloads d'un lot
+    def decorator(fn):
+        _handlers[kind] = (fn, batch_size)
+        return fn
+    return decorator
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+class JobMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.kinds = {}
+
+    def record(self, kind, count, duration, outcome):
+        with self._lock:
+            stats = self.kinds.setdefault(kind, {'succeeded': 0, 'retried': 0, 'failed': 0, 'duration': 0.0})
+            stats[outcome] += count
+            stats['duration'] += duration
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            result = {}
+            for kind, stats in self.kinds.items():
+                processed = stats['succeeded'] + stats['retried'] + stats['failed']
+                result[kind] = dict(
+                    stats,
+                    throughput_per_s=round(stats['succeeded'] / elapsed, 3),
+                    avg_duration_ms=round(stats['duration'] * 1000 / processed, 3) if processed else 0.0
+                )
+            return {'uptime_s': round(elapsed, 1), 'kinds': result}
+
+# File de jobs persistée dans la table `job`, utilisable avec le moteur de
+# Flask-SQLAlchemy (src/main.py) ou un moteur autonome (app.py).
+class JobQueue:
+    def __init__(self, engine, backoff_base=5, backoff_max=3600):
+        self.engine = engine
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = JobMetrics()
+
+    @classmethod
+    def from_url(cls, url, **engine_options):
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql://', 1)
+        return cls(create_engine(url, **engine_options))
+
+    def create_table(self):
+        job_table.create(self.engine, checkfirst=True)
+
+    def enqueue(self, kind, payload=None, priority=0, dedupe_key=None, delay=0, max_attempts=5):
+        now = datetime.utcnow()
+        values = {
+            'kind': kind,
+            'payload': payload,
+            'priority': priority,
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'dedupe_key': dedupe_key,
+            'run_at': now + timedelta(seconds=delay),
+            'created_at': now
+        }
+        if dedupe_key:
+            existing = self._find_by_dedupe_key(dedupe_key)
+            if existing:
+                return existing
+        try:
+            with self.engine.begin() as conn:
+                result = conn.execute(insert(job_table).values(**values))
+                return result.inserted_primary_key[0]
+        except IntegrityError:
+            # Course avec un autre producteur sur la même clé
+            if dedupe_key:
+                existing = self._find_by_dedupe_key(dedupe_key)
+                if existing:
+                    return existing
+            raise
+
+    def _find_by_dedupe_key(self, dedupe_key):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(job_table.c.id).where(job_table.c.dedupe_key == dedupe_key)
+            ).scalar()
+
+    def claim(self, worker_id, limit=1, kinds=None):
+        now = datetime.utcnow()
+        token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+        with self.engine.begin() as conn:
+            candidates = select(job_table.c.id).where(
+                job_table.c.status == 'queued',
+                job_table.c.run_at <= now
+            )
+            if kinds:
+                candidates = candidates.where(job_table.c.kind.in_(kinds))
+            # FOR UPDATE SKIP LOCKED sur Postgres, ignoré par SQLite où la mise à
+            # jour conditionnelle ci-dessous garantit qu'un seul worker gagne
+            candidates = candidates.order_by(
+                job_table.c.priority.desc(), job_table.c.run_at, job_table.c.id
+            ).limit(limit).with_for_update(skip_locked=True)
+            ids = conn.execute(candidates).scalars().all()
+            if not ids:
+                return []
+            conn.execute(
+                update(job_table).where(
+                    job_table.c.id.in_(ids),
+                    job_table.c.status == 'queued'
+                ).values(
+                    status='running',
+                    locked_by=token,
+                    locked_at=now,
+                    attempts=job_table.c.attempts + 1
+                )
+            )
+            rows = conn.execute(
+                select(job_table).where(job_table.c.locked_by == token).order_by(job_table.c.id)
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def complete(self, ids):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(job_table).where(job_table.c.id.in_(ids)).values(
+                    status='done',
+                    dedupe_key=None,
+                    locked_by=None,
+                    finished_at=datetime.utcnow()
+                )
+            )
+
+    def fail(self, job, error):
+        now = datetime.utcnow()
+        values = {'last_error': error[-4000:], 'locked_by': None}
+        if job['attempts'] < job['max_attempts']:
+            # Backoff exponentiel avec gigue
+            delay = min(self.backoff_base * 2 ** (job['attempts'] - 1), self.backoff_max)
+            values.update(status='queued', run_at=now + timedelta(seconds=delay * random.uniform(0.8, 1.2)))
+            outcome = 'retried'
+        else:
+            values.update(status='failed', dedupe_key=None, finished_at=now)
+            outcome = 'failed'
+        with self.engine.begin() as conn:
+            conn.execute(update(job_table).where(job_table.c.id == job['id']).values(**values))
+        return outcome
+
+    def requeue_stale(self, timeout):
+        # Jobs restés « running » après la mort de leur worker
+        limit = datetime.utcnow() - timedelta(seconds=timeout)
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(job_table).where(
+                    job_table.c.status == 'running',
+                    job_table.c.locked_at < limit
+                ).values(status='queued', locked_by=None)
+            )
+        return result.rowcount
+
+    def depth(self):
+        # Jobs en attente ou en cours par type (index ix_job_claim)
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(job_table.c.kind, job_table.c.status, func.count())
+                .where(job_table.c.status.in_(('queued', 'running')))
+                .group_by(job_table.c.kind, job_table.c.status)
+            ).all()
+        return {(kind, status): count for kind, status, count in rows}
+
+    def stats(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(job_table.c.kind, job_table.c.status, func.count())
+                .group_by(job_table.c.kind, job_table.c.status)
+            ).all()
+        counts = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return {
+            'queued': sum(c.get('queued', 0) for c in counts.values()),
+            'running': sum(c.get('running', 0) for c in counts.values()),
+            'kinds': counts,
+            'metrics': self.metrics.snapshot()
+        }
+
+class Worker:
+    def __init__(self, app, queue, concurrency=4, poll_interval=1.0, kinds=None, stale_timeout=600):
+        self.app = app
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.kinds = kinds
+        self.stale_timeout = stale_timeout
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f'jobs-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception('Erreur du worker de jobs')
+                processed = 0
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self):
+        jobs = self.queue.claim(self.worker_id, limit=1, kinds=self.kinds)
+        if not jobs:
+            return 0
+        handler = get_handler(jobs[0]['kind'])
+        if handler and handler[1] > 1:
+            # Compléter le lot avec d'autres jobs du même type
+            jobs += self.queue.claim(self.worker_id, limit=handler[1] - 1, kinds=[jobs[0]['kind']])
+        self._execute(jobs[0]['kind'], handler, jobs)
+        return len(jobs)
+
+    def _execute(self, kind, handler, jobs):
+        started = time.monotonic()
+        with self.app.app_context():
+            try:
+                if handler is None:
+                    raise LookupError(f'Aucun handler pour le job {kind}')
+                fn, batch_size = handler
+                if batch_size > 1:
+                    fn([job['payload'] for job in jobs])
+                else:
+                    fn(jobs[0]['payload'])
+            except Exception:
+                db.session.rollback()
+                error = traceback.format_exc()
+                logger.warning('Job %s (%s) en échec : %s', kind, [job['id'] for job in jobs], error.splitlines()[-1])
+                for job in jobs:
+                    outcome = self.queue.fail(job, error)
+                    self.queue.metrics.record(kind, 1, 0.0, outcome)
+                return
+            finally:
+                db.session.remove()
+        self.queue.complete([job['id'] for job in jobs])
+        self.queue.metrics.record(kind, len(jobs), time.monotonic() - started, 'succeeded')
+
+    def run_forever(self, metrics_interval=60):
+        self.start()
+        try:
+            while not self._stop.wait(metrics_interval):
+                requeued = self.queue.requeue_stale(self.stale_timeout)
+                if requeued:
+                    logger.warning('%d job(s) bloqué(s) remis en file', requeued)
+                logger.info('Métriques jobs : %s', self.queue.metrics.snapshot())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+def init_app(app):
+    queue = JobQueue(db.engine)
+    app.extensions['jobs'] = queue
+    embedded = int(os.environ.get('JOBS_EMBEDDED_WORKERS', app.config.get('JOBS_EMBEDDED_WORKERS', 1)))
+    # Pas de workers dans les processus enfants (pool d'images en mode spawn)
+    if embedded > 0 and multiprocessing.parent_process() is None:
+        # Workers intégrés au serveur web, pratiques en développement
+        Worker(app, queue, concurrency=embedded).start()
+    return queue
+
+def enqueue(kind, payload=None, **options):
+    return current_app.extensions['jobs'].enqueue(kind, payload, **options)
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from src.models.user import db
+from src.models.media import Media
+from src.services.jobs import job_handler, enqueue
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Signatures des formats acceptés
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+class MediaTooLarge(Exception):
+    pass
+
+class UnsupportedMedia(Exception):
+    pass
+
+def sniff_content_type(head):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+# Stockage adressé par contenu : <racine>/<ab>/<cd>/<sha256>[_<variante>.jpg]
+class MediaStorage:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+
+    def path(self, sha256, variant=None):
+        name = sha256 if variant is None else f'{sha256}_{variant}.jpg'
+        return os.path.join(self.root, sha256[:2], sha256[2:4], name)
+
+    def save_stream(self, stream):
+        # Écrit le flux par morceaux en calculant le hash, sans tout charger en mémoire
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        tmp_path = os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+        try:
+            with open(tmp_path, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise MediaTooLarge()
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            content_type = sniff_content_type(head)
+            if content_type is None:
+                raise UnsupportedMedia()
+            sha256 = digest.hexdigest()
+            final_path = self.path(sha256)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return sha256, content_type, size
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def variant_targets(self, sha256, sizes):
+        return {name: (max_size, self.path(sha256, name)) for name, max_size in sizes.items()}
+
+# Pool de processus borné pour les redimensionnements. Quand il est saturé, le
+# travail passe par la file de jobs plutôt que de bloquer la requête.
+class MediaProcessor:
+    def __init__(self, app=None):
+        self.app = None
+        self.storage = None
+        self.sizes = {'thumb': 256, 'feed': 1080}
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        root = app.config.get('MEDIA_ROOT') or os.path.join(app.root_path, 'media')
+        self.storage = MediaStorage(root, app.config.get('MEDIA_MAX_BYTES', 20 * 1024 * 1024))
+        self.sizes = app.config.get('MEDIA_VARIANT_SIZES', self.sizes)
+        self.max_workers = app.config.get('MEDIA_WORKERS', 2)
+        self._slots = threading.BoundedSemaphore(app.config.get('MEDIA_MAX_PENDING', self.max_workers * 4))
+        app.extensions['media'] = self
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn : pas de fork d'un serveur multi-thread
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def submit(self, media):
+        from src.services.imaging import generate_variants
+
+        if not self._slots.acquire(blocking=False):
+            enqueue('media.variants', {'media_id': media.id}, dedupe_key=f'media.variants:{media.id}')
+            return
+        try:
+            future = self._get_executor().submit(
+                generate_variants,
+                self.storage.path(media.sha256),
+                self.storage.variant_targets(media.sha256, self.sizes)
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f, media_id=media.id: self._finished(media_id, f))
+
+    def _finished(self, media_id, future):
+        self._slots.release()
+        with self.app.app_context():
+            try:
+                record_variants(media_id, future.result())
+            except Exception:
+                db.session.rollback()
+                logger.exception('Échec de la génération des variantes du média %s', media_id)
+                mark_failed(media_id)
+            finally:
+                db.session.remove()
+
+processor = MediaProcessor()
+
+def record_variants(media_id, result):
+    media = Media.query.get(media_id)
+    if not media:
+        return
+    media.width = result['width']
+    media.height = result['height']
+    media.variants = result['variants']
+    media.status = 'ready'
+    db.session.commit()
+
+def mark_failed(media_id):
+    Media.query.filter_by(id=media_id).update({'status': 'failed'})
+    db.session.commit()
+
+@job_handler('media.variants')
+def generate_variants_job(payload):
+    from src.services.imaging import generate_variants
+
+    media = Media.query.get(payload['media_id'])
+    if not media or media.status == 'ready':
+        return
+    result = generate_variants(
+        processor.storage.path(media.sha256),
+        processor.storage.variant_targets(media.sha256, processor.sizes)
+    )
+    record_variants(media.id, result)
@@ -0,0 +1,333 @@
+import atexit
+import bisect
+import glob
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from flask import Response, g, request
+
+from src.services.database import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Bornes par défaut de prometheus_client, en secondes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_FLUSH_SECONDS = 5.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Compteurs d'un thread : un seul écrivain, donc aucune synchronisation à
+# l'écriture ; la collecte copie les dictionnaires (copie atomique sous le GIL).
+class _Shard:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.in_flight = 0
+
+# Présent dans le stockage local du thread : sa destruction à la fin du thread
+# reverse les compteurs du thread dans le total des threads terminés
+class _Holder:
+    def __init__(self, shard):
+        self.shard = shard
+
+def _merge(target, counters, histograms):
+    for key, value in counters.items():
+        target['counters'][key] = target['counters'].get(key, 0) + value
+    for key, values in histograms.items():
+        current = target['histograms'].get(key)
+        if current is None:
+            target['histograms'][key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                current[index] += value
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Métriques au format d'exposition Prometheus, sans dépendance. En mode
+# multi-processus (PROMETHEUS_MULTIPROC_DIR), chaque processus écrit
+# périodiquement son instantané dans le répertoire partagé et /metrics agrège
+# les fichiers : compteurs et histogrammes sommés (processus terminés compris),
+# jauges des seuls processus vivants, étiquetées par pid.
+class Metrics:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = set()
+        self._retired = {'counters': {}, 'histograms': {}}
+        self._meta = {}
+        self._collectors = []
+        self.multiproc_dir = None
+        self.token = None
+        self._flusher = None
+        self.counter('http_requests_total', 'Requêtes HTTP traitées')
+        self.histogram('http_request_duration_seconds', 'Durée de traitement des requêtes HTTP')
+
+    def counter(self, name, help):
+        self._meta[name] = ('counter', help, None)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help, tuple(buckets))
+
+    def register_collector(self, fn, per_process=True):
+        # fn() -> [(nom, type, aide, {étiquettes}, valeur)], appelée à chaque collecte ;
+        # per_process=False pour les valeurs globales (file en base...), lues une seule fois
+        self._collectors.append((fn, per_process))
+
+    def _shard(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            shard = _Shard()
+            holder = self._local.holder = _Holder(shard)
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(holder, self._retire, shard)
+        return holder.shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.discard(shard)
+            _merge(self._retired, shard.counters, shard.histograms)
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, tuple(labels))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, tuple(labels))
+        values = histograms.get(key)
+        if values is None:
+            # Un compteur par intervalle (non cumulé), +Inf compris, puis la somme
+            values = histograms[key] = [0] * (len(self._meta[name][2]) + 2)
+        values[bisect.bisect_left(self._meta[name][2], value)] += 1
+        values[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            result = {'counters': dict(self._retired['counters']), 'histograms': {k: list(v) for k, v in self._retired['histograms'].items()}}
+            shards = list(self._shards)
+        in_flight = 0
+        for shard in shards:
+            _merge(result, shard.counters.copy(), {key: list(values) for key, values in shard.histograms.copy().items()})
+            in_flight += shard.in_flight
+        result['in_flight'] = in_flight
+        return result
+
+    def _gauges(self, per_process):
+        samples = []
+        for fn, local in self._collectors:
+            if local != per_process:
+                continue
+            try:
+                samples.extend(fn())
+            except Exception as e:
+                logger.warning('Collecte de métriques impossible : %s', e)
+        return samples
+
+    def _process_gauges(self, snapshot):
+        gauges = [('http_requests_in_flight', 'gauge', 'Requêtes HTTP en cours', {}, snapshot['in_flight'])]
+        return gauges + self._gauges(per_process=True)
+
+    # Mode multi-processus
+
+    def _path(self, pid):
+        return os.path.join(self.multiproc_dir, f'metrics-{pid}.json')
+
+    def flush(self):
+        snapshot = self._local_state()
+        path = self._path(os.getpid())
+        partial = f'{path}.{threading.get_ident()}.tmp'
+        with open(partial, 'w') as output:
+            json.dump(snapshot, output)
+        os.replace(partial, path)
+
+    def _local_state(self):
+        snapshot = self.snapshot()
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in snapshot['counters'].items()],
+            'histograms': [[name, labels, values] for (name, labels), values in snapshot['histograms'].items()],
+            'gauges': self._process_gauges(snapshot),
+        }
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning('Écriture des métriques impossible : %s', e)
+
+    def _states(self):
+        own = os.getpid()
+        states = [(own, self._local_state())]
+        if self.multiproc_dir:
+            for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics-*.json')):
+                pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+                if pid == own:
+                    continue
+                try:
+                    with open(path) as source:
+                        states.append((pid, json.load(source)))
+                except (OSError, ValueError):
+                    continue
+        return states
+
+    # Exposition
+
+    def render(self):
+        states = self._states()
+        total = {'counters': {}, 'histograms': {}}
+        gauges = []
+        for pid, state in states:
+            _merge(
+                total,
+                {(name, tuple(map(tuple, labels))): value for name, labels, value in state['counters']},
+                {(name, tuple(map(tuple, labels))): values for name, labels, values in state['histograms']}
+            )
+            if self.multiproc_dir and pid != os.getpid() and not _pid_alive(pid):
+                continue
+            for name, kind, help, labels, value in state['gauges']:
+                if self.multiproc_dir:
+                    labels = dict(labels, pid=pid)
+                gauges.append((name, kind, help, labels, value))
+        gauges.extend(self._gauges(per_process=False))
+
+        families = {}
+        for (name, labels), value in total['counters'].items():
+            families.setdefault(name, []).append((name, labels, value))
+        for (name, labels), values in total['histograms'].items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self._meta[name][2] + (float('inf'),), values):
+                cumulative += count
+                lines.append((f'{name}_bucket', labels + (('le', _format_value(float(bound))),), cumulative))
+            lines.append((f'{name}_count', labels, cumulative))
+            lines.append((f'{name}_sum', labels, values[-1]))
+        meta = {name: (kind, help) for name, (kind, help, _) in self._meta.items()}
+        for name, kind, help, labels, value in gauges:
+            meta.setdefault(name, (kind, help))
+            families.setdefault(name, []).append((name, tuple(sorted(labels.items())), value))
+
+        output = []
+        for name in sorted(families):
+            kind, help = meta.get(name, ('untyped', name))
+            output.append(f'# HELP {name} {help}')
+            output.append(f'# TYPE {name} {kind}')
+            for sample, labels, value in families[name]:
+                output.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(output) + '\n'
+
+    # Intégration Flask
+
+    def init_app(self, app):
+        if os.environ.get('METRICS_ENABLED', str(app.config.get('METRICS_ENABLED', True))).lower() in ('false', '0', 'no'):
+            return
+        self.token = os.environ.get('METRICS_TOKEN', app.config.get('METRICS_TOKEN')) or None
+        self.multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR', app.config.get('PROMETHEUS_MULTIPROC_DIR')) or None
+        app.extensions['metrics'] = self
+        app.before_request(self._begin)
+        app.after_request(self._record)
+        app.teardown_request(self._end)
+        app.add_url_rule('/metrics', 'metrics', self._view)
+        if self.multiproc_dir and self._flusher is None:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            interval = float(os.environ.get('METRICS_FLUSH_SECONDS', app.config.get('METRICS_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)))
+            self._flusher = threading.Thread(target=self._flush_loop, args=(interval,), name='metrics-flush', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def begin(self):
+        self._shard().in_flight += 1
+        return time.perf_counter()
+
+    def record(self, started, blueprint, endpoint, method, status):
+        # Les URL inconnues partagent une seule série (pas d'explosion du nombre d'étiquettes)
+        labels = (('blueprint', blueprint or ''), ('endpoint', endpoint or 'unmatched'), ('method', method))
+        self.observe('http_request_duration_seconds', time.perf_counter() - started, labels)
+        self.inc('http_requests_total', labels + (('status', str(status)),))
+
+    def end(self):
+        shard = self._shard()
+        if shard.in_flight > 0:
+            shard.in_flight -= 1
+
+    def _begin(self):
+        g.metrics_started = self.begin()
+
+    def _record(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            self.record(started, request.blueprint, request.endpoint, request.method, response.status_code)
+        return response
+
+    def _end(self, exc=None):
+        self.end()
+
+    def _view(self):
+        if self.token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied, f'Bearer {self.token}'):
+                return Response('Accès refusé\n', status=403, content_type=CONTENT_TYPE)
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+# Collecteurs usuels
+
+def pool_samples(name, engine):
+    if engine is None:
+        return []
+    stats = pool_stats(engine)
+    labels = {'pool': name}
+    return [
+        (f'db_pool_{key}', 'gauge', f'Pool de connexions : {key}', labels, stats[key])
+        for key in ('size', 'checked_in', 'checked_out', 'overflow') if key in stats
+    ]
+
+def cache_samples(name, hits, misses):
+    labels = {'cache': name}
+    lookups = hits + misses
+    return [
+        ('cache_hits_total', 'counter', 'Accès au cache servis', labels, hits),
+        ('cache_misses_total', 'counter', 'Accès au cache manqués', labels, misses),
+        ('cache_hit_ratio', 'gauge', 'Taux de succès du cache', labels, hits / lookups if lookups else 0.0),
+    ]
+
+def lru_samples(name, fn):
+    info = fn.cache_info()
+    return cache_samples(name, info.hits, info.misses) + [
+        ('cache_entries', 'gauge', 'Entrées en cache', {'cache': name}, info.currsize)
+    ]
+
+def queue_samples(queue):
+    if queue is None:
+        return []
+    return [
+        ('job_queue_depth', 'gauge', 'Jobs en attente ou en cours', {'kind': kind, 'status': status}, count)
+        for (kind, status), count in queue.depth().items()
+    ]
+
+metrics = Metrics()
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.notification import Notification, NOTIFICATION_TYPES, RECENT_ACTORS_LIMIT
+from src.services.jobs import job_handler, enqueue
+
+@job_handler('notifications.fan_out', batch_size=200)
+def fan_out_job(events):
+    fan_out(events)
+
+def notify(type, actor_id, target_id):
+    if type not in NOTIFICATION_TYPES:
+        raise ValueError(f'Type de notification inconnu : {type}')
+    # La diffusion est faite par un worker, hors du chemin de la requête
+    enqueue('notifications.fan_out', {'type': type, 'actor_id': actor_id, 'target_id': target_id})
+
+def _resolve_recipients(type, target_ids):
+    # Retourne {target_id: [recipient_id, ...]} en une requête par type
+    from src.models.post import Post, PostComment
+    from src.models.prayer import Prayer
+    from src.models.event import Event
+    from src.models.group import GroupMembership
+
+    recipients = {target_id: [] for target_id in target_ids}
+    if type in ('post_liked', 'post_commented'):
+        rows = db.session.query(Post.id, Post.author_id).filter(Post.id.in_(target_ids)).all()
+        for post_id, author_id in rows:
+            recipients[post_id].append(author_id)
+        if type == 'post_commented':
+            # Les autres participants de la discussion sont aussi notifiés
+            rows = db.session.query(PostComment.post_id, PostComment.user_id).filter(
+                PostComment.post_id.in_(target_ids)
+            ).distinct().all()
+            for post_id, user_id in rows:
+                if user_id not in recipients[post_id]:
+                    recipients[post_id].append(user_id)
+    elif type == 'prayer_supported':
+        rows = db.session.query(Prayer.id, Prayer.author_id).filter(Prayer.id.in_(target_ids)).all()
+        for prayer_id, author_id in rows:
+            recipients[prayer_id].append(author_id)
+    elif type == 'event_attended':
+        rows = db.session.query(Event.id, Event.created_by).filter(Event.id.in_(target_ids)).all()
+        for event_id, created_by in rows:
+            recipients[event_id].append(created_by)
+    elif type == 'group_joined':
+        rows = db.session.query(GroupMembership.group_id, GroupMembership.user_id).filter(
+            GroupMembership.group_id.in_(target_ids),
+            GroupMembership.role == 'admin'
+        ).all()
+        for group_id, user_id in rows:
+            recipients[group_id].append(user_id)
+    return recipients
+
+def fan_out(events):
+    # Clé de regroupement (recipient_id, type, target_id) -> acteurs dans l'ordre d'arrivée
+    pending = {}
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event['type'], []).append(event)
+
+    for type, type_events in by_type.items():
+        target_ids = {event['target_id'] for event in type_events}
+        recipients = _resolve_recipients(type, target_ids)
+        for event in type_events:
+            for recipient_id in recipients.get(event['target_id'], []):
+                if recipient_id == event['actor_id']:
+                    continue
+                actors = pending.setdefault((recipient_id, type, event['target_id']), [])
+                if event['actor_id'] in actors:
+                    actors.remove(event['actor_id'])
+                actors.append(event['actor_id'])
+
+    if not pending:
+        return 0
+
+    # Notifications non lues existantes pour ces clés : elles absorbent la rafale
+    existing = {}
+    candidates = Notification.query.filter(
+        Notification.is_read == False,
+        Notification.recipient_id.in_({key[0] for key in pending}),
+        Notification.type.in_({key[1] for key in pending}),
+        Notification.target_id.in_({key[2] for key in pending})
+    ).all()
+    for notification in candidates:
+        key = (notification.recipient_id, notification.type, notification.target_id)
+        if key in pending:
+            existing[key] = notification
+
+    now = datetime.utcnow()
+    new_rows = []
+    for key, actors in pending.items():
+        recipient_id, type, target_id = key
+        notification = existing.get(key)
+        if notification:
+            recent = list(notification.recent_actor_ids or [])
+            fresh = [actor_id for actor_id in actors if actor_id not in recent]
+            notification.actors_count += len(fresh)
+            notification.recent_actor_ids = (
+                [actor_id for actor_id in recent if actor_id not in actors] + actors
+            )[-RECENT_ACTORS_LIMIT:]
+            notification.last_actor_id = actors[-1]
+            notification.updated_at = now
+        else:
+            new_rows.append({
+                'recipient_id': recipient_id,
+                'type': type,
+                'target_type': NOTIFICATION_TYPES[type][0],
+                'target_id': target_id,
+                'actors_count': len(actors),
+                'last_actor_id': actors[-1],
+                'recent_actor_ids': actors[-RECENT_ACTORS_LIMIT:],
+                'is_read': False,
+                'created_at': now,
+                'updated_at': now
+            })
+
+    if new_rows:
+        # Insertion multi-lignes en une seule instruction
+        db.session.execute(insert(Notification), new_rows)
+    db.session.commit()
+    return len(pending)
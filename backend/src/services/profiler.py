@@ -0,0 +1,141 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request
+
+PROFILER_HEADER = 'X-Profiler-Token'
+DEFAULT_INTERVAL_MS = 5.0
+# Piles distinctes conservées par endpoint, au-delà regroupées sous « [autres] »
+DEFAULT_MAX_STACKS = 5000
+
+# Profileur par échantillonnage des requêtes Flask (src/main.py et app.py).
+# Une requête est profilée si elle porte l'en-tête X-Profiler-Token valide ou si
+# elle est tirée au sort (PROFILER_SAMPLE_RATE). Un thread relève alors toutes
+# les PROFILER_INTERVAL_MS la pile des threads profilés, sans rien instrumenter :
+# il dort tant qu'aucune requête profilée n'est en cours, et sans jeton ni taux
+# aucun hook n'est installé.
+class SamplingProfiler:
+    def __init__(self):
+        self.token = None
+        self.sample_rate = 0.0
+        self.interval = DEFAULT_INTERVAL_MS / 1000
+        self.max_stacks = DEFAULT_MAX_STACKS
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = {}
+        self._stacks = {}
+        self._requests = Counter()
+        self._samples = Counter()
+        self._labels = {}
+        self._thread = None
+
+    def init_app(self, app):
+        self.token = os.environ.get('PROFILER_TOKEN', app.config.get('PROFILER_TOKEN')) or None
+        self.sample_rate = float(os.environ.get('PROFILER_SAMPLE_RATE', app.config.get('PROFILER_SAMPLE_RATE', 0.0)))
+        self.interval = float(os.environ.get('PROFILER_INTERVAL_MS', app.config.get('PROFILER_INTERVAL_MS', DEFAULT_INTERVAL_MS))) / 1000
+        self.max_stacks = int(os.environ.get('PROFILER_MAX_STACKS', app.config.get('PROFILER_MAX_STACKS', DEFAULT_MAX_STACKS)))
+        app.extensions['profiler'] = self
+        if self.token or self.sample_rate > 0:
+            app.before_request(self._begin)
+            app.teardown_request(self._end)
+
+    def authorized(self, req):
+        supplied = req.headers.get(PROFILER_HEADER)
+        return bool(self.token and supplied) and hmac.compare_digest(supplied, self.token)
+
+    def _begin(self):
+        if not (self.sample_rate > 0 and random.random() < self.sample_rate) and not self.authorized(request):
+            return
+        endpoint = request.endpoint or 'unknown'
+        with self._lock:
+            self._active[threading.get_ident()] = endpoint
+            self._requests[endpoint] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+                self._thread.start()
+            self._wake.set()
+
+    def _end(self, exc=None):
+        if self._active:
+            with self._lock:
+                self._active.pop(threading.get_ident(), None)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self._labels[code] = f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+        return label
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ';'.join(labels)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                targets = list(self._active.items())
+            frames = sys._current_frames()
+            samples = [(endpoint, self._collapse(frames[ident])) for ident, endpoint in targets if ident in frames]
+            del frames
+            with self._lock:
+                for endpoint, stack in samples:
+                    stacks = self._stacks.setdefault(endpoint, Counter())
+                    if stack not in stacks and len(stacks) >= self.max_stacks:
+                        stack = '[autres]'
+                    stacks[stack] += 1
+                    self._samples[endpoint] += 1
+
+    def summary(self, top=5):
+        with self._lock:
+            result = []
+            for endpoint, count in self._requests.most_common():
+                leaves = Counter()
+                for stack, samples in self._stacks.get(endpoint, {}).items():
+                    leaves[stack.rsplit(';', 1)[-1]] += samples
+                result.append({
+                    'endpoint': endpoint,
+                    'requests': count,
+                    'samples': self._samples[endpoint],
+                    'sampled_ms': round(self._samples[endpoint] * self.interval * 1000, 1),
+                    'top_frames': [{'frame': frame, 'samples': samples} for frame, samples in leaves.most_common(top)]
+                })
+            return {
+                'interval_ms': self.interval * 1000,
+                'sample_rate': self.sample_rate,
+                'active': len(self._active),
+                'endpoints': result
+            }
+
+    def collapsed(self, endpoint=None):
+        # Format « pile;repliée nombre » de flamegraph.pl / speedscope ; sans endpoint,
+        # toutes les piles sous une racine par endpoint
+        with self._lock:
+            endpoints = [endpoint] if endpoint else sorted(self._stacks)
+            lines = []
+            for name in endpoints:
+                for stack, samples in sorted(self._stacks.get(name, {}).items()):
+                    lines.append(f'{stack if endpoint else name + ";" + stack} {samples}')
+            return '\n'.join(lines) + '\n' if lines else ''
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+            self._samples.clear()
+
+profiler = SamplingProfiler()
@@ -0,0 +1,186 @@
+import logging
+import os
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, delete, update, func
+
+from src.models.user import db, User, InvitationCode
+from src.models.post import Post, PostLike, PostComment
+from src.models.prayer import Prayer, PrayerSupport
+from src.models.event import Event, EventAttendance
+from src.models.group import Group, GroupMembership
+from src.models.message import Message
+from src.models.notification import Notification
+from src.models.media import Media
+from src.models.archive import ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedMessage
+from src.services.jobs import job_handler, enqueue
+from src.services import trending
+from src.services import export
+from src.services import sync
+from src.services import visibility
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PURGE_CHUNK = 1000
+
+# Une étape supprime (ou détache) par lots les lignes de `model` vérifiant
+# `condition`, chaque lot dans sa propre transaction. `recount` donne, pour une
+# colonne des lignes supprimées, la fonction qui recalcule les compteurs des
+# lignes parentes concernées dans la même transaction.
+class Step:
+    def __init__(self, model, condition, recount=None, nullify=None):
+        self.model = model
+        self.condition = condition
+        self.recount = recount or {}
+        self.nullify = nullify
+
+    def run_chunk(self, chunk_size):
+        ids = db.session.execute(
+            select(self.model.id).where(self.condition).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return 0
+        affected = {}
+        for column, fn in self.recount.items():
+            affected[fn] = db.session.execute(
+                select(column).where(self.model.id.in_(ids), column.isnot(None)).distinct()
+            ).scalars().all()
+        if self.nullify is not None:
+            db.session.execute(update(self.model).where(self.model.id.in_(ids)).values({self.nullify: None}))
+        else:
+            sync.record_deleted(self.model, ids)
+            visibility.bulk_deleted(self.model, ids)
+            db.session.execute(delete(self.model).where(self.model.id.in_(ids)))
+        for fn, parent_ids in affected.items():
+            if parent_ids:
+                fn(parent_ids)
+        db.session.commit()
+        return len(ids)
+
+def recount_supports(prayer_ids):
+    count = select(func.count(PrayerSupport.id)).where(PrayerSupport.prayer_id == Prayer.id).scalar_subquery()
+    db.session.execute(update(Prayer).where(Prayer.id.in_(prayer_ids)).values(supports_count=count))
+
+def recount_replies(model):
+    def recount(comment_ids):
+        replies = model.__table__.alias('replies')
+        count = select(func.count(replies.c.id)).where(replies.c.parent_id == model.id).scalar_subquery()
+        db.session.execute(update(model).where(model.id.in_(comment_ids)).values(replies_count=count))
+    return recount
+
+# Plans de suppression : étapes ordonnées des feuilles vers la racine
+
+def _post_steps(post_model, like_model, comment_model, posts):
+    post_ids = select(post_model.id).where(posts)
+    return [
+        Step(like_model, like_model.post_id.in_(post_ids)),
+        # Réponses avant les commentaires de premier niveau (clé étrangère parent_id)
+        Step(comment_model, comment_model.post_id.in_(post_ids) & comment_model.parent_id.isnot(None)),
+        Step(comment_model, comment_model.post_id.in_(post_ids)),
+        Step(post_model, posts),
+    ]
+
+def event_plan(event_id):
+    return [
+        Step(EventAttendance, EventAttendance.event_id == event_id),
+        Step(Event, Event.id == event_id),
+    ]
+
+def _group_steps(groups):
+    group_ids = select(Group.id).where(groups)
+    return [
+        *_post_steps(Post, PostLike, PostComment, Post.group_id.in_(group_ids)),
+        *_post_steps(ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedPost.group_id.in_(group_ids)),
+        Step(GroupMembership, GroupMembership.group_id.in_(group_ids)),
+        Step(Group, groups),
+    ]
+
+def group_plan(group_id):
+    return _group_steps(Group.id == group_id)
+
+def user_plan(user_id):
+    own_comments = select(PostComment.id).where(PostComment.user_id == user_id)
+    own_archived_comments = select(ArchivedPostComment.id).where(ArchivedPostComment.user_id == user_id)
+    return [
+        # Interactions sur les contenus des autres : compteurs et scores recalculés
+        Step(PostLike, PostLike.user_id == user_id, recount={PostLike.post_id: trending.recompute}),
+        Step(PostComment, PostComment.parent_id.in_(own_comments), recount={PostComment.post_id: trending.recompute}),
+        Step(PostComment, PostComment.user_id == user_id, recount={
+            PostComment.post_id: trending.recompute,
+            PostComment.parent_id: recount_replies(PostComment)
+        }),
+        Step(PrayerSupport, PrayerSupport.user_id == user_id, recount={PrayerSupport.prayer_id: recount_supports}),
+        Step(EventAttendance, EventAttendance.user_id == user_id),
+        Step(GroupMembership, GroupMembership.user_id == user_id),
+        Step(ArchivedPostLike, ArchivedPostLike.user_id == user_id),
+        Step(ArchivedPostComment, ArchivedPostComment.parent_id.in_(own_archived_comments)),
+        Step(ArchivedPostComment, ArchivedPostComment.user_id == user_id, recount={
+            ArchivedPostComment.parent_id: recount_replies(ArchivedPostComment)
+        }),
+        # Contenus de l'utilisateur ; ses groupes encore à son nom (sans
+        # successeur, ou déjà en cours de suppression) partent avant lui
+        *_group_steps(Group.created_by == user_id),
+        *_post_steps(Post, PostLike, PostComment, Post.author_id == user_id),
+        *_post_steps(ArchivedPost, ArchivedPostLike, ArchivedPostComment, ArchivedPost.author_id == user_id),
+        Step(PrayerSupport, PrayerSupport.prayer_id.in_(select(Prayer.id).where(Prayer.author_id == user_id))),
+        Step(Prayer, Prayer.author_id == user_id),
+        Step(EventAttendance, EventAttendance.event_id.in_(select(Event.id).where(Event.created_by == user_id))),
+        Step(Event, Event.created_by == user_id),
+        Step(Message, (Message.sender_id == user_id) | (Message.receiver_id == user_id)),
+        Step(ArchivedMessage, (ArchivedMessage.sender_id == user_id) | (ArchivedMessage.receiver_id == user_id)),
+        Step(Notification, Notification.recipient_id == user_id),
+        # Références conservées, détachées de l'utilisateur
+        Step(Notification, Notification.last_actor_id == user_id, nullify='last_actor_id'),
+        Step(Media, Media.uploaded_by == user_id, nullify='uploaded_by'),
+        Step(InvitationCode, InvitationCode.used_by == user_id, nullify='used_by'),
+        Step(User, User.id == user_id),
+    ]
+
+def hand_over_groups(user_id):
+    # Les groupes créés par l'utilisateur passent au plus ancien administrateur
+    # (à défaut au plus ancien membre) ; les groupes sans autre membre sont
+    # masqués, puis supprimés par le plan de l'utilisateur
+    orphaned = []
+    for group in Group.query.filter_by(created_by=user_id, deleted_at=None):
+        successor = db.session.query(GroupMembership.user_id).filter(
+            GroupMembership.group_id == group.id,
+            GroupMembership.user_id != user_id
+        ).order_by((GroupMembership.role == 'admin').desc(), GroupMembership.joined_at, GroupMembership.id).first()
+        if successor:
+            group.created_by = successor[0]
+        else:
+            group.deleted_at = datetime.utcnow()
+            orphaned.append(group.id)
+    db.session.commit()
+    return orphaned
+
+PLANS = {
+    'user': user_plan,
+    'group': group_plan,
+    'event': event_plan,
+}
+
+def run_plan(steps, chunk_size):
+    total = 0
+    for step in steps:
+        while True:
+            count = step.run_chunk(chunk_size)
+            total += count
+            if count < chunk_size:
+                break
+    return total
+
+@job_handler('purge.run')
+def purge_job(payload):
+    kind, target_id = payload['kind'], payload['id']
+    chunk_size = int(os.environ.get('PURGE_CHUNK_SIZE', current_app.config.get('PURGE_CHUNK_SIZE', DEFAULT_PURGE_CHUNK)))
+    if kind == 'user':
+        hand_over_groups(target_id)
+        export.remove_exports(target_id)
+    # Rejouable : une reprise après échec recommence simplement les étapes restantes
+    removed = run_plan(PLANS[kind](target_id), chunk_size)
+    logger.info('Suppression %s %s : %d lignes', kind, target_id, removed)
+
+def schedule(kind, target_id):
+    return enqueue('purge.run', {'kind': kind, 'id': target_id}, dedupe_key=f'purge:{kind}:{target_id}')
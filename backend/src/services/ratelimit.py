@@ -0,0 +1,168 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import request, session, jsonify
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Limites par défaut : clé = endpoint (« blueprint.vue ») ou blueprint seul,
+# valeur = liste de « portée:N/période ». La portée « user » retombe sur l'IP
+# pour les requêtes anonymes.
+DEFAULT_LIMITS = {
+    'auth.login': ['ip:10/minute', 'ip:100/hour'],
+    'auth.register': ['ip:5/hour'],
+    'auth.generate_invitation': ['user:20/hour'],
+    'auth.generate_invitations_batch': ['user:10/hour'],
+    'posts.create_post': ['user:30/minute'],
+    'posts.add_comment': ['user:60/minute'],
+}
+
+class Limit:
+    __slots__ = ('scope', 'capacity', 'period', 'rate', 'spec')
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = float(capacity)
+        self.period = period
+        self.rate = capacity / period  # jetons rechargés par seconde
+        self.spec = f'{scope}:{capacity}/{period}'
+
+def parse_limit(spec):
+    scope, _, quota = spec.partition(':')
+    count, _, period = quota.partition('/')
+    if scope not in ('ip', 'user') or period not in PERIODS:
+        raise ValueError(f'Limite invalide : {spec}')
+    return Limit(scope, int(count), PERIODS[period])
+
+def _refill(tokens, updated, now, limit):
+    return min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+# Seaux à jetons en mémoire du processus, verrous répartis pour limiter la contention
+class MemoryBackend:
+    def __init__(self, stripes=16, max_keys=100000):
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._buckets = {}
+        self._max_keys = max_keys
+        self._next_sweep = 0.0
+
+    def consume(self, key, limit, now):
+        with self._stripes[hash(key) % len(self._stripes)]:
+            bucket = self._buckets.get(key)
+            tokens = limit.capacity if bucket is None else _refill(bucket[0], bucket[1], now, limit)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / limit.rate
+        if len(self._buckets) > self._max_keys and now >= self._next_sweep:
+            self._next_sweep = now + 60
+            self._evict(now)
+        return allowed, retry_after
+
+    def _evict(self, now):
+        # Un seau inactif depuis un jour est plein pour toute période <= 1 jour
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if now - updated > 86400:
+                self._buckets.pop(key, None)
+
+# Seaux partagés entre processus (gunicorn multi-workers) dans un fichier SQLite
+class SQLiteBackend:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, limit, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens = limit.capacity if row is None else _refill(row[0], row[1], now, limit)
+            if tokens >= 1:
+                tokens -= 1
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (1 - tokens) / limit.rate
+            conn.execute('INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)', (key, tokens, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+class RateLimiter:
+    def __init__(self, app=None):
+        self.backend = None
+        self._rules = {}
+        self._by_endpoint = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        enabled = os.environ.get('RATELIMIT_ENABLED', str(app.config.get('RATELIMIT_ENABLED', True)))
+        if enabled.lower() in ('false', '0', 'no'):
+            return
+        storage = os.environ.get('RATELIMIT_STORAGE', app.config.get('RATELIMIT_STORAGE', 'memory'))
+        if storage.startswith('sqlite:///'):
+            self.backend = SQLiteBackend(storage[len('sqlite:///'):])
+        else:
+            self.backend = MemoryBackend()
+        limits = app.config.get('RATELIMITS', DEFAULT_LIMITS)
+        # Analyse des limites une seule fois, au démarrage
+        self._rules = {target: [parse_limit(spec) for spec in specs] for target, specs in limits.items()}
+        self._by_endpoint = {}
+        app.extensions['ratelimit'] = self
+        app.before_request(self._check)
+
+    def _limits_for(self, endpoint):
+        limits = self._by_endpoint.get(endpoint)
+        if limits is None:
+            blueprint = endpoint.rpartition('.')[0]
+            limits = self._rules.get(endpoint) or self._rules.get(blueprint) or ()
+            self._by_endpoint[endpoint] = limits
+        return limits
+
+    def hit(self, endpoint, user_id, remote_addr, now=None):
+        # Attente en secondes avant le prochain essai, 0 si la requête passe
+        limits = self._limits_for(endpoint)
+        if not limits:
+            return 0.0
+        now = now or time.time()
+        retry_after = 0.0
+        for limit in limits:
+            if limit.scope == 'user' and user_id:
+                subject = f'u{user_id}'
+            else:
+                # Derrière un proxy, configurer ProxyFix pour que remote_addr soit fiable
+                subject = f'i{remote_addr}'
+            allowed, wait = self.backend.consume(f'{endpoint}|{limit.spec}|{subject}', limit, now)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+        return retry_after
+
+    def _check(self):
+        if request.endpoint is None or request.method == 'OPTIONS':
+            return None
+        retry_after = self.hit(request.endpoint, session.get('user_id'), request.remote_addr)
+        if retry_after:
+            response = jsonify({'error': 'Trop de requêtes, réessayez plus tard'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            return response
+        return None
+
+limiter = RateLimiter()
@@ -0,0 +1,244 @@
+import math
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from src.models.post import Post
+from src.models.archive import ArchivedPost
+from src.models.prayer import Prayer
+from src.models.event import Event
+from src.models.group import Group
+from src.services import viewer
+from src.services import visibility
+from src.services.fields import (
+    POST_FIELDS, ARCHIVED_POST_FIELDS, PRAYER_FIELDS, EVENT_FIELDS, GROUP_FIELDS,
+    InvalidFields, parse_fields, serialize
+)
+
+# Lectures des publications, prières, événements et groupes, communes aux vues
+# Flask et au mode ASGI (exécutées via AsyncSession.run_sync) : mêmes requêtes,
+# mêmes contrôles de visibilité, même sérialisation. Chaque lecture reçoit la
+# session, l'utilisateur et les paramètres de la requête et renvoie
+# (corps, statut).
+
+NOT_FOUND = {'error': 'Ressource introuvable'}, 404
+FORBIDDEN = {'error': 'Accès refusé'}, 403
+
+def arg_int(args, name, default=None):
+    try:
+        return int(args[name])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+def arg_bool(args, name):
+    return str(args.get(name, 'false')).lower() == 'true'
+
+def fieldset(args, spec):
+    return parse_fields(args.get('fields'), spec)
+
+def select_fields(model, fieldset):
+    query = select(model)
+    return query.options(*fieldset.options) if fieldset else query
+
+def paginate(session, query, page, per_page):
+    # Mêmes règles que paginate(error_out=False) de Flask-SQLAlchemy
+    page = page if page > 0 else 1
+    per_page = per_page if per_page > 0 else 20
+    total = session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    items = session.scalars(query.limit(per_page).offset((page - 1) * per_page)).all()
+    return items, total, math.ceil(total / per_page) if total else 0
+
+def page_args(args):
+    return arg_int(args, 'page', 1), arg_int(args, 'per_page', 10)
+
+# Publications
+
+def feed_flags(session, payload, user_id, args):
+    return dict(payload, posts=viewer.with_post_flags(payload['posts'], user_id, fieldset(args, POST_FIELDS), session))
+
+def list_posts(session, user_id, args, flags=True):
+    try:
+        fields = fieldset(args, POST_FIELDS)
+        archived_fields = fieldset(args, ARCHIVED_POST_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+    page, per_page = page_args(args)
+    group_id = arg_int(args, 'group_id')
+
+    if group_id and not visibility.can_see_group_id(user_id, group_id, session):
+        return FORBIDDEN
+
+    query = select_fields(Post, fields).where(visibility.posts(user_id))
+    if group_id:
+        query = query.where(Post.group_id == group_id)
+    posts, total, pages = paginate(session, query.order_by(Post.created_at.desc()), page, per_page)
+    items = [serialize(post, fields) for post in posts]
+
+    if arg_bool(args, 'include_archived'):
+        # Historique : les publications archivées, toutes plus anciennes,
+        # suivent celles de la table chaude
+        archived_query = select_fields(ArchivedPost, archived_fields).where(visibility.posts(user_id, ArchivedPost))
+        if group_id:
+            archived_query = archived_query.where(ArchivedPost.group_id == group_id)
+        per_page = per_page if per_page > 0 else 20
+        remaining = per_page - len(items)
+        if remaining > 0:
+            offset = max((max(page, 1) - 1) * per_page - total, 0)
+            archived = session.scalars(
+                archived_query.order_by(ArchivedPost.created_at.desc()).offset(offset).limit(remaining)
+            ).all()
+            items += [serialize(post, archived_fields) for post in archived]
+        total += session.scalar(select(func.count()).select_from(archived_query.subquery()))
+        pages = math.ceil(total / per_page)
+
+    payload = {'posts': items, 'total': total, 'pages': pages, 'current_page': page}
+    return (feed_flags(session, payload, user_id, args) if flags else payload), 200
+
+def get_post(session, user_id, args, post_id):
+    try:
+        fields = fieldset(args, POST_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+
+    post = session.get(Post, post_id, options=fields.options if fields else ())
+    if post is None:
+        # Publication éventuellement archivée
+        try:
+            fields = fieldset(args, ARCHIVED_POST_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+        post = session.get(ArchivedPost, post_id, options=fields.options if fields else ())
+        if post is None:
+            return NOT_FOUND
+
+    if not visibility.can_see_post(user_id, post, session):
+        return FORBIDDEN
+    return {'post': viewer.with_flags(post.__tablename__, [serialize(post, fields)], user_id, fields, session)[0]}, 200
+
+# Prières
+
+def list_prayers(session, user_id, args):
+    try:
+        fields = fieldset(args, PRAYER_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+    page, per_page = page_args(args)
+
+    query = select_fields(Prayer, fields)
+    if arg_bool(args, 'my_prayers'):
+        query = query.where(Prayer.author_id == user_id)
+    else:
+        # Prières publiques ou celles de l'utilisateur
+        query = query.where(visibility.prayers(user_id))
+
+    status = args.get('status')
+    if status:
+        query = query.where(Prayer.status == status)
+
+    prayers, total, pages = paginate(session, query.order_by(Prayer.created_at.desc()), page, per_page)
+    return {
+        'prayers': viewer.with_flags('prayer', [serialize(prayer, fields) for prayer in prayers], user_id, fields, session),
+        'total': total,
+        'pages': pages,
+        'current_page': page
+    }, 200
+
+def get_prayer(session, user_id, args, prayer_id):
+    try:
+        fields = fieldset(args, PRAYER_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+
+    prayer = session.get(Prayer, prayer_id, options=fields.options if fields else ())
+    if prayer is None:
+        return NOT_FOUND
+    if not visibility.can_see_prayer(user_id, prayer):
+        return FORBIDDEN
+    return {'prayer': viewer.with_flags('prayer', [serialize(prayer, fields)], user_id, fields, session)[0]}, 200
+
+# Événements
+
+def event_flags(session, payload, user_id, args):
+    return dict(payload, events=viewer.with_flags('event', payload['events'], user_id, fieldset(args, EVENT_FIELDS), session))
+
+def list_events(session, user_id, args, flags=True):
+    try:
+        fields = fieldset(args, EVENT_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+    page, per_page = page_args(args)
+
+    query = select_fields(Event, fields).where(Event.deleted_at.is_(None))
+    if arg_bool(args, 'my_events'):
+        # Événements créés par l'utilisateur ou auxquels il participe
+        query = query.where(visibility.my_events(user_id))
+    else:
+        # Événements publics seulement
+        query = query.where(Event.is_public == True)
+
+    if arg_bool(args, 'upcoming'):
+        query = query.where(Event.start_date >= datetime.utcnow())
+
+    events, total, pages = paginate(session, query.order_by(Event.start_date.asc()), page, per_page)
+    payload = {
+        'events': [serialize(event, fields) for event in events],
+        'total': total,
+        'pages': pages,
+        'current_page': page
+    }
+    return (event_flags(session, payload, user_id, args) if flags else payload), 200
+
+def get_event(session, user_id, args, event_id):
+    try:
+        fields = fieldset(args, EVENT_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+
+    event = session.scalars(
+        select_fields(Event, fields).where(Event.id == event_id, Event.deleted_at.is_(None))
+    ).first()
+    if event is None:
+        return NOT_FOUND
+    if not visibility.can_see_event(user_id, event, session):
+        return FORBIDDEN
+    return {'event': viewer.with_flags('event', [serialize(event, fields)], user_id, fields, session)[0]}, 200
+
+# Groupes
+
+def list_groups(session, user_id, args):
+    try:
+        fields = fieldset(args, GROUP_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+    page, per_page = page_args(args)
+
+    if arg_bool(args, 'my_groups'):
+        # Groupes dont l'utilisateur est membre
+        query = select_fields(Group, fields).where(visibility.my_groups(user_id))
+    else:
+        # Tous les groupes publics
+        query = select_fields(Group, fields).where(Group.is_private == False)
+    query = query.where(Group.deleted_at.is_(None))
+
+    groups, total, pages = paginate(session, query.order_by(Group.created_at.desc()), page, per_page)
+    return {
+        'groups': viewer.with_flags('group', [serialize(group, fields) for group in groups], user_id, fields, session),
+        'total': total,
+        'pages': pages,
+        'current_page': page
+    }, 200
+
+def get_group(session, user_id, args, group_id):
+    try:
+        fields = fieldset(args, GROUP_FIELDS)
+    except InvalidFields as e:
+        return {'error': str(e)}, 400
+
+    group = session.scalars(
+        select_fields(Group, fields).where(Group.id == group_id, Group.deleted_at.is_(None))
+    ).first()
+    if group is None:
+        return NOT_FOUND
+    if not visibility.can_see_group(user_id, group, session):
+        return FORBIDDEN
+    return {'group': viewer.with_flags('group', [serialize(group, fields)], user_id, fields, session)[0]}, 200
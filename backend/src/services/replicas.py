@@ -0,0 +1,126 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+
+from src.services.database import engine_options
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Retard de réplication en secondes (None sur un primaire ou hors Postgres)
+LAG_QUERIES = {
+    'postgresql': 'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())',
+}
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag = 0.0
+        self.error = None
+
+    def to_dict(self):
+        return {'name': self.name, 'healthy': self.healthy, 'lag': self.lag, 'error': self.error}
+
+# Aiguillage des requêtes GET vers les réplicas en lecture. Les écritures, les
+# requêtes hors contexte HTTP (jobs) et les utilisateurs ayant écrit récemment
+# restent sur le primaire.
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = []
+        self.sticky_window = 5.0
+        self.max_lag = 10.0
+        self.check_interval = 5.0
+        self._cycle = None
+        self._thread = None
+
+    def init_app(self, app):
+        urls = os.environ.get('DATABASE_REPLICA_URLS', app.config.get('DATABASE_REPLICA_URLS', ''))
+        urls = [url.strip() for url in urls.split(',') if url.strip()]
+        self.sticky_window = float(app.config.get('DATABASE_STICKY_SECONDS', self.sticky_window))
+        self.max_lag = float(app.config.get('DATABASE_REPLICA_MAX_LAG', self.max_lag))
+        self.check_interval = float(app.config.get('DATABASE_REPLICA_CHECK_INTERVAL', self.check_interval))
+        self.replicas = []
+        for index, url in enumerate(urls):
+            if url.startswith('postgres://'):
+                url = url.replace('postgres://', 'postgresql://', 1)
+            self.replicas.append(Replica(f'replica-{index}', create_engine(url, **dict(engine_options(url), pool_pre_ping=True))))
+        self._cycle = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        app.extensions['replicas'] = self
+        if self.replicas:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            self.check()
+            self._thread = threading.Thread(target=self._monitor, name='replica-health', daemon=True)
+            self._thread.start()
+
+    def check(self):
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                    query = LAG_QUERIES.get(replica.engine.dialect.name)
+                    lag = conn.execute(text(query)).scalar() if query else None
+                replica.lag = float(lag) if lag is not None else 0.0
+                replica.healthy = replica.lag <= self.max_lag
+                replica.error = None if replica.healthy else 'retard de réplication'
+            except Exception as e:
+                replica.healthy = False
+                replica.error = str(e)
+                logger.warning('Réplica %s indisponible : %s', replica.name, e)
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.check()
+
+    def pick(self):
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._cycle)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def _before_request(self):
+        g.db_replica = None
+        if request.method not in SAFE_METHODS:
+            return
+        # Lecture de ses propres écritures : fenêtre collante vers le primaire
+        if session.get('primary_until', 0) > time.time():
+            return
+        g.db_replica = self.pick()
+
+    def _after_request(self, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and self.sticky_window:
+            session['primary_until'] = time.time() + self.sticky_window
+        return response
+
+    def read_engine(self):
+        replica = g.get('db_replica')
+        return replica.engine if replica else None
+
+    def status(self):
+        return [replica.to_dict() for replica in self.replicas]
+
+router = ReplicaRouter()
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if router.replicas and has_request_context():
+            # Les flush (écritures) vont au primaire, ainsi que toutes les
+            # lectures qui suivent dans la même requête
+            if self._flushing:
+                g.db_replica = None
+            elif bind is None:
+                engine = router.read_engine()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,56 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Remplissage des colonnes ajoutées à une table existante
+BACKFILLS = {
+    ('prayer', 'supports_count'): (
+        'UPDATE prayer SET supports_count = '
+        '(SELECT COUNT(*) FROM prayer_support WHERE prayer_support.prayer_id = prayer.id)'
+    ),
+    ('group_membership', 'updated_at'): 'UPDATE group_membership SET updated_at = joined_at',
+}
+
+def upgrade():
+    # db.create_all() ne crée que les tables manquantes : on ajoute ici les
+    # colonnes et index déclarés depuis sur les tables déjà présentes
+    engine = db.engine
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    # Impossible sans valeur par défaut côté base : à migrer à la main
+                    logger.warning('Colonne %s.%s absente et non ajoutable', table.name, column.name)
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}'))
+                added.append((table.name, column.name))
+                logger.info('Colonne ajoutée : %s.%s', table.name, column.name)
+        for table_column in added:
+            if table_column in BACKFILLS:
+                conn.execute(text(BACKFILLS[table_column]))
+    # Colonnes relues après les ajouts : un index portant sur une colonne restée
+    # absente est ignoré, comme la colonne
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            missing = [column.name for column in index.columns if column.name not in existing]
+            if missing:
+                logger.warning('Index %s non créé : colonnes absentes (%s)', index.name, ', '.join(missing))
+                continue
+            index.create(engine, checkfirst=True)
+    return added
@@ -0,0 +1,116 @@
+import os
+import threading
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+DEFAULT_TIMEOUT = 10.0
+
+class FlightTimeout(Exception):
+    pass
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+# Regroupement des calculs identiques simultanés : le premier appelant d'une
+# clé calcule, les suivants attendent son résultat (ou son exception) au lieu
+# de refaire le même travail. Rien n'est conservé une fois le calcul terminé.
+class SingleFlight:
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'leaders': 0, 'followers': 0, 'timeouts': 0, 'errors': 0}
+
+    def init_app(self, app):
+        enabled = os.environ.get('SINGLEFLIGHT_ENABLED', str(app.config.get('SINGLEFLIGHT_ENABLED', True)))
+        self.enabled = enabled.lower() not in ('false', '0', 'no')
+        self.timeout = float(os.environ.get('SINGLEFLIGHT_TIMEOUT', app.config.get('SINGLEFLIGHT_TIMEOUT', self.timeout)))
+        app.extensions['singleflight'] = self
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['leaders'] += 1
+            else:
+                call.followers += 1
+                self.stats['followers'] += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout if timeout is None else timeout):
+                self.stats['timeouts'] += 1
+                raise FlightTimeout(key)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            self.stats['errors'] += 1
+            raise
+        finally:
+            # Retrait avant le réveil : un appel arrivant ensuite recalcule
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        return len(self._calls)
+
+flights = SingleFlight()
+
+def _freeze(response, parse_json=False):
+    # Corps et en-têtes de la vue, avant les hooks after_request (cookies de
+    # session, CORS...) qui restent propres à chaque requête. Les réponses JSON
+    # à personnaliser sont gardées décodées.
+    response = current_app.make_response(response)
+    if parse_json and response.status_code == 200 and response.is_json:
+        return response.get_json(), response.status_code, None
+    return response.get_data(), response.status_code, [
+        (name, value) for name, value in response.headers.items() if name.lower() != 'set-cookie'
+    ]
+
+def _thaw(frozen, per_viewer):
+    body, status, headers = frozen
+    if headers is None:
+        # Réponse commune + indicateurs propres à l'utilisateur (ne doit pas modifier body)
+        return jsonify(per_viewer(body)), status
+    return current_app.response_class(body, status=status, headers=headers)
+
+def coalesce(visibility, per_viewer=None):
+    # visibility() renvoie la classe de visibilité de l'appelant (mêmes données
+    # visibles => même réponse), ou None pour exécuter la vue sans regroupement.
+    # per_viewer(payload) complète ensuite la réponse JSON commune pour chaque
+    # appelant ; la vue ne doit donc rien calculer de propre à l'utilisateur.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scope = visibility() if flights.enabled else None
+            if scope is None:
+                if per_viewer is None:
+                    return view(*args, **kwargs)
+                return _thaw(_freeze(view(*args, **kwargs), parse_json=True), per_viewer)
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                scope
+            )
+            try:
+                frozen = flights.do(key, lambda: _freeze(view(*args, **kwargs), parse_json=per_viewer is not None))
+            except FlightTimeout:
+                return jsonify({'error': 'Service momentanément surchargé, réessayez'}), 503, {'Retry-After': '1'}
+            return _thaw(frozen, per_viewer)
+        return wrapper
+    return decorator
@@ -0,0 +1,241 @@
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, delete, exists, insert, inspect, select, true, update
+
+from src.models.user import db
+from src.models.job import Job
+from src.models.post import Post, PostComment
+from src.models.prayer import Prayer
+from src.models.event import Event
+from src.models.group import Group, GroupMembership
+from src.models.tombstone import Tombstone
+from src.services.jobs import job_handler, enqueue
+from src.services import visibility
+from src.services import viewer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_CHUNK = 500
+# Marge avant l'horloge : une transaction commitée après coup avec un
+# updated_at antérieur est encore vue à la synchronisation suivante
+DEFAULT_SETTLE_SECONDS = 5
+DEFAULT_TOMBSTONE_DAYS = 30
+PRUNE_INTERVAL = 24 * 3600
+
+def _config(name, default):
+    return type(default)(os.environ.get(name, current_app.config.get(name, default)))
+
+class InvalidToken(Exception):
+    pass
+
+class ExpiredToken(Exception):
+    pass
+
+class ResyncRequired(Exception):
+    pass
+
+# Table synchronisée : `visible(user_id)` dit si une ligne modifiée est envoyée
+# à l'utilisateur ou signalée comme retirée ; `owner` restreint la table (et
+# ses suppressions) aux lignes de l'utilisateur ; `parent` est gardé dans
+# leurs traces de suppression.
+class SyncedTable:
+    def __init__(self, name, model, visible, owner=None, flags=None, parent=None):
+        self.name = name
+        self.model = model
+        self.visible = visible
+        self.owner = owner
+        self.flags = flags
+        self.parent = parent
+
+def _comments_visible(user_id):
+    return exists().where(Post.id == PostComment.post_id, visibility.posts(user_id))
+
+# Parents avant enfants : un commentaire arrive après sa publication
+TABLES = [
+    SyncedTable('groups', Group, lambda user_id: visibility.groups(user_id) & Group.deleted_at.is_(None), flags='group'),
+    SyncedTable('memberships', GroupMembership, lambda user_id: true(), owner='user_id', parent='group_id'),
+    SyncedTable('posts', Post, visibility.posts, flags='post'),
+    SyncedTable('comments', PostComment, _comments_visible),
+    SyncedTable('prayers', Prayer, visibility.prayers, flags='prayer'),
+    SyncedTable('events', Event, lambda user_id: visibility.events(user_id) & Event.deleted_at.is_(None), flags='event'),
+]
+BY_MODEL = {table.model: table for table in TABLES}
+
+# Jeton opaque : instant de l'émission, première synchronisation encore en
+# cours ou non, et par table (et pour les suppressions) position (horodatage,
+# id) de la dernière ligne envoyée
+def encode_token(at, initial, marks):
+    raw = json.dumps({
+        'at': at.isoformat(),
+        'initial': initial,
+        'marks': {name: [when.isoformat(), last_id] for name, (when, last_id) in marks.items()}
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_token(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        at = datetime.fromisoformat(data['at'])
+        initial = bool(data.get('initial'))
+        marks = {name: (datetime.fromisoformat(when), int(last_id)) for name, (when, last_id) in data['marks'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise InvalidToken()
+    return at, initial, marks
+
+def _page(query, model, stamp, mark, horizon, limit):
+    # Lignes suivant `mark` dans l'ordre de l'index (stamp, id), avant l'horizon
+    column = getattr(model, stamp)
+    query = query.where(column < horizon)
+    if mark:
+        when, last_id = mark
+        query = query.where((column > when) | ((column == when) & (model.id > last_id)))
+    rows = db.session.execute(query.order_by(column, model.id).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (getattr(rows[-1][0], stamp), rows[-1][0].id), True
+    # Table épuisée : reprise à l'horizon
+    return rows, (horizon, 0), False
+
+def changes(user_id, since=None, limit=None):
+    chunk = _config('SYNC_CHUNK_SIZE', DEFAULT_SYNC_CHUNK)
+    limit = min(limit, chunk) if limit and limit > 0 else chunk
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=_config('SYNC_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS))
+    if since:
+        at, initial, marks = decode_token(since)
+        # Suppressions plus anciennes déjà purgées : le client doit tout recharger
+        if at < now - timedelta(days=_config('SYNC_TOMBSTONE_DAYS', DEFAULT_TOMBSTONE_DAYS)):
+            raise ExpiredToken()
+    else:
+        # Première synchronisation : l'état courant, aucune suppression à rejouer
+        initial = True
+        marks = {'deleted': (horizon, 0)}
+
+    changed = {}
+    deleted = {}
+    remaining = limit
+    synced_posts = marks.get('posts')
+
+    # Suppressions d'abord : un identifiant réutilisé ensuite arrive après, en modification
+    query = select(Tombstone).where(Tombstone.user_id.is_(None) | (Tombstone.user_id == user_id))
+    rows, marks['deleted'], has_more = _page(query, Tombstone, 'deleted_at', marks.get('deleted'), horizon, remaining)
+    left_groups = set()
+    for (tombstone,) in rows:
+        deleted.setdefault(tombstone.kind, set()).add(tombstone.object_id)
+        if tombstone.kind == 'memberships' and tombstone.parent_id is not None:
+            left_groups.add(tombstone.parent_id)
+    remaining -= len(rows)
+    if left_groups:
+        _retract_groups(user_id, left_groups, deleted)
+
+    for table in TABLES:
+        if has_more or remaining <= 0:
+            has_more = True
+            break
+        query = select(table.model, table.visible(user_id).label('visible'))
+        if table.owner:
+            query = query.where(getattr(table.model, table.owner) == user_id)
+        rows, marks[table.name], has_more = _page(query, table.model, 'updated_at', marks.get(table.name), horizon, remaining)
+        remaining -= len(rows)
+        if table.model is GroupMembership and not initial and synced_posts:
+            _check_joined_groups([obj.group_id for obj, visible in rows if obj.joined_at and obj.joined_at >= at], synced_posts)
+        if not initial:
+            # Ligne devenue invisible (rendue privée, supprimée en différé...) : retirée chez le client
+            deleted.setdefault(table.name, set()).update(obj.id for obj, visible in rows if not visible)
+        items = [obj.to_dict() for obj, visible in rows if visible]
+        if items:
+            changed[table.name] = viewer.with_flags(table.flags, items, user_id) if table.flags else items
+
+    return {
+        'changes': changed,
+        'deleted': {name: sorted(ids) for name, ids in deleted.items() if ids},
+        'next': encode_token(horizon, initial and has_more, marks),
+        'has_more': has_more
+    }
+
+def _retract_groups(user_id, group_ids, deleted):
+    # Adhésion supprimée : si le groupe n'est plus visible, ses publications
+    # et leurs commentaires sont retirés chez le client
+    hidden = select(Group.id).where(Group.id.in_(group_ids), ~visibility.groups(user_id))
+    posts = select(Post.id).where(Post.group_id.in_(hidden))
+    deleted.setdefault('posts', set()).update(db.session.scalars(posts))
+    deleted.setdefault('comments', set()).update(db.session.scalars(select(PostComment.id).where(PostComment.post_id.in_(posts))))
+
+def _check_joined_groups(group_ids, synced_posts):
+    # Nouvelle adhésion à un groupe privé : ses publications déjà passées
+    # au-delà de la position du client ne lui reviendraient jamais
+    when, last_id = synced_posts
+    seen = (Post.updated_at < when) | ((Post.updated_at == when) & (Post.id <= last_id))
+    missed = exists().where(
+        Post.group_id.in_(group_ids), seen,
+        exists().where(Group.id == Post.group_id, Group.is_private == True)
+    )
+    if group_ids and db.session.scalar(select(missed)):
+        raise ResyncRequired()
+
+def _tombstone_rows(table, rows):
+    now = datetime.utcnow()
+    return [
+        {'kind': table.name, 'object_id': object_id, 'user_id': owner_id, 'parent_id': parent_id, 'deleted_at': now}
+        for object_id, owner_id, parent_id in rows
+    ]
+
+def _column(model, name):
+    return getattr(model, name) if name else None
+
+def record_deleted(model, ids):
+    # Suppressions en masse (purge, archivage) : hors des événements ORM,
+    # à appeler avant le DELETE, dans la même transaction
+    table = BY_MODEL.get(model)
+    if table is None or not ids:
+        return
+    if table.owner or table.parent:
+        columns = (model.id, _column(model, table.owner), _column(model, table.parent))
+        rows = db.session.execute(select(*columns).where(model.id.in_(ids))).all()
+    else:
+        rows = [(object_id, None, None) for object_id in ids]
+    if rows:
+        db.session.execute(insert(Tombstone.__table__), _tombstone_rows(table, rows))
+
+def _deleted(mapper, connection, target):
+    table = BY_MODEL[mapper.class_]
+    owner_id = getattr(target, table.owner) if table.owner else None
+    parent_id = getattr(target, table.parent) if table.parent else None
+    connection.execute(insert(Tombstone.__table__), _tombstone_rows(table, [(target.id, owner_id, parent_id)]))
+
+for _table in TABLES:
+    event.listen(_table.model, 'after_delete', _deleted)
+
+@event.listens_for(Group, 'after_update')
+def _group_updated(mapper, connection, target):
+    # Groupe rendu privé ou public : ses publications et leurs commentaires
+    # changent de visibilité pour tous, renvoyés ou retirés au prochain passage
+    if not inspect(target).attrs.is_private.history.has_changes():
+        return
+    now = datetime.utcnow()
+    posts = select(Post.id).where(Post.group_id == target.id)
+    connection.execute(update(Post).where(Post.group_id == target.id).values(updated_at=now))
+    connection.execute(update(PostComment).where(PostComment.post_id.in_(posts)).values(updated_at=now))
+
+@job_handler('sync.prune')
+def prune_job(payload):
+    horizon = datetime.utcnow() - timedelta(days=_config('SYNC_TOMBSTONE_DAYS', DEFAULT_TOMBSTONE_DAYS))
+    removed = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < horizon)).rowcount
+    db.session.commit()
+    logger.info('Suppressions synchronisées purgées : %d', removed)
+    enqueue('sync.prune', delay=PRUNE_INTERVAL)
+
+def init_app(app):
+    # Une seule chaîne de purge, même après plusieurs redémarrages
+    pending = db.session.query(Job.id).filter(
+        Job.kind == 'sync.prune',
+        Job.status.in_(('queued', 'running'))
+    ).first()
+    if not pending:
+        enqueue('sync.prune', dedupe_key='sync.prune')
+    db.session.remove()
@@ -0,0 +1,94 @@
+import logging
+import math
+import os
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from src.models.user import db
+from src.models.post import Post, PostLike, PostComment
+
+logger = logging.getLogger(__name__)
+
+# Score de tendance à décroissance exponentielle :
+#   score = log(Σ poids · exp((t_événement - EPOCH) / tau))
+# Comparer deux scores revient à comparer Σ poids · exp(-(maintenant - t) / tau)
+# à n'importe quel instant : un nouvel événement s'ajoute au score sans
+# recalculer les autres, et le classement ne dépend pas de l'heure de lecture.
+EPOCH = datetime(2020, 1, 1)
+HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 12))
+TAU = HALF_LIFE_HOURS * 3600 / math.log(2)
+WEIGHTS = {'post': 1.0, 'like': 1.0, 'comment': 2.0}
+UPDATE_RETRIES = 5
+BACKFILL_BATCH = 500
+
+def contribution(kind, at):
+    return math.log(WEIGHTS[kind]) + (at - EPOCH).total_seconds() / TAU
+
+def initial_score(context=None):
+    created_at = context.get_current_parameters().get('created_at') if context else None
+    return contribution('post', created_at or datetime.utcnow())
+
+def _add(score, value):
+    if score is None:
+        return value
+    high, low = max(score, value), min(score, value)
+    return high + math.log1p(math.exp(low - high))
+
+def _compute(created_at, likes, comments):
+    score = contribution('post', created_at or EPOCH)
+    for at in likes:
+        score = _add(score, contribution('like', at or created_at or EPOCH))
+    for at in comments:
+        score = _add(score, contribution('comment', at or created_at or EPOCH))
+    return score
+
+# Le score n'est pas une modification de la publication : updated_at reste
+# inchangé, sinon chaque like la renverrait à la synchronisation
+def recompute(post_ids):
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    likes, comments = {}, {}
+    for post_id, at in db.session.execute(select(PostLike.post_id, PostLike.created_at).where(PostLike.post_id.in_(post_ids))):
+        likes.setdefault(post_id, []).append(at)
+    for post_id, at in db.session.execute(select(PostComment.post_id, PostComment.created_at).where(PostComment.post_id.in_(post_ids))):
+        comments.setdefault(post_id, []).append(at)
+    rows = db.session.execute(select(Post.id, Post.created_at).where(Post.id.in_(post_ids))).all()
+    for post_id, created_at in rows:
+        score = _compute(created_at, likes.get(post_id, ()), comments.get(post_id, ()))
+        db.session.execute(update(Post).where(Post.id == post_id).values(trending_score=score, updated_at=Post.updated_at))
+
+def record(post_id, kind, at=None):
+    # Mise à jour optimiste : on relit et on recommence si une autre
+    # transaction a modifié le score entre-temps
+    value = contribution(kind, at or datetime.utcnow())
+    for _ in range(UPDATE_RETRIES):
+        current = db.session.execute(select(Post.trending_score).where(Post.id == post_id)).scalar()
+        condition = Post.trending_score.is_(None) if current is None else Post.trending_score == current
+        result = db.session.execute(
+            update(Post).where(Post.id == post_id, condition).values(trending_score=_add(current, value), updated_at=Post.updated_at)
+        )
+        if result.rowcount:
+            return
+    recompute([post_id])
+
+def retract(post_id):
+    # Retrait d'un like : la soustraction en log n'est pas stable, on recalcule
+    recompute([post_id])
+
+def backfill():
+    # Publications antérieures à la colonne trending_score
+    total = 0
+    while True:
+        ids = db.session.execute(
+            select(Post.id).where(Post.trending_score.is_(None)).limit(BACKFILL_BATCH)
+        ).scalars().all()
+        if not ids:
+            break
+        recompute(ids)
+        db.session.commit()
+        total += len(ids)
+    if total:
+        logger.info('Score de tendance calculé pour %d publications', total)
+    return total
@@ -0,0 +1,248 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from src.models.user import db, User, user_to_dict
+from src.services.replicas import RoutingSession
+
+DEFAULT_CACHE_SIZE = 10000
+# Taille des IN (...) : sous la limite de paramètres de SQLite
+LOOKUP_CHUNK = 900
+
+# Colonnes référençant un utilisateur sérialisé en carte, par table
+CARD_REFERENCES = {
+    'post': ('author_id',),
+    'post_comment': ('user_id',),
+    'prayer': ('author_id',),
+    'prayer_support': ('user_id',),
+    'event': ('created_by',),
+    'event_attendance': ('user_id',),
+    'group': ('created_by',),
+    'message': ('sender_id', 'receiver_id'),
+    'notification': ('last_actor_id',),
+    'archived_post': ('author_id',),
+    'archived_post_comment': ('user_id',),
+}
+
+CARD_COLUMNS = [column for column in User.__table__.columns if column.name != 'password_hash']
+
+def _version(updated_at):
+    return updated_at.isoformat() if updated_at else ''
+
+# Niveau partagé entre processus (gunicorn multi-workers) dans un fichier SQLite
+class SQLiteTier:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS user_card (user_id INTEGER PRIMARY KEY, version TEXT NOT NULL, card TEXT NOT NULL)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, versions):
+        found = {}
+        ids = list(versions)
+        conn = self._connection()
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            chunk = ids[start:start + LOOKUP_CHUNK]
+            rows = conn.execute(
+                f'SELECT user_id, version, card FROM user_card WHERE user_id IN ({",".join("?" * len(chunk))})', chunk
+            )
+            for user_id, version, card in rows:
+                if version == versions[user_id]:
+                    found[user_id] = json.loads(card)
+        return found
+
+    def put_many(self, entries):
+        self._connection().executemany(
+            'INSERT OR REPLACE INTO user_card (user_id, version, card) VALUES (?, ?, ?)',
+            [(user_id, version, json.dumps(card)) for user_id, (version, card) in entries.items()]
+        )
+
+    def delete_many(self, user_ids):
+        self._connection().executemany('DELETE FROM user_card WHERE user_id = ?', [(user_id,) for user_id in user_ids])
+
+# Cartes utilisateur (User.to_dict()) rendues une fois par version (id, updated_at) :
+# LRU local au processus, puis niveau partagé facultatif, puis base. Une
+# requête légère sur (id, updated_at) valide les versions ; une modification
+# faite par un autre processus change updated_at et périme donc la carte.
+class UserCardCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.shared = None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.maxsize = int(os.environ.get('USER_CARD_CACHE_SIZE', app.config.get('USER_CARD_CACHE_SIZE', self.maxsize)))
+        shared = os.environ.get('USER_CARD_CACHE_SHARED', app.config.get('USER_CARD_CACHE_SHARED', ''))
+        if shared.startswith('sqlite:///'):
+            self.shared = SQLiteTier(shared[len('sqlite:///'):])
+        app.extensions['user_cards'] = self
+
+    def _versions(self, session, user_ids):
+        versions = {}
+        for start in range(0, len(user_ids), LOOKUP_CHUNK):
+            chunk = user_ids[start:start + LOOKUP_CHUNK]
+            for user_id, updated_at in session.execute(select(User.id, User.updated_at).where(User.id.in_(chunk))):
+                versions[user_id] = _version(updated_at)
+        return versions
+
+    def _load(self, session, user_ids):
+        entries = {}
+        for start in range(0, len(user_ids), LOOKUP_CHUNK):
+            chunk = user_ids[start:start + LOOKUP_CHUNK]
+            for row in session.execute(select(*CARD_COLUMNS).where(User.id.in_(chunk))):
+                entries[row.id] = (_version(row.updated_at), user_to_dict(row))
+        return entries
+
+    def _store(self, entries):
+        with self._lock:
+            for user_id, entry in entries.items():
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_many(self, user_ids, session=None):
+        session = session or db.session
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not user_ids:
+            return {}
+        versions = self._versions(session, user_ids)
+        cards = {}
+        missing = {}
+        with self._lock:
+            for user_id, version in versions.items():
+                entry = self._entries.get(user_id)
+                if entry and entry[0] == version:
+                    self._entries.move_to_end(user_id)
+                    cards[user_id] = entry[1]
+                else:
+                    missing[user_id] = version
+            self.hits += len(cards)
+        if missing and self.shared:
+            found = self.shared.get_many(missing)
+            self.shared_hits += len(found)
+            self._store({user_id: (missing.pop(user_id), card) for user_id, card in found.items()})
+            cards.update(found)
+        if missing:
+            self.misses += len(missing)
+            entries = self._load(session, sorted(missing))
+            self._store(entries)
+            if self.shared:
+                self.shared.put_many(entries)
+            cards.update({user_id: card for user_id, (version, card) in entries.items()})
+        return cards
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        if self.shared:
+            self.shared.delete_many(user_ids)
+
+    def __len__(self):
+        return len(self._entries)
+
+user_cards = UserCardCache()
+
+# Portée d'une sérialisation : cartes déjà résolues et identifiants en attente,
+# résolus ensemble au premier besoin. Portée de la requête Flask (g) par défaut,
+# explicite pour le mode ASGI (card_scope).
+_scope = ContextVar('user_card_scope', default=None)
+
+def _current_scope():
+    scope = _scope.get()
+    if scope is None and has_app_context():
+        scope = g.get('user_cards')
+        if scope is None:
+            scope = g.user_cards = {'cards': {}, 'pending': set(), 'session': None}
+    return scope
+
+@contextmanager
+def card_scope(session=None):
+    token = _scope.set({'cards': {}, 'pending': set(), 'session': session})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+def _references(obj):
+    columns = CARD_REFERENCES.get(getattr(obj, '__tablename__', None), ())
+    # Lecture directe de l'état : pas de chargement si la colonne est différée
+    return [obj.__dict__.get(column) for column in columns]
+
+def prefetch(objects):
+    scope = _current_scope()
+    if scope is not None:
+        scope['pending'].update(user_id for obj in objects for user_id in _references(obj) if user_id is not None)
+
+def user_card(user_id):
+    if user_id is None:
+        return None
+    scope = _current_scope()
+    if scope is None:
+        card = user_cards.get_many([user_id]).get(user_id)
+        return dict(card) if card else None
+    cards = scope['cards']
+    if user_id not in cards:
+        # Toute la page d'un coup : identifiants relevés au chargement des lignes
+        pending = scope['pending']
+        pending.add(user_id)
+        pending.difference_update(cards)
+        found = user_cards.get_many(pending, session=scope['session'])
+        cards.update({pending_id: found.get(pending_id) for pending_id in pending})
+        pending.clear()
+    card = cards[user_id]
+    # Copie : les cartes en cache sont partagées
+    return dict(card) if card else None
+
+@event.listens_for(db.Model, 'load', propagate=True)
+def _collect_references(target, context):
+    columns = CARD_REFERENCES.get(target.__tablename__)
+    if columns:
+        scope = _current_scope()
+        if scope is not None:
+            for column in columns:
+                user_id = target.__dict__.get(column)
+                if user_id is not None:
+                    scope['pending'].add(user_id)
+
+# Invalidation après commit uniquement, quand les changements sont visibles
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_written(mapper, connection, target):
+    object_session(target).info.setdefault('user_cards_dirty', set()).add(target.id)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    dirty = session.info.pop('user_cards_dirty', None)
+    if dirty:
+        user_cards.invalidate(dirty)
+        scope = _current_scope()
+        if scope is not None:
+            for user_id in dirty:
+                scope['cards'].pop(user_id, None)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('user_cards_dirty', None)
@@ -0,0 +1,55 @@
+from sqlalchemy import select
+
+from src.models.user import db
+from src.models.post import PostLike
+from src.models.prayer import PrayerSupport
+from src.models.event import EventAttendance
+from src.models.group import GroupMembership
+from src.models.archive import ArchivedPostLike
+
+# Indicateurs propres à l'utilisateur courant, par table des éléments :
+# table -> (champ, modèle de la relation, clé de l'élément, valeur renvoyée).
+# Sans valeur, l'indicateur est booléen ; sinon la valeur, ou None.
+# Une seule requête IN (...) par page, sur l'index unique (user_id, élément).
+VIEWER_FLAGS = {
+    'post': ('liked_by_me', PostLike, PostLike.post_id, None),
+    'archived_post': ('liked_by_me', ArchivedPostLike, ArchivedPostLike.post_id, None),
+    'prayer': ('supported_by_me', PrayerSupport, PrayerSupport.prayer_id, None),
+    'event': ('my_rsvp', EventAttendance, EventAttendance.event_id, EventAttendance.status),
+    'group': ('is_member', GroupMembership, GroupMembership.group_id, None),
+}
+
+def lookup(table, ids, user_id, session=None):
+    session = session or db.session
+    name, model, key, value = VIEWER_FLAGS[table]
+    ids = sorted(set(ids))
+    if not ids:
+        return {}
+    rows = session.execute(
+        select(key, value if value is not None else key).where(model.user_id == user_id, key.in_(ids))
+    ).all()
+    if value is None:
+        return {item_id: True for item_id, _ in rows}
+    return {item_id: result for item_id, result in rows}
+
+def with_flags(table, items, user_id, fieldset=None, session=None):
+    # Copies des éléments sérialisés (ceux-ci peuvent être partagés, voir
+    # services/singleflight.py) complétées de l'indicateur. Avec ?fields=,
+    # seulement s'il a été demandé.
+    name, model, key, value = VIEWER_FLAGS[table]
+    if not items or (fieldset is not None and name not in fieldset.fields):
+        return items
+    found = lookup(table, [item['id'] for item in items], user_id, session)
+    default = False if value is None else None
+    return [dict(item, **{name: found.get(item['id'], default)}) for item in items]
+
+def with_post_flags(items, user_id, fieldset=None, session=None):
+    # Fil mêlant publications et publications archivées (?include_archived=true)
+    hot = [item for item in items if not item.get('archived')]
+    if len(hot) == len(items):
+        return with_flags('post', items, user_id, fieldset, session)
+    flagged = {}
+    for table, group in (('post', hot), ('archived_post', [item for item in items if item.get('archived')])):
+        for item in with_flags(table, group, user_id, fieldset, session):
+            flagged[(table, item['id'])] = item
+    return [flagged[('archived_post' if item.get('archived') else 'post', item['id'])] for item in items]
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, exists, select
+from sqlalchemy.orm import object_session
+
+from src.models.user import db
+from src.models.post import Post
+from src.models.prayer import Prayer
+from src.models.event import Event, EventAttendance
+from src.models.group import Group, GroupMembership
+from src.services.replicas import RoutingSession
+
+DEFAULT_CACHE_SIZE = 10000
+# Les invalidations ne traversent pas les processus : durée de vie bornée
+DEFAULT_TTL = 30.0
+
+Memberships = namedtuple('Memberships', ['groups', 'events'])
+GroupSets = namedtuple('GroupSets', ['private', 'deleted'])
+
+# Filtres SQL réutilisables : la visibilité est évaluée par la base (EXISTS sur
+# les index uniques (user_id, group_id) / (user_id, event_id)) au lieu de
+# charger les adhésions pour construire des IN (...).
+
+def is_group_member(user_id, group_id):
+    return exists().where(GroupMembership.group_id == group_id, GroupMembership.user_id == user_id)
+
+def posts(user_id, model=Post):
+    # Hors groupe, ou dans un groupe non supprimé, public ou dont l'utilisateur
+    # est membre (model : Post ou ArchivedPost)
+    readable = exists().where(
+        Group.id == model.group_id,
+        Group.deleted_at.is_(None),
+        (Group.is_private == False) | is_group_member(user_id, model.group_id)
+    )
+    return model.group_id.is_(None) | readable
+
+def prayers(user_id):
+    return (Prayer.is_private == False) | (Prayer.author_id == user_id)
+
+def my_events(user_id):
+    attending = exists().where(EventAttendance.event_id == Event.id, EventAttendance.user_id == user_id)
+    return (Event.created_by == user_id) | attending
+
+def events(user_id):
+    return (Event.is_public == True) | my_events(user_id)
+
+def my_groups(user_id):
+    return is_group_member(user_id, Group.id)
+
+def groups(user_id):
+    return (Group.is_private == False) | my_groups(user_id)
+
+# Adhésions de chaque utilisateur (groupes, événements) et ensemble des groupes
+# privés, gardés en mémoire pour les contrôles d'accès unitaires : un test
+# d'appartenance, quel que soit le nombre de groupes ou d'événements suivis.
+class MembershipCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._group_sets = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.maxsize = int(os.environ.get('VISIBILITY_CACHE_SIZE', app.config.get('VISIBILITY_CACHE_SIZE', self.maxsize)))
+        self.ttl = float(os.environ.get('VISIBILITY_CACHE_TTL', app.config.get('VISIBILITY_CACHE_TTL', self.ttl)))
+        app.extensions['memberships'] = self
+
+    def get(self, user_id, session=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        session = session or db.session
+        memberships = Memberships(
+            frozenset(session.scalars(select(GroupMembership.group_id).where(GroupMembership.user_id == user_id))),
+            frozenset(session.scalars(select(EventAttendance.event_id).where(EventAttendance.user_id == user_id)))
+        )
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, memberships)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return memberships
+
+    def group_sets(self, session=None):
+        # Groupes privés et groupes en cours de suppression (masqués jusqu'à la purge)
+        now = time.monotonic()
+        cached = self._group_sets
+        if cached and cached[0] > now:
+            return cached[1]
+        session = session or db.session
+        sets = GroupSets(
+            frozenset(session.scalars(select(Group.id).where(Group.is_private == True))),
+            frozenset(session.scalars(select(Group.id).where(Group.deleted_at.isnot(None))))
+        )
+        self._group_sets = (now + self.ttl, sets)
+        return sets
+
+    def private_groups(self, session=None):
+        return self.group_sets(session).private
+
+    def deleted_groups(self, session=None):
+        return self.group_sets(session).deleted
+
+    def private_memberships(self, user_id, session=None):
+        return self.get(user_id, session).groups & self.private_groups(session)
+
+    def invalidate(self, user_ids=(), groups=False):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+            if groups:
+                self._group_sets = None
+
+    def __len__(self):
+        return len(self._entries)
+
+memberships = MembershipCache()
+
+def as_id(value):
+    # Identifiant venu d'un corps JSON ou d'un paramètre : entier, sinon None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+def can_see_post(user_id, post, session=None):
+    if post.group_id is None:
+        return True
+    return can_see_group_id(user_id, post.group_id, session)
+
+def can_see_prayer(user_id, prayer):
+    return not prayer.is_private or prayer.author_id == user_id
+
+def can_see_event(user_id, event, session=None):
+    if event.is_public or event.created_by == user_id:
+        return True
+    return as_id(event.id) in memberships.get(user_id, session).events
+
+def can_see_group(user_id, group, session=None):
+    return not group.is_private or as_id(group.id) in memberships.get(user_id, session).groups
+
+def can_see_group_id(user_id, group_id, session=None):
+    group_id = as_id(group_id)
+    if group_id is None or group_id in memberships.deleted_groups(session):
+        return False
+    if group_id not in memberships.private_groups(session):
+        return True
+    return group_id in memberships.get(user_id, session).groups
+
+def bulk_deleted(model, ids, session=None):
+    # Suppressions en masse (purge) : hors des événements ORM, à appeler avant
+    # le DELETE ; invalidation au commit comme pour les suppressions unitaires
+    session = session or db.session
+    if model in (GroupMembership, EventAttendance):
+        user_ids = session.scalars(select(model.user_id).where(model.id.in_(ids)).distinct())
+        session.info.setdefault('memberships_dirty', set()).update(user_ids)
+    elif model is Group:
+        session.info['private_groups_dirty'] = True
+
+# Invalidation après commit, comme pour les cartes utilisateur
+@event.listens_for(GroupMembership, 'after_insert')
+@event.listens_for(GroupMembership, 'after_delete')
+@event.listens_for(EventAttendance, 'after_insert')
+@event.listens_for(EventAttendance, 'after_delete')
+def _membership_written(mapper, connection, target):
+    object_session(target).info.setdefault('memberships_dirty', set()).add(target.user_id)
+
+@event.listens_for(Group, 'after_insert')
+@event.listens_for(Group, 'after_update')
+@event.listens_for(Group, 'after_delete')
+def _group_written(mapper, connection, target):
+    object_session(target).info['private_groups_dirty'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    dirty = session.info.pop('memberships_dirty', None)
+    groups_dirty = session.info.pop('private_groups_dirty', False)
+    if dirty or groups_dirty:
+        memberships.invalidate(dirty or (), groups=groups_dirty)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('memberships_dirty', None)
+    session.info.pop('private_groups_dirty', None)
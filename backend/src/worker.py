@@ -0,0 +1,63 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import logging
+import multiprocessing
+
+# Le worker exécute lui-même les jobs : pas de workers intégrés à l'application
+os.environ['JOBS_EMBEDDED_WORKERS'] = '0'
+
+def run_worker(concurrency, poll_interval, kinds, metrics_interval, burst):
+    from src.main import app
+    from src.services.jobs import Worker
+
+    worker = Worker(
+        app,
+        app.extensions['jobs'],
+        concurrency=concurrency,
+        poll_interval=poll_interval,
+        kinds=kinds
+    )
+    if burst:
+        # Vider la file puis s'arrêter
+        while worker.run_once():
+            pass
+        logging.info('Métriques jobs : %s', worker.queue.metrics.snapshot())
+        return
+    worker.run_forever(metrics_interval=metrics_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker de la file de jobs')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='threads par processus')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='nombre de processus')
+    parser.add_argument('-k', '--kinds', nargs='*', help='types de jobs à traiter (tous par défaut)')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--metrics-interval', type=float, default=60.0)
+    parser.add_argument('--burst', action='store_true', help='traiter les jobs disponibles puis quitter')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+
+    options = (args.concurrency, args.poll_interval, args.kinds, args.metrics_interval, args.burst)
+    if args.processes <= 1:
+        run_worker(*options)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=options, name=f'jobs-{index}')
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Base jetable et services d'arrière-plan coupés, avant l'import de l'application
+DATABASE_DIR = tempfile.mkdtemp(prefix='slomah-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DATABASE_DIR, 'app.db')
+os.environ['JOBS_EMBEDDED_WORKERS'] = '0'
+os.environ['ARCHIVE_AFTER_DAYS'] = '0'
+os.environ['RATELIMIT_ENABLED'] = 'false'
+os.environ['SYNC_SETTLE_SECONDS'] = '0'
+
+from src.main import app as flask_app
+from src.models.user import db, User
+from src.services.jobs import Worker
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+@pytest.fixture
+def make_user(app):
+    def make(role='member'):
+        name = uuid.uuid4().hex[:12]
+        with app.app_context():
+            user = User(username=name, email=f'{name}@example.org', first_name='Membre', last_name=name, role=role)
+            # Hachage sans intérêt ici
+            user.password_hash = 'x'
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+@pytest.fixture
+def client_for(app):
+    def make(user_id=None):
+        client = app.test_client()
+        if user_id is not None:
+            with client.session_transaction() as session:
+                session['user_id'] = user_id
+        return client
+    return make
+
+@pytest.fixture
+def run_jobs(app):
+    def run():
+        worker = Worker(app, app.extensions['jobs'])
+        while worker.run_once():
+            pass
+    return run
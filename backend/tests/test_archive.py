@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from src.models.user import db
+from src.models.post import Post, PostLike
+from src.models.archive import ArchivedPost, ArchivedPostLike
+from src.services.archive import archive_posts
+
+OLD = datetime.utcnow() - timedelta(days=800)
+
+def old_post(author_id, liker_id=None, liked_at=OLD):
+    post = Post(content='Ancienne annonce', author_id=author_id, created_at=OLD)
+    db.session.add(post)
+    db.session.flush()
+    if liker_id:
+        db.session.add(PostLike(user_id=liker_id, post_id=post.id, created_at=liked_at))
+    db.session.commit()
+    return post.id
+
+def horizon():
+    return datetime.utcnow() - timedelta(days=365)
+
+def test_archived_ids_are_not_reused(app, make_user):
+    author, liker = make_user(), make_user()
+    with app.app_context():
+        first = old_post(author, liker)
+        archived_like = db.session.query(PostLike.id).filter_by(post_id=first).scalar()
+        # La ligne archivée portait le plus grand identifiant de la table
+        assert archived_like == db.session.query(db.func.max(PostLike.id)).scalar()
+        archive_posts(horizon(), 1000)
+        second = old_post(author, liker)
+        assert db.session.query(PostLike.id).filter_by(post_id=second).scalar() > archived_like
+        archive_posts(horizon(), 1000)
+        assert db.session.get(ArchivedPost, second) is not None
+        assert db.session.get(Post, second) is None
+
+def test_reused_ids_stay_hot(app, make_user):
+    author, liker = make_user(), make_user()
+    with app.app_context():
+        post_id = old_post(author, liker)
+        like_id = db.session.query(PostLike.id).filter_by(post_id=post_id).scalar()
+        # Base créée sans AUTOINCREMENT : identifiant déjà présent dans l'archive
+        db.session.add(ArchivedPostLike(id=like_id, user_id=liker, post_id=0, created_at=OLD))
+        db.session.commit()
+        archive_posts(horizon(), 1000)
+        assert db.session.get(Post, post_id) is not None
+        assert db.session.get(ArchivedPost, post_id) is None
+
+def test_recent_likes_keep_posts_hot(app, make_user):
+    author, liker = make_user(), make_user()
+    with app.app_context():
+        post_id = old_post(author, liker, liked_at=datetime.utcnow())
+        archive_posts(horizon(), 1000)
+        assert db.session.get(Post, post_id) is not None
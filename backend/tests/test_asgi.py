@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from src import asgi
+from src.models.user import db, User
+
+def asgi_get(path, query='', headers=()):
+    # Requête HTTP minimale envoyée à l'application ASGI
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query.encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        try:
+            await asgi.app(scope, receive, send)
+        finally:
+            # Connexions liées à la boucle de cet appel
+            await asgi.dispose()
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+    return start['status'], headers, body
+
+def session_cookie(app, user_id):
+    serializer = app.session_interface.get_signing_serializer(app)
+    return (
+        'cookie',
+        f"{app.config['SESSION_COOKIE_NAME']}={serializer.dumps({'user_id': user_id})}"
+    )
+
+@pytest.fixture
+def native_only(monkeypatch):
+    async def fallback(scope, receive, send):
+        raise AssertionError(f"{scope['path']} servi par Flask")
+    monkeypatch.setattr(asgi, 'wsgi_app', fallback)
+
+def test_asgi_applies_flask_middleware(app, native_only):
+    metrics = app.extensions['metrics']
+    key = ('http_requests_total', (('blueprint', 'posts'), ('endpoint', 'posts.get_posts'), ('method', 'GET'), ('status', '401')))
+    before = metrics.snapshot()['counters'].get(key, 0)
+    status, headers, _ = asgi_get('/api/posts/', headers=[('origin', 'http://client.example')])
+    assert status == 401
+    assert headers['access-control-allow-origin'] == 'http://client.example'
+    assert metrics.snapshot()['counters'].get(key, 0) == before + 1
+
+def test_asgi_matches_flask_views(app, make_user, client_for, native_only):
+    user_id = make_user()
+    client = client_for(user_id)
+    post_id = client.post('/api/posts/', json={'content': 'Même réponse'}).get_json()['post']['id']
+    prayer_id = client.post('/api/prayers/', json={'title': 'Intention', 'description': 'Texte'}).get_json()['prayer']['id']
+    event_id = client.post('/api/events/', json={'title': 'Veillée', 'start_date': '2030-01-01T20:00:00'}).get_json()['event']['id']
+    group_id = client.post('/api/groups/', json={'name': 'Chorale'}).get_json()['group']['id']
+    cookie = session_cookie(app, user_id)
+    for path, query in (
+        (f'/api/posts/{post_id}', ''),
+        ('/api/posts/', 'include_archived=true&per_page=5'),
+        ('/api/posts/', 'fields=id,author,liked_by_me'),
+        ('/api/posts/', 'fields=nope'),
+        (f'/api/prayers/{prayer_id}', ''),
+        ('/api/prayers/', 'my_prayers=true'),
+        (f'/api/events/{event_id}', ''),
+        ('/api/events/', 'upcoming=true&page=0'),
+        (f'/api/groups/{group_id}', 'fields=id,name,is_member'),
+        ('/api/groups/', 'my_groups=true'),
+        ('/api/groups/999999', ''),
+    ):
+        status, _, data = asgi_get(path, query, headers=[cookie])
+        expected = client.get(path, query_string=query)
+        assert status == expected.status_code, path
+        assert data == expected.data, path
+
+def test_asgi_rejects_inactive_user(app, make_user, native_only):
+    user_id = make_user()
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+    status, _, _ = asgi_get('/api/posts/', headers=[session_cookie(app, user_id)])
+    assert status == 401
@@ -0,0 +1,72 @@
+def test_bulk_provisioning_requires_session(client_for):
+    response = client_for().post('/api/users/bulk', json={'users': []})
+    assert response.status_code == 401
+
+def test_bulk_provisioning_is_admin_only(make_user, client_for):
+    response = client_for(make_user()).post('/api/users/bulk', json={'users': [
+        {'email': 'intrus@example.org', 'username': 'intrus', 'first_name': 'A', 'last_name': 'B'}
+    ]})
+    assert response.status_code == 403
+    assert 'temporary_passwords' not in response.get_json()
+
+def test_bulk_provisioning_by_admin(make_user, client_for):
+    response = client_for(make_user(role='admin')).post('/api/users/bulk', json={'users': [
+        {'email': 'nouveau@example.org', 'username': 'nouveau', 'first_name': 'A', 'last_name': 'B'},
+        {'email': 'nouveau@example.org', 'username': 'autre', 'first_name': 'A', 'last_name': 'B'},
+    ]})
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['created'] == 1
+    assert [item['row'] for item in data['rejected']] == [1]
+    assert list(data['temporary_passwords']) == ['nouveau@example.org']
+
+def test_bulk_provisioning_rejects_malformed_items(make_user, client_for):
+    client = client_for(make_user(role='admin'))
+    assert client.post('/api/users/bulk', json={'users': [5]}).status_code == 400
+    assert client.post('/api/users/bulk', json={'users': [{'email': 3}]}).status_code == 400
+
+def test_delete_user_requires_session(make_user, client_for):
+    assert client_for().delete(f'/api/users/{make_user()}').status_code == 401
+
+def test_delete_user_is_owner_or_admin(make_user, client_for):
+    target = make_user()
+    assert client_for(make_user()).delete(f'/api/users/{target}').status_code == 403
+    assert client_for(make_user(role='admin')).delete(f'/api/users/{target}').status_code == 202
+
+def test_delete_own_account(make_user, client_for):
+    user_id = make_user()
+    client = client_for(user_id)
+    assert client.delete(f'/api/users/{user_id}').status_code == 202
+    # Session fermée avec le compte
+    assert client.get('/api/posts/').status_code == 401
+
+def test_delete_group_is_creator_or_admin(make_user, client_for):
+    creator = client_for(make_user())
+    group_id = creator.post('/api/groups/', json={'name': 'Chorale'}).get_json()['group']['id']
+    assert client_for().delete(f'/api/groups/{group_id}').status_code == 401
+    assert client_for(make_user()).delete(f'/api/groups/{group_id}').status_code == 403
+    assert client_for(make_user(role='admin')).delete(f'/api/groups/{group_id}').status_code == 202
+
+def test_invitation_batch_is_admin_only(make_user, client_for):
+    assert client_for().post('/api/auth/invitations/batch', json={'count': 2}).status_code == 401
+    assert client_for(make_user()).post('/api/auth/invitations/batch', json={'count': 2}).status_code == 403
+    admin = client_for(make_user(role='admin'))
+    assert admin.post('/api/auth/invitations/batch', json={'count': True}).status_code == 400
+    response = admin.post('/api/auth/invitations/batch', json={'count': 2})
+    assert response.status_code == 201
+    assert len(response.get_json()['codes']) == 2
+
+def test_invitation_list_is_admin_only(make_user, client_for):
+    assert client_for().get('/api/auth/invitations').status_code == 401
+    assert client_for(make_user()).get('/api/auth/invitations').status_code == 403
+    assert client_for(make_user(role='admin')).get('/api/auth/invitations').status_code == 200
+
+def test_deleted_account_sessions_are_closed(make_user, client_for):
+    user_id = make_user()
+    other_session = client_for(user_id)
+    assert other_session.get('/api/posts/').status_code == 200
+    assert client_for(make_user(role='admin')).delete(f'/api/users/{user_id}').status_code == 202
+    # Purge pas encore exécutée : le compte est seulement désactivé
+    assert other_session.get('/api/posts/').status_code == 401
+    assert other_session.get('/api/groups/').status_code == 401
+    assert other_session.get('/api/auth/me').status_code == 401
@@ -0,0 +1,29 @@
+from src.models.user import db, User
+
+def test_directory_cursor_survives_separators(app, make_user, client_for):
+    ids = [make_user() for _ in range(4)]
+    with app.app_context():
+        for index, user_id in enumerate(ids):
+            user = db.session.get(User, user_id)
+            user.last_name = 'Zzz|Annuaire'
+            user.first_name = f'Pré|nom|{index}'
+        db.session.commit()
+    client = client_for(ids[0])
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 1}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/users', query_string=params)
+        assert response.status_code == 200
+        data = response.get_json()
+        seen += [user['id'] for user in data['users'] if user['last_name'] == 'Zzz|Annuaire']
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == ids
+
+def test_directory_rejects_malformed_cursor(make_user, client_for):
+    client = client_for(make_user())
+    for cursor in ('nimporte', 'WzEsMl0', 'WyJhIiwiYiIsdHJ1ZV0'):
+        assert client.get('/api/users', query_string={'cursor': cursor}).status_code == 400
@@ -0,0 +1,16 @@
+from werkzeug.security import generate_password_hash
+
+from src.services.hashing import PasswordHasher
+
+def test_needs_rehash_with_short_method_names():
+    hasher = PasswordHasher(method='scrypt')
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+    assert not hasher.needs_rehash(generate_password_hash('secret', 'scrypt:32768:8:1'))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:1000'))
+
+def test_needs_rehash_after_parameter_change():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    stored = hasher.hash('secret')
+    assert not hasher.needs_rehash(stored)
+    hasher.configure(2, 32, 5.0, 'pbkdf2:sha256:2000')
+    assert hasher.needs_rehash(stored)
@@ -0,0 +1,28 @@
+from sqlalchemy import event
+
+from src.models.user import db
+
+def test_notification_messages_use_actor_cards(app, make_user, client_for, run_jobs):
+    author = client_for(make_user())
+    post_ids = [author.post('/api/posts/', json={'content': f'Annonce {n}'}).get_json()['post']['id'] for n in range(3)]
+    for post_id in post_ids:
+        assert client_for(make_user()).post(f'/api/posts/{post_id}/like').status_code in (200, 201)
+    run_jobs()
+
+    statements = []
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        notifications = author.get('/api/notifications/').get_json()['notifications']
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    assert len(notifications) == 3
+    for notification in notifications:
+        actor = notification['last_actor']
+        assert notification['message'] == f"{actor['first_name']} {actor['last_name']} a aimé votre publication"
+    # Cartes des acteurs chargées ensemble, pas une requête par notification
+    assert len([statement for statement in statements if 'FROM user' in statement]) <= 3
@@ -0,0 +1,22 @@
+from src.models.user import db, User
+from src.models.group import Group
+from src.models.post import Post
+from src.services.purge import purge_job
+
+def test_user_purge_removes_orphaned_groups_first(app, make_user, client_for):
+    owner, member = make_user(), make_user()
+    client = client_for(owner)
+    alone = client.post('/api/groups/', json={'name': 'Seul'}).get_json()['group']['id']
+    shared = client.post('/api/groups/', json={'name': 'Partagé'}).get_json()['group']['id']
+    post_id = client.post('/api/posts/', json={'content': 'Annonce', 'group_id': alone}).get_json()['post']['id']
+    assert client_for(member).post(f'/api/groups/{shared}/join').status_code == 201
+    assert client_for(owner).delete(f'/api/users/{owner}').status_code == 202
+
+    with app.app_context():
+        # Le plan complet, sans le reste de la file
+        purge_job({'kind': 'user', 'id': owner})
+        assert db.session.get(User, owner) is None
+        assert db.session.get(Group, alone) is None
+        assert db.session.get(Post, post_id) is None
+        assert db.session.get(Group, shared).created_by == member
+        assert not Group.query.filter(~Group.created_by.in_(db.session.query(User.id))).count()
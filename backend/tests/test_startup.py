@@ -0,0 +1,28 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+LEGACY_DATABASE = os.path.join(BACKEND_DIR, 'src', 'database', 'app.db')
+
+def test_startup_upgrades_existing_database(tmp_path):
+    # Base livrée avec le dépôt : schéma antérieur (user sans first_name/last_name)
+    path = tmp_path / 'app.db'
+    shutil.copy(LEGACY_DATABASE, path)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', JOBS_EMBEDDED_WORKERS='0')
+    result = subprocess.run(
+        [sys.executable, '-c', 'import src.main'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    conn = sqlite3.connect(path)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(post)')}
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 'trending_score' in columns
+    assert 'ix_post_trending' in indexes
+    # Colonnes NOT NULL non ajoutables : index correspondant ignoré
+    assert 'ix_user_name' not in indexes
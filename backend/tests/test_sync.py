@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.group import Group, GroupMembership
+from src.services import sync
+
+def pull(client, since=None, limit=None):
+    # Tranches jusqu'à épuisement, fusionnées
+    changes, deleted = {}, {}
+    while True:
+        params = {}
+        if since:
+            params['since'] = since
+        if limit:
+            params['limit'] = limit
+        response = client.get('/api/sync', query_string=params)
+        assert response.status_code == 200, response.get_json()
+        data = response.get_json()
+        for name, items in data['changes'].items():
+            changes.setdefault(name, []).extend(item['id'] for item in items)
+        for name, ids in data['deleted'].items():
+            deleted.setdefault(name, set()).update(ids)
+        since = data['next']
+        if not data['has_more']:
+            return changes, deleted, since
+
+@pytest.fixture
+def private_group(app, make_user, client_for):
+    owner, member = make_user(), make_user()
+    client = client_for(owner)
+    group_id = client.post('/api/groups/', json={'name': 'Conseil', 'is_private': True}).get_json()['group']['id']
+    post_id = client.post('/api/posts/', json={'content': 'Ordre du jour', 'group_id': group_id}).get_json()['post']['id']
+    comment_id = client.post(f'/api/posts/{post_id}/comments', json={'content': 'Lu'}).get_json()['comment']['id']
+    with app.app_context():
+        db.session.add(GroupMembership(user_id=member, group_id=group_id))
+        db.session.commit()
+    return owner, member, group_id, post_id, comment_id
+
+def test_invalid_and_expired_tokens(app, make_user, client_for):
+    client = client_for(make_user())
+    assert client.get('/api/sync?since=nimporte').status_code == 400
+    with app.app_context():
+        token = sync.encode_token(datetime.utcnow() - timedelta(days=365), False, {})
+    response = client.get('/api/sync', query_string={'since': token})
+    assert response.status_code == 410
+    assert response.get_json()['reset'] is True
+
+def test_chunks_cover_everything_once(make_user, client_for):
+    client = client_for(make_user())
+    created = [client.post('/api/posts/', json={'content': f'Message {n}'}).get_json()['post']['id'] for n in range(5)]
+    changes, _, _ = pull(client, limit=2)
+    assert set(created) <= set(changes['posts'])
+    assert len(changes['posts']) == len(set(changes['posts']))
+
+def test_deletions_and_likes(make_user, client_for):
+    client = client_for(make_user())
+    kept = client.post('/api/posts/', json={'content': 'Reste'}).get_json()['post']['id']
+    removed = client.post('/api/posts/', json={'content': 'Part'}).get_json()['post']['id']
+    _, _, token = pull(client)
+    # Un like ne modifie pas la publication
+    assert client_for(make_user()).post(f'/api/posts/{kept}/like').status_code in (200, 201)
+    assert client.delete(f'/api/posts/{removed}').status_code == 200
+    changes, deleted, _ = pull(client, token)
+    assert kept not in changes.get('posts', [])
+    assert removed in deleted['posts']
+
+def test_purge_leaves_tombstones(private_group, client_for, run_jobs):
+    owner, _, group_id, post_id, comment_id = private_group
+    client = client_for(owner)
+    _, _, token = pull(client)
+    assert client.delete(f'/api/groups/{group_id}').status_code == 202
+    run_jobs()
+    _, deleted, _ = pull(client, token)
+    assert group_id in deleted['groups']
+    assert post_id in deleted['posts']
+    assert comment_id in deleted['comments']
+
+def test_leaving_private_group_retracts_its_posts(private_group, client_for):
+    _, member, group_id, post_id, comment_id = private_group
+    client = client_for(member)
+    changes, _, token = pull(client)
+    assert post_id in changes['posts']
+    assert client.post(f'/api/groups/{group_id}/leave').status_code == 200
+    _, deleted, _ = pull(client, token)
+    assert post_id in deleted['posts']
+    assert comment_id in deleted['comments']
+
+def test_group_made_private_retracts_its_posts(app, make_user, client_for):
+    owner = client_for(make_user())
+    group_id = owner.post('/api/groups/', json={'name': 'Ouvert'}).get_json()['group']['id']
+    post_id = owner.post('/api/posts/', json={'content': 'Public', 'group_id': group_id}).get_json()['post']['id']
+    outsider = client_for(make_user())
+    changes, _, token = pull(outsider)
+    assert post_id in changes['posts']
+    with app.app_context():
+        db.session.get(Group, group_id).is_private = True
+        db.session.commit()
+    _, deleted, _ = pull(outsider, token)
+    assert group_id in deleted['groups']
+    assert post_id in deleted['posts']
+
+def test_joining_private_group_forces_resync(app, private_group, make_user, client_for):
+    _, _, group_id, post_id, _ = private_group
+    newcomer = make_user()
+    client = client_for(newcomer)
+    changes, _, token = pull(client)
+    assert post_id not in changes.get('posts', [])
+    with app.app_context():
+        db.session.add(GroupMembership(user_id=newcomer, group_id=group_id))
+        db.session.commit()
+    response = client.get('/api/sync', query_string={'since': token})
+    assert response.status_code == 410
+    assert response.get_json()['reset'] is True
+    changes, _, _ = pull(client)
+    assert post_id in changes['posts']
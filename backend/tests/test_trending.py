@@ -0,0 +1,19 @@
+from src.models.user import db
+from src.models.post import Post
+from src.services import trending
+
+def test_score_updates_keep_updated_at(app, make_user, client_for):
+    author = client_for(make_user())
+    post_id = author.post('/api/posts/', json={'content': 'Annonce'}).get_json()['post']['id']
+    with app.app_context():
+        before = db.session.get(Post, post_id)
+        updated_at, score = before.updated_at, before.trending_score
+    assert client_for(make_user()).post(f'/api/posts/{post_id}/like').status_code in (200, 201)
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        assert post.trending_score > score
+        assert post.updated_at == updated_at
+        trending.recompute([post_id])
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(Post, post_id).updated_at == updated_at
@@ -0,0 +1,66 @@
+import pytest
+
+from src.services.visibility import memberships
+
+@pytest.fixture
+def private_group(make_user, client_for):
+    owner = make_user()
+    client = client_for(owner)
+    group_id = client.post('/api/groups/', json={'name': 'Conseil', 'is_private': True}).get_json()['group']['id']
+    post_id = client.post('/api/posts/', json={'content': 'Ordre du jour', 'group_id': group_id}).get_json()['post']['id']
+    return owner, group_id, post_id
+
+def test_private_group_posts_hidden_from_outsiders(private_group, make_user, client_for):
+    owner, group_id, post_id = private_group
+    outsider = client_for(make_user())
+    feed = outsider.get('/api/posts/?per_page=100').get_json()['posts']
+    assert post_id not in [post['id'] for post in feed]
+    assert outsider.get(f'/api/posts/{post_id}').status_code == 403
+    assert outsider.get(f'/api/posts/?group_id={group_id}').status_code == 403
+    member = client_for(owner)
+    feed = member.get(f'/api/posts/?group_id={group_id}').get_json()['posts']
+    assert [post['id'] for post in feed] == [post_id]
+    assert member.get(f'/api/posts/{post_id}').status_code == 200
+
+def test_create_post_group_id_is_validated(private_group, make_user, client_for):
+    owner, group_id, _ = private_group
+    member = client_for(owner)
+    response = member.post('/api/posts/', json={'content': 'Texte', 'group_id': str(group_id)})
+    assert response.status_code == 201
+    assert response.get_json()['post']['group_id'] == group_id
+    for value in ('abc', True, 1.5, [group_id]):
+        assert member.post('/api/posts/', json={'content': 'Texte', 'group_id': value}).status_code == 400
+    outsider = client_for(make_user())
+    assert outsider.post('/api/posts/', json={'content': 'Texte', 'group_id': group_id}).status_code == 403
+    assert outsider.post('/api/posts/', json={'content': 'Texte', 'group_id': str(group_id)}).status_code == 403
+
+def test_private_prayers_visible_to_author_only(make_user, client_for):
+    author = client_for(make_user())
+    prayer_id = author.post('/api/prayers/', json={
+        'title': 'Intention', 'description': 'Privée', 'is_private': True
+    }).get_json()['prayer']['id']
+    assert author.get(f'/api/prayers/{prayer_id}').status_code == 200
+    assert client_for(make_user()).get(f'/api/prayers/{prayer_id}').status_code == 403
+
+def test_purge_invalidates_memberships(app, private_group, client_for, run_jobs):
+    owner, group_id, _ = private_group
+    with app.app_context():
+        assert group_id in memberships.get(owner).groups
+    assert client_for(owner).delete(f'/api/groups/{group_id}').status_code == 202
+    run_jobs()
+    with app.app_context():
+        assert group_id not in memberships.get(owner).groups
+        assert group_id not in memberships.private_groups()
+
+def test_deleted_group_is_hidden_before_purge(make_user, client_for):
+    owner = client_for(make_user())
+    group_id = owner.post('/api/groups/', json={'name': 'Ouvert'}).get_json()['group']['id']
+    post_id = owner.post('/api/posts/', json={'content': 'Annonce', 'group_id': group_id}).get_json()['post']['id']
+    assert owner.delete(f'/api/groups/{group_id}').status_code == 202
+    # Purge pas encore exécutée
+    reader = client_for(make_user())
+    feed = reader.get('/api/posts/?per_page=100').get_json()['posts']
+    assert post_id not in [post['id'] for post in feed]
+    assert reader.get(f'/api/posts/?group_id={group_id}').status_code == 403
+    assert reader.get(f'/api/posts/{post_id}').status_code == 403
+    assert owner.post('/api/posts/', json={'content': 'Trop tard', 'group_id': group_id}).status_code == 403